@@ -3,19 +3,27 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 from fastapi import Request, Form, File, UploadFile
-from fastapi.responses import JSONResponse
-from database.models import Sample, StyleProfile
-from utils.style_analyzer import StyleAnalyzer
-from database.database import get_db
+from fastapi.responses import JSONResponse, StreamingResponse
+from database.models import Sample, StyleProfile, AnalysisJob
+from utils.style_stats import stored_excerpts
+from utils.analysis_executor import AnalysisUnavailable, analysis_executor
+from utils.profile_updates import get_sample_stats, subtract_sample, update_profile
+from utils.analysis_cache import analyze_sample_cached
+from utils.tokenizers import ANONYMOUS_TOKENIZER_BACKEND
+from utils.analysis_jobs import spool_upload_files, remove_job_spool, UploadTooLarge, FINISHED_STATUSES
+from database.database import get_db, SessionLocal
 from utils.auth import get_user_or_anonymous
 from fastapi import Cookie
 from typing import List
-import os
-import tempfile
+import json
+import uuid
+import asyncio
+import logging
 
 router = APIRouter(tags=["samples"])
+logger = logging.getLogger(__name__)
 
 
 # @router.post("")
@@ -84,8 +92,8 @@ async def delete_sample_api(
             content={"error": "Sample not found"}
         )
     
-    # Get the profile to check ownership
-    style_profile = db.query(StyleProfile).filter(StyleProfile.id == sample.style_profile_id).first()
+    # Get the profile to check ownership; locked so a finishing upload job cannot overwrite the update
+    style_profile = db.query(StyleProfile).filter(StyleProfile.id == sample.style_profile_id).with_for_update().first()
     
     # Check ownership
     profile_belongs_to_user = False
@@ -100,6 +108,38 @@ async def delete_sample_api(
             content={"error": "You don't have access to this sample"}
         )
     
+    # Take the sample out of the profile statistics instead of re-analyzing the rest
+    try:
+        # Only the stored statistics are needed, and of those only the excerpts
+        remaining = db.query(Sample).options(load_only(Sample.id, Sample.stats)).filter(
+            Sample.style_profile_id == style_profile.id,
+            Sample.id != sample.id
+        ).order_by(Sample.id).all()
+        if (style_profile.profile_stats is not None and sample.stats is not None
+                and all(s.stats is not None for s in remaining)):
+            profile_data, profile_stats = await analysis_executor.run(
+                subtract_sample, style_profile.profile_stats, sample.stats,
+                [stored_excerpts(s.stats) for s in remaining]
+            )
+            style_profile.profile_data = profile_data
+            style_profile.profile_stats = profile_stats
+        else:
+            # Without stored statistics to subtract from, merge the rest; empty if nothing is left
+            await update_profile(style_profile, [await get_sample_stats(s) for s in remaining])
+    except AnalysisUnavailable as e:
+        db.rollback()
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"error": str(e)}
+        )
+    except Exception as e:
+        # Keep the sample rather than leave the profile describing it
+        db.rollback()
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Error updating style profile: {str(e)}"}
+        )
+    
     # Delete the sample
     db.delete(sample)
     db.commit()
@@ -116,7 +156,7 @@ async def retrain_api(
     user, anonymous_user = get_user_or_anonymous(request, db, token)
     
     # Get the profile
-    style_profile = db.query(StyleProfile).filter(StyleProfile.id == profile_id).first()
+    style_profile = db.query(StyleProfile).filter(StyleProfile.id == profile_id).with_for_update().first()
     if not style_profile:
         return JSONResponse(
             status_code=404,
@@ -136,32 +176,30 @@ async def retrain_api(
             content={"error": "You don't have access to this profile"}
         )
     
-    samples = db.query(Sample).filter(Sample.style_profile_id == profile_id).all()
+    samples = db.query(Sample).filter(Sample.style_profile_id == profile_id).order_by(Sample.id).all()
     if not samples:
         return JSONResponse(
             status_code=400,
             content={"error": "No samples found to retrain on"}
         )
     
-    # Initialize analyzer
-    analyzer = StyleAnalyzer()
-    
-    # Add samples to analyzer
-    for sample in samples:
-        analyzer.add_sample(sample.content)
-    
-    # Analyze the style
+    # Merge the stored sample statistics; only samples without them get analyzed
     try:
-        style_profile_data = analyzer.analyze()
+        stats = [await get_sample_stats(sample) for sample in samples]
         
         # Update the style profile with new analysis data
-        style_profile.profile_data = style_profile_data
+        await update_profile(style_profile, stats)
         db.commit()
         
         return JSONResponse(content={
             "success": True,
             "message": "Style profile retrained successfully"
         })
+    except AnalysisUnavailable as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"error": str(e)}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -193,140 +231,151 @@ async def upload_samples_api(
     else:
         style_profile.anonymous_user_id = anonymous_user.id
     
-    analyzer = StyleAnalyzer()
-    successful_samples = 0
-    error_files = []
-    
-    for file in files:
-        try:
-            print(f"Processing file: {file.filename}")
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp:
-                # Read content in chunks to handle large files
-                content = await file.read()
-                temp.write(content)
-                temp_path = temp.name
-            
-            text = ""
-            file_extension = os.path.splitext(file.filename)[1].lower()
-            
-            # Extract text based on file type
-            if file_extension == '.txt':
-                with open(temp_path, 'r', errors='ignore') as f:
-                    text = f.read()
-                print(f"TXT file processed, extracted {len(text)} characters")
-            
-            elif file_extension == '.docx':
-                try:
-                    import docx
-                    doc = docx.Document(temp_path)
-                    text = "\n".join([para.text for para in doc.paragraphs])
-                    print(f"DOCX file processed, extracted {len(text)} characters from {len(doc.paragraphs)} paragraphs")
-                except Exception as doc_err:
-                    print(f"Error processing DOCX: {str(doc_err)}")
-                    error_files.append(f"{file.filename} (DOCX error: {str(doc_err)})")
-            
-            elif file_extension == '.pdf':
-                try:
-                    import PyPDF2
-                    with open(temp_path, 'rb') as f:
-                        pdf_reader = PyPDF2.PdfReader(f)
-                        text_list = []
-                        for page_num in range(len(pdf_reader.pages)):
-                            page = pdf_reader.pages[page_num]
-                            page_text = page.extract_text()
-                            if page_text:
-                                text_list.append(page_text)
-                        text = "\n".join(text_list)
-                        print(f"PDF text extraction attempt 1: extracted {len(text)} characters from {len(pdf_reader.pages)} pages")
-                    
-                    # If no text was extracted, try OCR
-                    if not text.strip():
-                        print("No text extracted from PDF using PyPDF2, trying OCR...")
-                        try:
-                            import pytesseract
-                            from pdf2image import convert_from_path
-                            
-                            # Convert PDF to images
-                            images = convert_from_path(temp_path)
-                            ocr_text_list = []
-                            
-                            for i, image in enumerate(images):
-                                # Use pytesseract to extract text from image
-                                page_text = pytesseract.image_to_string(image)
-                                ocr_text_list.append(page_text)
-                            
-                            text = "\n".join(ocr_text_list)
-                            print(f"PDF OCR successful: extracted {len(text)} characters from {len(images)} pages")
-                        except Exception as ocr_err:
-                            print(f"Error in OCR process: {str(ocr_err)}")
-                            error_files.append(f"{file.filename} (OCR error: {str(ocr_err)})")
-                
-                except Exception as pdf_err:
-                    print(f"Error processing PDF: {str(pdf_err)}")
-                    error_files.append(f"{file.filename} (PDF error: {str(pdf_err)})")
-            
-            else:
-                print(f"Unknown file type: {file_extension}")
-                with open(temp_path, 'r', errors='ignore') as f:
-                    text = f.read()
-                print(f"Attempted to read as text, extracted {len(text)} characters")
-            
-            # Only add sample if text was successfully extracted
-            if text and text.strip():
-                analyzer.add_sample(text)
-                successful_samples += 1
-                
-                # Save the sample
-                sample = Sample(
-                    style_profile_id=style_profile.id,
-                    content=text,
-                    source_type="upload",
-                    filename=file.filename
-                )
-                db.add(sample)
-                print(f"Sample added for {file.filename}")
-            else:
-                print(f"No valid text extracted from {file.filename}")
-                error_files.append(f"{file.filename} (No text extracted)")
-            
-            os.unlink(temp_path)
-            
-        except Exception as e:
-            print(f"General error processing {file.filename}: {str(e)}")
-            error_files.append(f"{file.filename} (Error: {str(e)})")
-            continue
-    
-    db.commit()
-    
-    if successful_samples == 0:
+    # Extraction and analysis run in the background; the client follows the job
+    job = AnalysisJob(
+        id=uuid.uuid4().hex,
+        style_profile_id=style_profile.id,
+        user_id=user.id if user else None,
+        anonymous_user_id=anonymous_user.id if not user else None,
+        status="queued",
+        stage="queued",
+        progress=0,
+        events=[]
+    )
+    try:
+        job.files = await spool_upload_files(job.id, files)
+    except UploadTooLarge as e:
         return JSONResponse(
-            status_code=400,
-            content={
-                "error": "No valid text could be extracted from the uploaded files",
-                "failed_files": error_files
-            }
+            status_code=413,
+            content={"error": str(e)}
+        )
+    except Exception as e:
+        logger.exception("Error saving uploaded files")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Error saving uploaded files: {str(e)}"}
         )
     
     try:
-        print(f"Analyzing {successful_samples} samples")
-        style_profile_data = analyzer.analyze()
-        
-        # Update the style profile with analysis data
-        style_profile.profile_data = style_profile_data
+        db.add(job)
         db.commit()
-        
-        return JSONResponse(content={
-            "success": True,
-            "profile_id": style_profile.id,
-            "message": f"Files uploaded and analyzed successfully ({successful_samples} samples processed)",
-            "warnings": error_files if error_files else None
-        })
     except Exception as e:
-        print(f"Error in analyzing style: {str(e)}")
+        # Without its job row nothing would ever pick the spooled files up
+        db.rollback()
+        remove_job_spool(job.id)
+        logger.exception("Error queueing analysis job %s", job.id)
         return JSONResponse(
             status_code=500,
-            content={"error": f"Error analyzing style: {str(e)}"}
+            content={"error": f"Error queueing analysis job: {str(e)}"}
         )
+    logger.info("Queued analysis job %s for %d files", job.id, len(files))
+    
+    return JSONResponse(
+        status_code=202,
+        content={
+            "success": True,
+            "job_id": job.id,
+            "profile_id": style_profile.id,
+            "status": job.status,
+            "message": f"Files received, analyzing {len(files)} files"
+        }
+    )
+
+
+def job_to_dict(job: AnalysisJob) -> dict:
+    return {
+        "id": job.id,
+        "profile_id": job.style_profile_id,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "error": job.error,
+        "result": job.result,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+def get_owned_job(db: Session, job_id: str, user, anonymous_user) -> Optional[AnalysisJob]:
+    """Return the job if it belongs to the user or anonymous user, otherwise None."""
+    job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+    if not job:
+        return None
+    if user and job.user_id == user.id:
+        return job
+    if anonymous_user and job.anonymous_user_id == anonymous_user.id:
+        return job
+    return None
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_api(
+    request: Request,
+    job_id: str,
+    db: Session = Depends(get_db),
+    token: Optional[str] = Cookie(None, alias="access_token")
+):
+    user, anonymous_user = get_user_or_anonymous(request, db, token)
+    
+    job = get_owned_job(db, job_id, user, anonymous_user)
+    if not job:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Job not found"}
+        )
+    
+    return JSONResponse(content={"job": job_to_dict(job)})
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events_api(
+    request: Request,
+    job_id: str,
+    db: Session = Depends(get_db),
+    token: Optional[str] = Cookie(None, alias="access_token")
+):
+    user, anonymous_user = get_user_or_anonymous(request, db, token)
+    
+    if not get_owned_job(db, job_id, user, anonymous_user):
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Job not found"}
+        )
+    
+    async def event_stream():
+        sent = 0
+        while True:
+            # Fresh session per poll so the worker's commits are visible
+            poll_db = SessionLocal()
+            try:
+                job = poll_db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+                events = job.events or []
+                for event in events[sent:]:
+                    yield f"data: {json.dumps(event)}\n\n"
+                sent = len(events)
+                finished = job.status in FINISHED_STATUSES
+                if finished:
+                    yield f"data: {json.dumps({'job': job_to_dict(job)})}\n\n"
+            finally:
+                poll_db.close()
+            
+            if finished or await request.is_disconnected():
+                break
+            await asyncio.sleep(1)
+        
+        # Send end marker
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Content-Type": "text/event-stream",
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
+        }
+    )
     
 
 @router.post("/analyze-text")
@@ -348,10 +397,6 @@ async def analyze_text_api(request: Request, sample_name: str = Form(...), sampl
     db.commit()
     db.refresh(style_profile)
     
-    # Initialize analyzer
-    analyzer = StyleAnalyzer()
-    analyzer.add_sample(sample_text)
-    
     # Save the sample
     sample = Sample(
         style_profile_id=style_profile.id,
@@ -364,8 +409,11 @@ async def analyze_text_api(request: Request, sample_name: str = Form(...), sampl
     
     # Analyze the style
     try:
-        style_profile_data = analyzer.analyze()
-        style_profile.profile_data = style_profile_data
+        # Anonymous traffic is high volume and goes through the fast tokenizer
+        tokenizer = None if user else ANONYMOUS_TOKENIZER_BACKEND
+        stats = await analyze_sample_cached(db, sample_text, tokenizer)
+        sample.stats = stats.to_dict()
+        await update_profile(style_profile, [sample.stats])
         db.commit()
         
         return JSONResponse(content={
@@ -373,6 +421,11 @@ async def analyze_text_api(request: Request, sample_name: str = Form(...), sampl
             "profile_id": style_profile.id,
             "message": "Text analyzed successfully"
         })
+    except AnalysisUnavailable as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"error": str(e)}
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -0,0 +1,249 @@
+"""Benchmark StyleAnalyzer on generated corpora and check for regressions.
+
+Run from the backend directory (offline; only the local NLTK data is used):
+
+    python -m benchmarks.analyzer_benchmark                     # quick: 10KB and 1MB
+    python -m benchmarks.analyzer_benchmark --full              # 10KB up to 50MB
+    python -m benchmarks.analyzer_benchmark --save-baseline     # store results as the baseline
+
+Every case runs in a fresh process so peak RSS belongs to that case alone; the corpus
+is generated beforehand and only read by that process, so the peak is the text plus
+the analysis. The JSON report goes to stdout (or --output). Cases whose throughput
+dropped or whose peak RSS grew by more than --threshold against the baseline are
+listed under "regressions" and the exit code is 1. Without a baseline the exit code
+is 2: run with --save-baseline first.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+from typing import Any, Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from utils.profiling import StageProfiler  # noqa: E402
+from utils.style_stats import merge_stats  # noqa: E402
+
+
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+
+QUICK_SIZES = ["10KB", "1MB"]
+FULL_SIZES = ["10KB", "100KB", "1MB", "10MB", "50MB"]
+
+# Corpus shapes: sentences per paragraph, punctuation density and number of samples
+SHAPES = {
+    "prose": {"paragraph_sentences": 5, "punctuation": 0.05, "samples": 1},
+    "dialogue": {"paragraph_sentences": 1, "punctuation": 0.25, "samples": 1},
+    "many_samples": {"paragraph_sentences": 3, "punctuation": 0.1, "samples": 50},
+}
+
+_UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+_SYLLABLES = ["ka", "lo", "mi", "ten", "ar", "ve", "sol", "ur", "ne", "do", "pri", "sta",
+              "the", "on", "is", "ge", "ro", "lan", "ti", "mer", "bo", "cu", "in", "es"]
+_COMMON_WORDS = ["the", "of", "and", "to", "a", "in", "that", "it", "is", "was", "I", "for",
+                 "on", "you", "he", "be", "with", "as", "by", "at", "have", "are", "this",
+                 "not", "but", "had", "his", "they", "from", "she", "which", "or", "we"]
+
+
+def parse_size(size: str) -> int:
+    for unit, factor in _UNITS.items():
+        if size.upper().endswith(unit):
+            return int(float(size[:-len(unit)]) * factor)
+    return int(size)
+
+
+def generate_corpus(size: int, paragraph_sentences: int, punctuation: float, seed: int = 0) -> str:
+    """Deterministic English-like text of about ``size`` characters.
+
+    Word frequencies follow a Zipf distribution over a fixed vocabulary; sentence
+    lengths, paragraph lengths and the rate of commas, semicolons, dashes,
+    parentheses, quotes and question or exclamation marks vary with ``punctuation``.
+    """
+    rng = random.Random(seed)
+    vocabulary = _COMMON_WORDS + [
+        "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 4)))
+        for _ in range(20000)
+    ]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+
+    paragraphs = []
+    length = 0
+    while length < size:
+        sentences = []
+        for _ in range(max(1, int(rng.gauss(paragraph_sentences, paragraph_sentences / 2)))):
+            words = rng.choices(vocabulary, cum_weights=cumulative, k=max(1, int(rng.lognormvariate(2.6, 0.6))))
+            for i in range(1, len(words) - 1):
+                roll = rng.random()
+                if roll < punctuation * 0.6:
+                    words[i] += ","
+                elif roll < punctuation * 0.7:
+                    words[i] += ";"
+                elif roll < punctuation * 0.8:
+                    words[i] += " --"
+                elif roll < punctuation * 0.85:
+                    words[i] = f"({words[i]})"
+                elif roll < punctuation * 0.9:
+                    words[i] = f'"{words[i]}"'
+                elif roll < punctuation * 0.92:
+                    words[i] = words[i].upper()
+            roll = rng.random()
+            ending = "?" if roll < punctuation * 0.4 else "!" if roll < punctuation * 0.6 else \
+                "..." if roll < punctuation * 0.7 else "."
+            sentence = " ".join(words) + ending
+            sentences.append(sentence[0].upper() + sentence[1:])
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def split_samples(text: str, samples: int) -> List[str]:
+    """Split a corpus into ``samples`` parts at paragraph breaks."""
+    paragraphs = text.split("\n\n")
+    per_sample = max(1, -(-len(paragraphs) // samples))
+    return ["\n\n".join(paragraphs[i:i + per_sample]) for i in range(0, len(paragraphs), per_sample)]
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize()
+
+
+def run_case(path: str, size_label: str, shape: str) -> Dict[str, Any]:
+    """Analyze the corpus stored at ``path``; meant to run in a fresh process."""
+    from utils.style_analyzer import StyleAnalyzer
+
+    options = SHAPES[shape]
+    with open(path, encoding="utf-8") as f:
+        samples = split_samples(f.read(), options["samples"])
+    rss_before = _rss_bytes()
+
+    profiler = StageProfiler()
+    analyzer = StyleAnalyzer(profiler=profiler)
+
+    # Same steps as an exact StyleAnalyzer.analyze(), keeping the merged stats for the word count
+    started = time.perf_counter()
+    merged = merge_stats([analyzer.analyze_sample(sample, approximate=False) for sample in samples])
+    analyzer.build_profile(merged)
+    seconds = time.perf_counter() - started
+
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {
+        "case": f"{shape}/{size_label}",
+        "shape": shape,
+        "size": size_label,
+        "characters": sum(len(sample) for sample in samples),
+        "samples": len(samples),
+        "words": merged.word_count,
+        "sentences": merged.sentence_count,
+        "seconds": seconds,
+        "words_per_second": merged.word_count / seconds if seconds else 0,
+        "rss_before_bytes": rss_before,
+        "peak_rss_bytes": peak_rss,
+        "stages": {name: record["seconds"] for name, record in profiler.report()["stages"].items()},
+    }
+
+
+def run_isolated(size_label: str, shape: str) -> Dict[str, Any]:
+    options = SHAPES[shape]
+    text = generate_corpus(parse_size(size_label), options["paragraph_sentences"], options["punctuation"])
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt") as corpus:
+        corpus.write(text)
+        corpus.flush()
+        del text
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes=1, maxtasksperchild=1) as pool:
+            return pool.apply(run_case, (corpus.name, size_label, shape))
+
+
+def find_regressions(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    baseline_cases = {case["case"]: case for case in baseline.get("cases", [])}
+    regressions = []
+    for result in results:
+        previous = baseline_cases.get(result["case"])
+        if previous is None:
+            continue
+        if result["words_per_second"] < previous["words_per_second"] * (1 - threshold):
+            regressions.append({
+                "case": result["case"],
+                "metric": "words_per_second",
+                "baseline": previous["words_per_second"],
+                "current": result["words_per_second"],
+            })
+        if result["peak_rss_bytes"] > previous["peak_rss_bytes"] * (1 + threshold):
+            regressions.append({
+                "case": result["case"],
+                "metric": "peak_rss_bytes",
+                "baseline": previous["peak_rss_bytes"],
+                "current": result["peak_rss_bytes"],
+            })
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--full", action="store_true", help="run every size from 10KB to 50MB")
+    parser.add_argument("--sizes", help="comma-separated sizes, e.g. 10KB,5MB")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="comma-separated corpus shapes")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative regression (default 0.2)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes.split(",") if args.sizes else FULL_SIZES if args.full else QUICK_SIZES
+    shapes = args.shapes.split(",")
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+        return 2
+
+    results = []
+    for size_label in sizes:
+        for shape in shapes:
+            result = run_isolated(size_label, shape)
+            print(f"{result['case']}: {result['words_per_second']:.0f} words/s, "
+                  f"peak RSS {result['peak_rss_bytes'] / 2 ** 20:.0f} MB", file=sys.stderr)
+            results.append(result)
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "threshold": args.threshold,
+        "cases": results,
+        "regressions": [],
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({key: report[key] for key in ("python", "machine", "cpu_count", "cases")}, f, indent=2)
+    else:
+        with open(args.baseline) as f:
+            report["regressions"] = find_regressions(results, json.load(f), args.threshold)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Check the memory use of text extraction and style analysis against per-size budgets.
+
+Run from the backend directory (offline; only the local NLTK data is used):
+
+    python -m benchmarks.memory_benchmark                   # 100KB and 1MB
+    python -m benchmarks.memory_benchmark --full            # 100KB up to 50MB
+    python -m benchmarks.memory_benchmark --sizes 10MB --top 10
+
+Every case runs in a fresh process with tracemalloc on. For every stage of the
+case (extraction, then the StyleAnalyzer stages) it reports the peak traced
+memory, the peak RSS sampled while the stage ran, and the source lines holding
+the most memory allocated during the stage and still alive at its end, which
+shows whether sentence lists, token lists or n-gram strings are to blame. Cases
+whose peak traced memory or peak RSS exceed the budget for their size are listed
+under "over_budget" and the exit code is 1.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import multiprocessing
+from contextlib import contextmanager, redirect_stdout
+from typing import Any, Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from benchmarks.analyzer_benchmark import SHAPES, generate_corpus, parse_size, split_samples  # noqa: E402
+from utils.profiling import StageProfiler  # noqa: E402
+
+
+QUICK_SIZES = ["100KB", "1MB"]
+FULL_SIZES = ["100KB", "1MB", "10MB", "50MB"]
+
+# Peak traced Python memory and peak process RSS allowed per input size, in MB
+BUDGETS = {
+    "100KB": {"traced_mb": 10, "rss_mb": 150},
+    "1MB": {"traced_mb": 100, "rss_mb": 400},
+    "10MB": {"traced_mb": 800, "rss_mb": 2000},
+    "50MB": {"traced_mb": 4000, "rss_mb": 8000},
+}
+
+DEFAULT_TOP = 5
+# Snapshots are slow on large heaps, so one is only taken once the traced memory has
+# grown this much since the last; smaller growth is charged to a later stage
+SNAPSHOT_MIN_GROWTH = 256 * 1024
+# Seconds between RSS samples
+RSS_INTERVAL = 0.005
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * _PAGE_SIZE
+
+
+class RssSampler:
+    """Samples the process RSS in a background thread and keeps the peak since the last reset."""
+
+    def __init__(self, interval: float = RSS_INTERVAL):
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def reset(self) -> int:
+        self.peak = _rss_bytes()
+        return self.peak
+
+
+class AllocationProfiler(StageProfiler):
+    """Stage profiler that also records peak RSS and the top allocation sites of each stage.
+
+    A tracemalloc snapshot is taken at the end of a stage and compared with the
+    previous one, so the stage is charged with the memory allocated while it ran
+    and still alive when it ended. Sites are aggregated over repeated stages.
+    """
+
+    def __init__(self, rss: RssSampler, top: int = DEFAULT_TOP):
+        super().__init__(trace_memory=True)
+        self.rss = rss
+        self.top = top
+        self.sites: Dict[str, Dict[str, List[int]]] = {}
+        self._snapshot = self._take_snapshot()
+        self._snapshot_memory = tracemalloc.get_traced_memory()[0]
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    @contextmanager
+    def stage(self, name: str, size: int = 0):
+        rss_before = self.rss.reset()
+        try:
+            with super().stage(name, size):
+                yield
+        finally:
+            record = self.stages[name]
+            record["peak_traced_bytes"] = max(record.get("peak_traced_bytes", 0), tracemalloc.get_traced_memory()[1])
+            record["peak_rss_bytes"] = max(record.get("peak_rss_bytes", 0), self.rss.peak)
+            record["rss_growth_bytes"] = max(record.get("rss_growth_bytes", 0), self.rss.peak - rss_before)
+
+            sites = self.sites.setdefault(name, {})
+            if tracemalloc.get_traced_memory()[0] - self._snapshot_memory >= SNAPSHOT_MIN_GROWTH:
+                snapshot = self._take_snapshot()
+                for diff in snapshot.compare_to(self._snapshot, "lineno"):
+                    if diff.size_diff > 0:
+                        frame = diff.traceback[0]
+                        site = sites.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+                        site[0] += diff.size_diff
+                        site[1] += diff.count_diff
+                self._snapshot = snapshot
+                self._snapshot_memory = tracemalloc.get_traced_memory()[0]
+
+    def report(self, label: Optional[str] = None) -> Dict[str, Any]:
+        report = super().report(label)
+        root = os.path.dirname(BENCHMARK_DIR) + os.sep
+        for name, record in report["stages"].items():
+            sites = sorted(self.sites.get(name, {}).items(), key=lambda item: item[1][0], reverse=True)
+            record["top_allocations"] = [
+                {"site": site.replace(root, ""), "bytes": size, "blocks": count}
+                for site, (size, count) in sites[:self.top]
+            ]
+        return report
+
+
+def _write_inputs(text: str, directory: str) -> Dict[str, str]:
+    """Write the corpus as every uploadable format that can be generated here."""
+    paths = {"txt": os.path.join(directory, "corpus.txt")}
+    with open(paths["txt"], "w") as f:
+        f.write(text)
+    try:
+        import docx
+    except ImportError:
+        return paths
+    document = docx.Document()
+    for paragraph in text.split("\n\n"):
+        document.add_paragraph(paragraph)
+    paths["docx"] = os.path.join(directory, "corpus.docx")
+    document.save(paths["docx"])
+    return paths
+
+
+def run_case(size_label: str, shape: str, top: int) -> Dict[str, Any]:
+    """Extract and analyze one generated corpus under tracemalloc; meant to run in a fresh process."""
+    # Parse in this process, where tracemalloc sees it, rather than in extraction workers
+    os.environ["EXTRACTION_WORKERS"] = "0"
+    from utils.style_analyzer import StyleAnalyzer
+    from utils.text_extraction import extract_text
+
+    options = SHAPES[shape]
+    text = generate_corpus(parse_size(size_label), options["paragraph_sentences"], options["punctuation"])
+    with tempfile.TemporaryDirectory() as directory:
+        paths = _write_inputs(text, directory)
+        characters = len(text)
+        del text
+
+        rss = RssSampler()
+        rss.start()
+        tracemalloc.start()
+        profiler = AllocationProfiler(rss, top)
+        started = time.perf_counter()
+
+        for file_format, path in paths.items():
+            with profiler.stage(f"extraction_{file_format}", os.path.getsize(path)):
+                extracted = extract_text(path, os.path.basename(path))
+            if file_format == "txt":
+                text = extracted
+            del extracted
+        analyzer = StyleAnalyzer(profiler=profiler)
+        for sample in split_samples(text, options["samples"]):
+            analyzer.add_sample(sample)
+        del text
+        analyzer.analyze(approximate=False)
+
+        seconds = time.perf_counter() - started
+        report = profiler.report()
+        tracemalloc.stop()
+        rss.stop()
+
+    return {
+        "case": f"{shape}/{size_label}",
+        "size": size_label,
+        "characters": characters,
+        "formats": list(paths),
+        "seconds": seconds,
+        "peak_traced_bytes": max(record["peak_traced_bytes"] for record in report["stages"].values()),
+        "peak_rss_bytes": max(record["peak_rss_bytes"] for record in report["stages"].values()),
+        "stages": report["stages"],
+    }
+
+
+def run_isolated(size_label: str, shape: str, top: int) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=1, maxtasksperchild=1) as pool:
+        return pool.apply(_run_case_quietly, (size_label, shape, top))
+
+
+def _run_case_quietly(size_label: str, shape: str, top: int) -> Dict[str, Any]:
+    # Keep the log lines of extraction out of the JSON report on stdout
+    with redirect_stdout(sys.stderr):
+        return run_case(size_label, shape, top)
+
+
+def check_budget(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    budget = BUDGETS.get(result["size"])
+    if budget is None:
+        return []
+    over = []
+    for metric, limit_key in (("peak_traced_bytes", "traced_mb"), ("peak_rss_bytes", "rss_mb")):
+        limit = budget[limit_key] * 2 ** 20
+        if result[metric] > limit:
+            worst = max(result["stages"].items(), key=lambda item: item[1].get(metric, 0))
+            over.append({"case": result["case"], "metric": metric, "budget": limit,
+                         "current": result[metric], "worst_stage": worst[0]})
+    return over
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--full", action="store_true", help="run every size from 100KB to 50MB")
+    parser.add_argument("--sizes", help="comma-separated sizes, e.g. 1MB,10MB")
+    parser.add_argument("--shapes", default="prose,dialogue", help="comma-separated corpus shapes")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="allocation sites reported per stage")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes.split(",") if args.sizes else FULL_SIZES if args.full else QUICK_SIZES
+    results = []
+    for size_label in sizes:
+        for shape in args.shapes.split(","):
+            result = run_isolated(size_label, shape, args.top)
+            print(f"{result['case']}: peak traced {result['peak_traced_bytes'] / 2 ** 20:.0f} MB, "
+                  f"peak RSS {result['peak_rss_bytes'] / 2 ** 20:.0f} MB", file=sys.stderr)
+            results.append(result)
+
+    report = {
+        "budgets": BUDGETS,
+        "cases": results,
+        "over_budget": [over for result in results for over in check_budget(result)],
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 1 if report["over_budget"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
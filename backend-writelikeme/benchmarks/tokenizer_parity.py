@@ -0,0 +1,160 @@
+"""Measure how far the fast tokenizer backend drifts from the NLTK one.
+
+Run from the backend directory:
+
+    python -m benchmarks.tokenizer_parity                      # generated corpora
+    python -m benchmarks.tokenizer_parity sample1.txt book.txt  # real texts
+
+For every text it reports sentence boundary agreement (precision/recall/F1 of the
+fast backend's sentence ends against NLTK's), token agreement on the sentences
+both backends split identically, token counts, the relative drift of the main
+profile metrics and the overlap of the list-valued ones, plus the speed of each
+backend. The JSON report goes to stdout (or --output).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+from typing import Any, Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from benchmarks.analyzer_benchmark import SHAPES, generate_corpus, parse_size  # noqa: E402
+from utils.style_analyzer import StyleAnalyzer  # noqa: E402
+from utils.text_document import TextDocument  # noqa: E402
+from utils.tokenizers import get_tokenizer  # noqa: E402
+
+
+REFERENCE = "nltk"
+CANDIDATE = "fast"
+
+# Profile metrics compared as relative differences
+NUMERIC_METRICS = {
+    "avg_sentence_length": lambda p: p["sentence_stats"]["avg_length"],
+    "sentence_length_std_dev": lambda p: p["sentence_stats"]["std_dev"],
+    "short_sentences": lambda p: p["sentence_stats"]["length_distribution"]["short"],
+    "medium_sentences": lambda p: p["sentence_stats"]["length_distribution"]["medium"],
+    "long_sentences": lambda p: p["sentence_stats"]["length_distribution"]["long"],
+    "questions": lambda p: p["sentence_stats"]["sentence_types"]["question"],
+    "avg_word_length": lambda p: p["word_stats"]["avg_length"],
+    "lexical_diversity": lambda p: p["word_stats"]["lexical_diversity"],
+    "punctuation_density": lambda p: p["structure_stats"]["punctuation_patterns"]["density"],
+    "avg_paragraph_sentences": lambda p: p["structure_stats"]["avg_paragraph_sentences"],
+}
+# Profile lists compared by overlap (Jaccard)
+LIST_METRICS = {
+    "common_starters": lambda p: [starter for starter, _ in p["sentence_stats"]["common_starters"]],
+    "distinctive_words": lambda p: p["word_stats"]["distinctive_words"],
+    "signature_phrases": lambda p: p["distinctive_patterns"]["signature_phrases"],
+    "quirks": lambda p: p["distinctive_patterns"]["quirks"],
+}
+
+
+def _ratio(part: float, whole: float) -> float:
+    return part / whole if whole else 1.0
+
+
+def compare_documents(reference: TextDocument, candidate: TextDocument) -> Dict[str, Any]:
+    reference_ends = {end for _, end in reference.sentence_spans}
+    candidate_ends = {end for _, end in candidate.sentence_spans}
+    matched = len(reference_ends & candidate_ends)
+    precision = _ratio(matched, len(candidate_ends))
+    recall = _ratio(matched, len(reference_ends))
+
+    candidate_sentences = {span: i for i, span in enumerate(candidate.sentence_spans)}
+    same_spans = identical_tokens = 0
+    for i, span in enumerate(reference.sentence_spans):
+        j = candidate_sentences.get(span)
+        if j is None:
+            continue
+        same_spans += 1
+        identical_tokens += reference.sentence_tokens(i) == candidate.sentence_tokens(j)
+
+    reference_tokens = Counter(reference.tokens)
+    candidate_tokens = Counter(candidate.tokens)
+    return {
+        "sentences": {
+            "reference": len(reference.sentence_spans),
+            "candidate": len(candidate.sentence_spans),
+            "boundary_precision": precision,
+            "boundary_recall": recall,
+            "boundary_f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        },
+        "tokens": {
+            "reference": len(reference.tokens),
+            "candidate": len(candidate.tokens),
+            "identical_sentence_tokens": _ratio(identical_tokens, same_spans),
+            "multiset_overlap": _ratio(
+                sum((reference_tokens & candidate_tokens).values()),
+                max(len(reference.tokens), len(candidate.tokens))
+            ),
+        },
+    }
+
+
+def compare_profiles(reference: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    drift = {}
+    for name, metric in NUMERIC_METRICS.items():
+        expected, actual = metric(reference), metric(candidate)
+        drift[name] = {
+            "reference": expected,
+            "candidate": actual,
+            "relative_difference": abs(actual - expected) / abs(expected) if expected else abs(actual),
+        }
+    for name, metric in LIST_METRICS.items():
+        expected, actual = set(metric(reference)), set(metric(candidate))
+        drift[name] = {"overlap": _ratio(len(expected & actual), len(expected | actual))}
+    return drift
+
+
+def compare_text(label: str, text: str) -> Dict[str, Any]:
+    documents, profiles, seconds = {}, {}, {}
+    for backend in (REFERENCE, CANDIDATE):
+        tokenizer = get_tokenizer(backend)
+        started = time.perf_counter()
+        documents[backend] = TextDocument(text, tokenizer=tokenizer)
+        seconds[backend] = time.perf_counter() - started
+
+        analyzer = StyleAnalyzer(tokenizer=backend)
+        profiles[backend] = analyzer.build_profile(analyzer._document_stats(documents[backend]))
+
+    result = {"text": label, "characters": len(text)}
+    result.update(compare_documents(documents[REFERENCE], documents[CANDIDATE]))
+    result["profile_drift"] = compare_profiles(profiles[REFERENCE], profiles[CANDIDATE])
+    result["tokenize_seconds"] = seconds
+    result["speedup"] = _ratio(seconds[REFERENCE], seconds[CANDIDATE])
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="text files to compare (default: generated corpora)")
+    parser.add_argument("--size", default="200KB", help="size of each generated corpus")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    texts: List = []
+    if args.files:
+        for path in args.files:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                texts.append((path, f.read()))
+    else:
+        for shape, options in SHAPES.items():
+            texts.append((shape, generate_corpus(parse_size(args.size), options["paragraph_sentences"],
+                                                 options["punctuation"])))
+
+    report = {"reference": REFERENCE, "candidate": CANDIDATE, "texts": [compare_text(*text) for text in texts]}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
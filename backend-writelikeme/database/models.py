@@ -2,6 +2,7 @@ from sqlalchemy import Column, String, Integer, ForeignKey, Text, JSON, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import uuid
 
 Base = declarative_base()
 
@@ -49,6 +50,7 @@ class StyleProfile(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     profile_data = Column(JSON)  # Store the full style profile as JSON
+    profile_stats = Column(JSON, nullable=True)  # Merged statistics of all samples
     is_common = Column(Boolean, default=False)
     user = relationship("User", back_populates="style_profiles")
     anonymous_user = relationship("AnonymousUser", back_populates="style_profiles")
@@ -65,10 +67,55 @@ class Sample(Base):
     content = Column(Text)
     source_type = Column(String)  # "upload" or "paste"
     filename = Column(String, nullable=True)  # For uploaded files or sample name
+    stats = Column(JSON, nullable=True)  # Mergeable style statistics of this sample
     created_at = Column(DateTime, default=datetime.utcnow)
     style_profile = relationship("StyleProfile", back_populates="samples")
 
 
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: uuid.uuid4().hex)
+    style_profile_id = Column(Integer, ForeignKey("style_profiles.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    anonymous_user_id = Column(Integer, ForeignKey("anonymous_users.id"), nullable=True)
+    status = Column(String, default="queued", index=True)  # "queued", "running", "completed", "failed"
+    stage = Column(String, default="queued")  # "queued", "extracting", "analyzing", "merging", "completed", "failed"
+    progress = Column(Integer, default=0)  # percent
+    files = Column(JSON)  # [{"filename": ..., "path": ..., "size": ..., "sha256": ...}] spooled uploads
+    events = Column(JSON)  # progress events, oldest first
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    style_profile = relationship("StyleProfile")
+
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+
+    content_hash = Column(String(64), primary_key=True)  # sha256 of the normalized text and analysis version
+    stats = Column(JSON)  # StyleStats.to_dict() of the text
+    text_length = Column(Integer)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ExtractionCacheEntry(Base):
+    __tablename__ = "extraction_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256 of the raw file, its extension and the extraction version
+    text = Column(Text)  # text extracted from the file
+    text_bytes = Column(Integer)  # UTF-8 size of the text, counted against the cache size limit
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
 class Generation(Base):
     __tablename__ = "generations"
 
@@ -21,6 +21,11 @@ from utils.llm_integration import LLMIntegration
 from utils.auth import get_user_or_anonymous
 from apis.base import api_router
 from utils.rate_limiter import limiter
+from utils.analysis_executor import analysis_executor
+from utils.analysis_jobs import job_worker, UPLOAD_MAX_BODY_BYTES
+from utils.body_limit import BodySizeLimitMiddleware
+from utils.text_extraction import shutdown_extraction_pool
+from utils.tokenizers import warmup as warmup_tokenizers
 from utils.admin_auth import AdminAuth
 from admin.admin import UserAdmin, AnonymousUserAdmin, StyleProfileAdmin, SampleAdmin, GenerationAdmin, ConsumptionAdmin, PaymentAttemptAdmin, PaymentHistoryAdmin
 
@@ -64,6 +69,27 @@ app.add_middleware(
     secret_key=os.getenv("SECRET_KEY", "your-secret-key")
 )
 
+# Refuse oversized uploads before Starlette parses and spools the multipart body
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/api/samples/upload": UPLOAD_MAX_BODY_BYTES}
+)
+
+
+@app.on_event("startup")
+async def start_analysis_executor():
+    # Tokenizer data is local; load it now rather than on the first request
+    warmup_tokenizers()
+    analysis_executor.start()
+    job_worker.start()
+
+
+@app.on_event("shutdown")
+async def stop_analysis_executor():
+    await job_worker.stop()
+    analysis_executor.shutdown()
+    shutdown_extraction_pool()
+
 
 def get_template_context(request: Request, user: Optional[User] = None, anonymous_user: Optional[AnonymousUser] = None, **kwargs):
     context = {"request": request, **kwargs}
@@ -0,0 +1,39 @@
+import os
+import sys
+
+# Run from anywhere: the backend directory holds the utils/database/apis packages
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The punkt data is not needed by the fast tokenizer; tests use it unless they ask for nltk
+os.environ.setdefault("TOKENIZER_BACKEND", "fast")
+os.environ.setdefault("DB_URL", "sqlite://")
+# Files are parsed in the test process unless a test starts the extraction pool itself
+os.environ.setdefault("EXTRACTION_WORKERS", "0")
+
+import pytest  # noqa: E402
+
+from benchmarks.analyzer_benchmark import generate_corpus  # noqa: E402
+
+
+def punkt_available() -> bool:
+    from utils.nltk_resources import get_punkt
+    try:
+        get_punkt()
+    except LookupError:
+        return False
+    return True
+
+
+requires_punkt = pytest.mark.skipif(not punkt_available(), reason="punkt tokenizer data not installed")
+
+# Tests taking minutes, like the larger memory budget cases; run them with RUN_SLOW_TESTS=1
+slow = pytest.mark.skipif(os.getenv("RUN_SLOW_TESTS", "").lower() not in ("1", "true", "yes"),
+                          reason="slow test, set RUN_SLOW_TESTS=1 to run it")
+
+
+@pytest.fixture
+def corpus():
+    """Deterministic English-like text of about ``size`` characters."""
+    def make(size: int, paragraph_sentences: int = 4, punctuation: float = 0.1, seed: int = 0) -> str:
+        return generate_corpus(size, paragraph_sentences, punctuation, seed)
+    return make
@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, AnalysisCacheEntry
+from utils import analysis_cache
+from utils.analysis_cache import analyze_sample_cached, content_hash, normalize_text
+from utils.style_analyzer import StyleAnalyzer
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_equivalent_texts_share_an_analysis_entry(db, corpus):
+    text = corpus(2000, seed=3)
+    first = asyncio.run(analyze_sample_cached(db, text))
+    db.commit()
+    again = asyncio.run(analyze_sample_cached(db, "\n  " + text.replace("\n", "\r\n") + "  \n"))
+
+    entry = db.get(AnalysisCacheEntry, content_hash(normalize_text(text)))
+    assert entry.hits == 1
+    assert again.to_dict() == first.to_dict() == StyleAnalyzer().analyze_sample(normalize_text(text)).to_dict()
+
+
+def test_expired_and_least_recent_analysis_entries_are_evicted(db, monkeypatch):
+    monkeypatch.setattr(analysis_cache, "ANALYSIS_CACHE_MAX_ENTRIES", 2)
+    now = datetime.utcnow()
+    for key, age in (("expired", 60), ("old", 3), ("recent", 2), ("newest", 1)):
+        at = now - timedelta(days=age)
+        db.add(AnalysisCacheEntry(content_hash=key, stats={}, text_length=0, created_at=at, last_used_at=at))
+    db.commit()
+
+    analysis_cache.evict_cache_entries(db)
+
+    assert sorted(key for key, in db.query(AnalysisCacheEntry.content_hash)) == ["newest", "recent"]
@@ -0,0 +1,43 @@
+import os
+import time
+import asyncio
+
+import pytest
+
+from utils import analysis_executor
+from utils.analysis_executor import AnalysisExecutor, AnalysisQueueFull, AnalysisTimeout, AnalysisUnavailable
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    # Workers need no tokenizer data to run the builtins below
+    monkeypatch.setattr(analysis_executor, "_warm_worker", int)
+    executor = AnalysisExecutor(workers=1, max_queue=1, timeout=0.5, start_method="spawn")
+    executor.start()
+    yield executor
+    executor.shutdown()
+
+
+def test_timed_out_job_stays_pending_until_it_finishes(executor):
+    async def scenario():
+        with pytest.raises(AnalysisTimeout):
+            await executor.run(time.sleep, 2)
+        # The worker is still busy with the timed-out job, so the queue is still full
+        assert executor.pending == 1
+        with pytest.raises(AnalysisQueueFull):
+            await executor.run(abs, -1)
+        await asyncio.sleep(3)
+        assert executor.pending == 0
+        assert await executor.run(abs, -1) == 1
+
+    asyncio.run(scenario())
+
+
+def test_dead_worker_restarts_the_pool(executor):
+    async def scenario():
+        with pytest.raises(AnalysisUnavailable):
+            await executor.run(os._exit, 1)
+        assert executor.pending == 0
+        assert await executor.run(abs, -3) == 3
+
+    asyncio.run(scenario())
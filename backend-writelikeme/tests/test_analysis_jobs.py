@@ -0,0 +1,175 @@
+import io
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.datastructures import UploadFile
+
+from database.models import Base, AnalysisJob, ExtractionCacheEntry, Sample, StyleProfile
+from utils import analysis_jobs
+from utils.analysis_executor import analysis_executor
+from utils.style_analyzer import StyleAnalyzer
+from utils.style_stats import StyleStats
+from utils.text_extraction import IncompleteExtraction
+
+
+@pytest.fixture
+def sessions(monkeypatch, tmp_path):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(analysis_jobs, "SessionLocal", factory)
+    monkeypatch.setattr(analysis_jobs, "JOB_SPOOL_DIR", str(tmp_path))
+    return factory
+
+
+@pytest.fixture
+def db(sessions):
+    session = sessions()
+    yield session
+    session.close()
+
+
+def queue_job(db, profile: StyleProfile, files: dict) -> AnalysisJob:
+    job = AnalysisJob(id=f"job-{profile.id}", style_profile_id=profile.id, status="queued", stage="queued",
+                      progress=0, events=[])
+    uploads = [UploadFile(io.BytesIO(text.encode()), filename=name) for name, text in files.items()]
+    job.files = asyncio.run(analysis_jobs.spool_upload_files(job.id, uploads))
+    db.add(job)
+    db.commit()
+    return job
+
+
+def interfere(monkeypatch, change):
+    """Run ``change`` in another session while the job analyzes its files."""
+    analyze = analysis_jobs._analyze
+
+    async def analyze_and_change(db, text):
+        change()
+        return await analyze(db, text)
+
+    monkeypatch.setattr(analysis_jobs, "_analyze", analyze_and_change)
+
+
+def test_job_merges_into_the_current_profile_stats(db, sessions, corpus, monkeypatch):
+    profile = StyleProfile(name="profile")
+    db.add(profile)
+    db.commit()
+    queue_job(db, profile, {"a.txt": corpus(3000, seed=1)})
+    concurrent = StyleAnalyzer().analyze_sample(corpus(3000, seed=2))
+
+    def update_profile_elsewhere():
+        other = sessions()
+        other.get(StyleProfile, profile.id).profile_stats = concurrent.to_dict()
+        other.commit()
+        other.close()
+
+    interfere(monkeypatch, update_profile_elsewhere)
+    job = analysis_jobs.claim_next_job(db)
+    asyncio.run(analysis_jobs.process_upload_job(db, job))
+
+    db.refresh(profile)
+    assert job.status == "completed"
+    assert StyleStats.from_dict(profile.profile_stats).documents == 2
+    assert db.query(Sample).count() == 1
+
+
+def test_profile_is_merged_in_the_analysis_executor(db, corpus, monkeypatch):
+    profile = StyleProfile(name="profile")
+    db.add(profile)
+    db.commit()
+    queue_job(db, profile, {"a.txt": corpus(3000, seed=1)})
+    jobs = []
+    run = analysis_executor.run
+
+    async def recording_run(func, *args):
+        jobs.append(func.__name__)
+        return await run(func, *args)
+
+    monkeypatch.setattr(analysis_executor, "run", recording_run)
+    job = analysis_jobs.claim_next_job(db)
+    asyncio.run(analysis_jobs.process_upload_job(db, job))
+
+    db.refresh(profile)
+    assert job.status == "completed"
+    assert jobs[-1] == "merge_profile"
+    assert profile.profile_data["sentence_stats"]["avg_length"] > 0
+
+
+def test_file_extracted_in_part_is_analyzed_but_not_cached(db, corpus, monkeypatch):
+    profile = StyleProfile(name="profile")
+    db.add(profile)
+    db.commit()
+    text = corpus(3000, seed=1)
+    queue_job(db, profile, {"scan.pdf": "%PDF-1.7"})
+
+    def extract_in_part(path, filename):
+        raise IncompleteExtraction("OCR error, 1 of 3 pages without text: tesseract failed", text)
+
+    monkeypatch.setattr(analysis_jobs, "extract_text", extract_in_part)
+    job = analysis_jobs.claim_next_job(db)
+    asyncio.run(analysis_jobs.process_upload_job(db, job))
+
+    assert job.status == "completed"
+    assert job.result["warnings"] == ["scan.pdf (Extracted in part: OCR error, 1 of 3 pages without text: tesseract failed)"]
+    assert db.query(Sample).one().content == text
+    assert db.query(ExtractionCacheEntry).count() == 0
+
+
+def test_job_claimed_again_does_not_write_twice(db, sessions, corpus, monkeypatch):
+    profile = StyleProfile(name="profile")
+    db.add(profile)
+    db.commit()
+    queue_job(db, profile, {"a.txt": corpus(3000, seed=1)})
+    job = analysis_jobs.claim_next_job(db)
+    attempt = job.attempts
+    assert analysis_jobs.touch_job(job.id, attempt)
+
+    def claim_elsewhere():
+        # Another worker took the job over, as if this run had gone stale
+        other = sessions()
+        other.get(AnalysisJob, job.id).attempts = attempt + 1
+        other.commit()
+        other.close()
+
+    interfere(monkeypatch, claim_elsewhere)
+    asyncio.run(analysis_jobs.process_upload_job(db, job))
+
+    db.refresh(profile)
+    assert db.query(Sample).count() == 0
+    assert profile.profile_stats is None
+    assert job.status == "running"
+    assert not analysis_jobs.touch_job(job.id, attempt)
+
+
+def add_job(db, job_id: str, status: str, age: float, updated: float = 0, attempts: int = 0) -> AnalysisJob:
+    now = datetime.utcnow()
+    job = AnalysisJob(id=job_id, status=status, stage=status, progress=0, events=[], files=[], attempts=attempts,
+                      created_at=now - timedelta(seconds=age), updated_at=now - timedelta(seconds=updated))
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_jobs_are_claimed_oldest_first(db):
+    add_job(db, "newer", "queued", age=10)
+    add_job(db, "older", "queued", age=20)
+    add_job(db, "done", "completed", age=30)
+
+    claimed = [analysis_jobs.claim_next_job(db) for _ in range(3)]
+
+    assert [job and job.id for job in claimed] == ["older", "newer", None]
+    assert all(job.status == "running" and job.attempts == 1 for job in claimed[:2])
+
+
+def test_only_stale_running_jobs_are_claimed_again(db):
+    add_job(db, "alive", "running", age=30, updated=analysis_jobs.JOB_STALE_SECONDS - 60)
+    add_job(db, "stale", "running", age=20, updated=analysis_jobs.JOB_STALE_SECONDS + 60, attempts=1)
+
+    job = analysis_jobs.claim_next_job(db)
+
+    assert job.id == "stale" and job.attempts == 2
+    assert analysis_jobs.claim_next_job(db) is None
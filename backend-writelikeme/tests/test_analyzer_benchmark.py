@@ -0,0 +1,20 @@
+import json
+
+from benchmarks import analyzer_benchmark
+
+
+def test_missing_baseline_is_an_error(tmp_path):
+    assert analyzer_benchmark.main(["--baseline", str(tmp_path / "baseline.json")]) == 2
+
+
+def test_saved_baseline_is_compared_against(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    options = ["--sizes", "10KB", "--shapes", "prose", "--baseline", str(baseline), "--output", str(tmp_path / "report.json")]
+
+    assert analyzer_benchmark.main(options + ["--save-baseline"]) == 0
+    saved = json.loads(baseline.read_text())
+    saved["cases"][0]["words_per_second"] *= 10
+    baseline.write_text(json.dumps(saved))
+    assert analyzer_benchmark.main(options + ["--threshold", "0.5"]) == 1
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert [regression["metric"] for regression in report["regressions"]] == ["words_per_second"]
@@ -0,0 +1,44 @@
+import utils.style_analyzer as style_analyzer
+from utils.approximate import estimate_vocabulary
+from utils.style_analyzer import StyleAnalyzer
+from utils.style_stats import StyleStats, merge_stats
+
+
+def test_approximate_profile_estimates_vocabulary_and_keeps_rare_words(corpus):
+    text = corpus(400_000)
+    analyzer = StyleAnalyzer()
+    analyzer.add_sample(text)
+    exact = analyzer.analyze(approximate=False)["word_stats"]
+    profile = analyzer.analyze_approximate(budget=50_000)
+    approximate = profile["word_stats"]
+
+    assert profile["approximation"]["sampled_characters"] < 60_000
+    assert profile["approximation"]["unavailable"] == []
+    assert abs(approximate["vocabulary_size"] / exact["vocabulary_size"] - 1) < 0.1
+    assert abs(approximate["lexical_diversity"] / exact["lexical_diversity"] - 1) < 0.1
+    assert len(approximate["rare_words"]) == 5
+
+
+def test_vocabulary_estimate_is_exact_below_the_sketch_size():
+    assert estimate_vocabulary(["The cat saw the dog.", "A dog, the DOG; a bird."]) == 6
+
+
+def test_analyze_sample_approximates_a_long_sample(corpus, monkeypatch):
+    monkeypatch.setattr(style_analyzer, "APPROXIMATE_THRESHOLD", 100_000)
+    analyzer = StyleAnalyzer()
+    long_text = corpus(400_000, seed=1)
+
+    stats = StyleStats.from_dict(analyzer.analyze_sample(long_text).to_dict())
+    assert stats.documents == 1
+    assert stats.approximation["documents"] == 1
+    assert stats.approximation["total_characters"] >= 390_000
+    assert stats.vocabulary_estimate is not None
+    assert analyzer.analyze_sample(long_text, approximate=False).approximation == {}
+
+    merged = merge_stats([stats, analyzer.analyze_sample(corpus(5_000, seed=2))])
+    summary = analyzer.build_profile(merged)["approximation"]
+    assert summary["documents"] == 1
+    assert summary["unavailable"] == [
+        "word_stats.vocabulary_size", "word_stats.lexical_diversity", "word_stats.rare_words"
+    ]
+    assert "approximation" not in analyzer.build_profile(merged.subtract(stats))
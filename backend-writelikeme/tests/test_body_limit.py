@@ -0,0 +1,72 @@
+import asyncio
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from utils.body_limit import BodySizeLimitMiddleware
+
+
+def make_client(limit: int):
+    app = FastAPI()
+    app.state.uploads = []
+
+    @app.post("/upload")
+    async def upload(files: list[UploadFile] = File(...)):
+        app.state.uploads.append([file.filename for file in files])
+        return {"files": len(files)}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/upload": limit})
+    return app, TestClient(app)
+
+
+def test_body_under_the_limit_reaches_the_app():
+    app, client = make_client(10_000)
+    response = client.post("/upload", files=[("files", ("a.txt", b"x" * 1000))])
+    assert response.status_code == 200
+    assert app.state.uploads == [["a.txt"]]
+
+
+def test_declared_content_length_over_the_limit_is_refused_unread():
+    sent = []
+
+    async def app(scope, receive, send):
+        raise AssertionError("the app must not be called")
+
+    async def receive():
+        raise AssertionError("the body must not be read")
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/upload", "headers": [(b"content-length", b"20000")]}
+    asyncio.run(BodySizeLimitMiddleware(app, {"/upload": 10_000})(scope, receive, send))
+
+    assert sent[0]["status"] == 413
+
+
+def test_streamed_body_over_the_limit_is_cut_off():
+    app, client = make_client(10_000)
+
+    def chunks():
+        # No Content-Length: the body is sent chunked
+        yield b'--boundary\r\nContent-Disposition: form-data; name="files"; filename="a.txt"\r\n\r\n'
+        for _ in range(100):
+            yield b"x" * 1000
+        yield b"\r\n--boundary--\r\n"
+
+    response = client.post(
+        "/upload", content=chunks(), headers={"content-type": "multipart/form-data; boundary=boundary"}
+    )
+    assert response.status_code == 413
+    assert "error" in response.json()
+    assert app.state.uploads == []
+
+
+def test_other_paths_are_not_limited():
+    _, client = make_client(10)
+    response = client.post("/other", files={"file": ("a.txt", b"x" * 1000)})
+    assert response.status_code == 200
@@ -0,0 +1,49 @@
+import re
+
+import numpy as np
+import pytest
+
+from utils.char_stats import CharacterStats
+
+
+TEXTS = [
+    "It was LOUD, VERY LOUD. THE END... USA's team -- ABC123 x A B OK!",
+    "ÉCOLE and CAFÉ: Ünited, ÀB CD.",
+    # Letters outside Latin-1 are word characters too
+    "ABĀ is not shouting, nor is ĀAB or AĀB. But ΑΒ AB—CD 😀OK😀 are.",
+    "Wait.... what?? Yes, and then -- well, BUT no!!!",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_all_caps_words_match_the_regex(text):
+    assert CharacterStats(text).all_caps_words() == len(re.findall(r'\b[A-Z]{2,}\b', text))
+
+
+def test_non_latin_letters_do_not_end_a_capital_run():
+    assert CharacterStats("ABĀ").all_caps_words() == 0
+    assert CharacterStats("ĀAB AB").all_caps_words() == 1
+    assert CharacterStats("AB—CD").all_caps_words() == 2
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_counts_and_runs_match_the_string(text):
+    chars = CharacterStats(text)
+    for char in ".,!?-;:'":
+        assert chars.count(char) == text.count(char)
+        assert chars.positions(char).tolist() == [i for i, c in enumerate(text) if c == char]
+    for run in ("...", "--", "!!", "??"):
+        assert chars.run_count(run[0], len(run)) == text.count(run)
+    assert chars.em_dashes == text.count("—")
+
+
+def test_sentence_presence_matches_the_string():
+    text = "Yes, and no. 😀 Why, But? Fine, andrew; Ōk, but. end , and"
+    spans = np.array([(0, 12), (13, 24), (25, 49), (50, len(text))])
+    sentences = [text[start:end] for start, end in spans]
+    chars = CharacterStats(text)
+
+    assert chars.sentences_containing("?", spans).tolist() == ["?" in s for s in sentences]
+    assert chars.sentences_with_conjunction(spans).tolist() == [
+        ", and" in s.lower() or ", but" in s.lower() for s in sentences
+    ]
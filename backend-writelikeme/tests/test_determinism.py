@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Builds a profile the way the API does (per-sample statistics merged, then built),
+# plus an approximate one, and prints them with the excerpts they picked
+SCRIPT = """
+import json
+from benchmarks.analyzer_benchmark import generate_corpus
+from utils.style_analyzer import StyleAnalyzer
+from utils.style_stats import StyleStats, merge_stats
+
+samples = [generate_corpus(20_000, 4, 0.1, seed) for seed in range(3)]
+analyzer = StyleAnalyzer()
+merged = merge_stats([StyleStats.from_dict(analyzer.analyze_sample(s).to_dict()) for s in samples])
+for sample in samples:
+    analyzer.add_sample(sample)
+print(json.dumps({
+    "profile": analyzer.build_profile(merged),
+    "approximate": analyzer.analyze(approximate=True),
+}, sort_keys=True, default=str))
+"""
+
+
+def build_profile(hash_seed: str) -> dict:
+    env = dict(os.environ, PYTHONHASHSEED=hash_seed, TOKENIZER_BACKEND="fast")
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_profile_does_not_depend_on_the_hash_seed():
+    first, second = build_profile("1"), build_profile("4242")
+
+    assert first["profile"]["excerpts"]
+    assert first["profile"]["excerpts"] == second["profile"]["excerpts"]
+    assert first == second
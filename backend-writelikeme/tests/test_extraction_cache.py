@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, ExtractionCacheEntry
+from utils import extraction_cache
+from utils.extraction_cache import extraction_key, get_cached_text, store_cached_text
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def spooled(name: str, sha256: str) -> dict:
+    return {"filename": name, "path": f"/spool/{name}", "size": 1, "sha256": sha256}
+
+
+def test_extracted_text_is_reused_by_content_and_extension(db):
+    store_cached_text(db, spooled("a.pdf", "ab" * 32), "Extracted text")
+    db.commit()
+
+    assert get_cached_text(db, spooled("renamed.pdf", "ab" * 32)) == "Extracted text"
+    assert get_cached_text(db, spooled("a.txt", "ab" * 32)) is None
+    assert get_cached_text(db, spooled("a.pdf", "cd" * 32)) is None
+    assert get_cached_text(db, spooled("a.pdf", "")) is None
+    assert db.get(ExtractionCacheEntry, extraction_key(spooled("a.pdf", "ab" * 32))).hits == 1
+
+
+def test_extraction_cache_evicts_least_recent_text_beyond_its_size(db, monkeypatch):
+    monkeypatch.setattr(extraction_cache, "EXTRACTION_CACHE_MAX_BYTES", 10)
+    store_cached_text(db, spooled("a.txt", "a" * 64), "12345")
+    db.commit()
+    store_cached_text(db, spooled("b.txt", "b" * 64), "67890")
+    db.commit()
+    get_cached_text(db, spooled("a.txt", "a" * 64))
+    db.commit()
+    store_cached_text(db, spooled("c.txt", "c" * 64), "abc")
+    db.commit()
+    store_cached_text(db, spooled("d.txt", "d" * 64), "x" * 11)
+
+    assert get_cached_text(db, spooled("a.txt", "a" * 64)) == "12345"
+    assert get_cached_text(db, spooled("b.txt", "b" * 64)) is None
+    assert get_cached_text(db, spooled("c.txt", "c" * 64)) == "abc"
+    assert get_cached_text(db, spooled("d.txt", "d" * 64)) is None
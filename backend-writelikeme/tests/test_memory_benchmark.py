@@ -0,0 +1,36 @@
+import pytest
+
+from benchmarks import memory_benchmark
+from conftest import slow
+
+
+# The smallest size takes seconds and always runs; the larger ones take minutes under tracemalloc
+QUICK_CASES = [
+    pytest.param(size, marks=[] if index == 0 else [slow])
+    for index, size in enumerate(memory_benchmark.QUICK_SIZES)
+]
+
+
+@pytest.mark.parametrize("shape", ["prose", "dialogue"])
+@pytest.mark.parametrize("size", QUICK_CASES)
+def test_quick_sizes_stay_within_budget(size, shape):
+    result = memory_benchmark.run_isolated(size, shape, top=3)
+    assert memory_benchmark.check_budget(result) == []
+
+
+def test_over_budget_cases_name_their_worst_stage():
+    budget = memory_benchmark.BUDGETS["100KB"]["traced_mb"] * 2 ** 20
+    result = {
+        "case": "prose/100KB",
+        "size": "100KB",
+        "peak_traced_bytes": budget + 1,
+        "peak_rss_bytes": 0,
+        "stages": {
+            "extraction_txt": {"peak_traced_bytes": 1, "peak_rss_bytes": 0},
+            "ngrams": {"peak_traced_bytes": budget + 1, "peak_rss_bytes": 0},
+        },
+    }
+
+    over = memory_benchmark.check_budget(result)
+
+    assert [(entry["metric"], entry["worst_stage"]) for entry in over] == [("peak_traced_bytes", "ngrams")]
@@ -0,0 +1,108 @@
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.analysis_executor import AnalysisExecutor, AnalysisQueueFull
+from utils.parallel_analysis import (
+    _analyze_chunk, analyze_parallel, analyze_sample_chunked, chunk_bounds, clean_cut, merge_chunks
+)
+from utils.style_analyzer import StyleAnalyzer
+
+
+def paragraphs(corpus, size, seed=0):
+    # A one-letter word before a paragraph break reads as an initial, which
+    # joins sentences across the break; keep the cuts clean for the parity checks
+    return re.sub(r"\b(\w)\.\n\n", r"\1\1.\n\n", corpus(size, seed=seed))
+
+
+def test_merged_chunks_equal_the_single_pass_statistics(corpus):
+    text = paragraphs(corpus, 120_000)
+    analyzer = StyleAnalyzer()
+    cuts = chunk_bounds(text, 20_000)
+    chunks = [_analyze_chunk(text[start:end], "fast", None) for start, end in zip(cuts, cuts[1:])]
+
+    merged = merge_chunks(text, cuts, chunks, analyzer)
+    exact = analyzer.analyze_sample(text)
+
+    assert len(cuts) > 3
+    assert merged.to_dict() == exact.to_dict()
+    assert list(merged.transitions) == list(exact.transitions)
+    assert analyzer.build_profile(merged) == analyzer.build_profile(exact)
+
+
+def test_cut_inside_a_sentence_is_refused():
+    text = "This ends with a.\n\nThen it goes on. " * 20
+    cuts = chunk_bounds(text, 100)
+    chunks = [_analyze_chunk(text[start:end], "fast", None) for start, end in zip(cuts, cuts[1:])]
+
+    assert len(cuts) > 2
+    assert merge_chunks(text, cuts, chunks, StyleAnalyzer()) is None
+
+
+def test_cuts_are_checked_before_chunks_are_analyzed():
+    # Breaks after an initial or after a bare word cannot be cut at; the others can
+    text = "This ends with a.\n\nNo full stop here\n\nThen it goes on.\n\n" * 20
+    analyzer = StyleAnalyzer()
+    cuts = chunk_bounds(text, 100, analyzer.tokenizer)
+    chunks = [_analyze_chunk(text[start:end], "fast", None) for start, end in zip(cuts, cuts[1:])]
+
+    assert len(cuts) > 3
+    assert all(clean_cut(text, cut, analyzer.tokenizer) for cut in cuts[1:-1])
+    assert merge_chunks(text, cuts, chunks, analyzer).to_dict() == analyzer.analyze_sample(text).to_dict()
+
+
+def test_a_sample_without_clean_breaks_is_not_cut():
+    text = "This ends with a.\n\nNo full stop here\n\n" * 50
+    assert chunk_bounds(text, 100, StyleAnalyzer().tokenizer) == [0, len(text)]
+
+
+def test_a_failed_chunk_cancels_the_other_chunks(corpus):
+    text = paragraphs(corpus, 300_000, seed=3)
+    cancelled = []
+
+    class BusyExecutor(AnalysisExecutor):
+        async def run(self, func, *args):
+            if not cancelled:
+                cancelled.append(None)
+                raise AnalysisQueueFull("busy")
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(args[0])
+                raise
+
+    async def analyze():
+        with pytest.raises(AnalysisQueueFull):
+            await analyze_sample_chunked(text, "fast", executor)
+        # Give the cancelled jobs a turn of the loop before checking on them
+        await asyncio.sleep(0)
+        return len(cancelled) - 1
+
+    executor = BusyExecutor(workers=4)
+    chunks = len(chunk_bounds(text, len(text) // 4, StyleAnalyzer().tokenizer)) - 1
+    assert chunks > 2
+    assert asyncio.run(analyze()) == chunks - 1
+
+
+def test_analyze_parallel_matches_analyze(corpus):
+    samples = [paragraphs(corpus, 200_000, seed=1), corpus(5_000, seed=2)]
+    analyzer = StyleAnalyzer(seed=7)
+    for sample in samples:
+        analyzer.add_sample(sample)
+
+    with ThreadPoolExecutor(2) as executor:
+        parallel = analyze_parallel(samples, analyzer, workers=2, executor=executor)
+    assert parallel == analyzer.analyze(approximate=False)
+
+
+def test_chunked_sample_in_the_executor_matches_a_single_job(corpus):
+    text = paragraphs(corpus, 300_000, seed=3)
+    # Not started, so jobs run on the executor's thread pool
+    executor = AnalysisExecutor(workers=4, max_queue=8, timeout=60)
+
+    stats = asyncio.run(analyze_sample_chunked(text, "fast", executor))
+
+    assert stats.to_dict() == StyleAnalyzer().analyze_sample(text).to_dict()
+    assert executor.pending == 0
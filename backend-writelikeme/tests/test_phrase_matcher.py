@@ -0,0 +1,43 @@
+from utils.phrase_matcher import PhraseMatcher
+
+
+def matches(matcher: PhraseMatcher, text: str):
+    return list(matcher.finditer(text))
+
+
+def test_the_longest_phrase_wins_at_a_position():
+    matcher = PhraseMatcher(["in", "in contrast", "in con"])
+    assert matches(matcher, "in contrast, in conflict, in a way") == [
+        (0, 11, "in contrast"), (13, 19, "in con"), (26, 28, "in"),
+    ]
+
+
+def test_the_leftmost_match_wins_over_a_longer_one_further_right():
+    matcher = PhraseMatcher(["ab", "bcde"])
+    assert matches(matcher, "abcde") == [(0, 2, "ab")]
+
+
+def test_matches_do_not_overlap():
+    matcher = PhraseMatcher(["aa", "I think"])
+    assert matches(matcher, "aaaaa") == [(0, 2, "aa"), (2, 4, "aa")]
+    assert len(matches(matcher, "I think I think")) == "I think I think".count("I think")
+
+
+def test_a_prefix_phrase_matches_when_the_longer_one_breaks_off():
+    matcher = PhraseMatcher(["for", "for instance"])
+    assert matches(matcher, "for inst, for instance") == [(0, 3, "for"), (10, 22, "for instance")]
+
+
+def test_special_characters_are_literal_and_empty_phrases_are_ignored():
+    matcher = PhraseMatcher(["", ", (e.g.", "a.b"])
+    assert matches(matcher, "x, (e.g. axb a.b") == [(1, 8, ", (e.g."), (13, 16, "a.b")]
+    assert matches(PhraseMatcher([]), "anything") == []
+
+
+def test_span_matches_must_lie_inside_one_span():
+    matcher = PhraseMatcher([", however"])
+    text = "Yes, however. No, however"
+    spans = [(0, 13), (14, 25)]
+    assert list(matcher.finditer_spans(text, spans)) == [(0, 3, 12, ", however"), (1, 16, 25, ", however")]
+    # A match running over the end of its span is skipped
+    assert list(matcher.finditer_spans(text, [(0, 8), (14, 25)])) == [(1, 16, 25, ", however")]
@@ -0,0 +1,48 @@
+import re
+
+import pytest
+
+from utils.quirks import FRAGMENT_MAX_TOKENS, count_quirks
+from utils.style_analyzer import StyleAnalyzer
+from utils.text_document import TextDocument
+
+
+TRICKY = [
+    # Repeats across a sentence boundary are broken by the full stop
+    "The plan failed. Plan B worked, and the plan was good the plan.",
+    "We went home home. Home was far. I think so. I think, therefore I am. I thinking.",
+    "word one two three four word word. a b c d e f a.",
+    "Stop. Go now. Really? Yes! no no no.",
+    # ALL-CAPS runs, possessives and caps glued to digits
+    "It was LOUD, VERY LOUD. THE END. USA's team. ABC123 x A B OK!",
+    "Émile saw the café café. NOW OR NEVER, NOW.",
+]
+
+
+def reference_counts(doc: TextDocument, text: str) -> dict:
+    """The counts as the regex and per-sentence scans found them before the single pass."""
+    fragments = sum(
+        1 for i in range(len(doc.sentence_spans))
+        if doc.token_offsets[i + 1] - doc.token_offsets[i] <= FRAGMENT_MAX_TOKENS
+    )
+    return {
+        "i_think": text.count("I think"),
+        "close_repeats": len(re.findall(r'(\b\w+\b)(?:\s+\w+){1,4}\s+\1\b', text.lower())),
+        "fragments": fragments,
+        "all_caps": len(re.findall(r'\b[A-Z]{2,}\b', text)),
+    }
+
+
+@pytest.mark.parametrize("text", TRICKY)
+def test_single_pass_matches_the_per_sentence_counts(text):
+    analyzer = StyleAnalyzer()
+    doc = TextDocument(text, tokenizer=analyzer.tokenizer)
+    counts = dict(count_quirks(doc))
+    counts["all_caps"] = analyzer._document_stats(doc).quirks["all_caps"]
+
+    assert counts == reference_counts(doc, text)
+
+
+def test_close_repeats_do_not_overlap():
+    doc = TextDocument("no no no no", tokenizer=StyleAnalyzer().tokenizer)
+    assert count_quirks(doc)["close_repeats"] == len(re.findall(r'(\b\w+\b)(?:\s+\w+){1,4}\s+\1\b', "no no no no"))
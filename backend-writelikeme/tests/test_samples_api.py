@@ -0,0 +1,101 @@
+import io
+import json
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import utils.analysis_jobs as analysis_jobs
+from apis import samples as samples_api
+from database.models import AnalysisJob, Base, Sample, StyleProfile
+from utils.analysis_executor import AnalysisTimeout
+from utils.style_analyzer import StyleAnalyzer
+from utils.style_stats import merge_stats
+
+
+OWNER = SimpleNamespace(id=7)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    monkeypatch.setattr(samples_api, "get_user_or_anonymous", lambda request, db, token: (OWNER, None))
+    yield session
+    session.close()
+
+
+def add_profile(db, corpus, count: int):
+    analyzer = StyleAnalyzer()
+    profile = StyleProfile(name="profile", user_id=OWNER.id)
+    db.add(profile)
+    db.commit()
+    parts = []
+    for seed in range(count):
+        text = corpus(3000, seed=seed)
+        stats = analyzer.analyze_sample(text)
+        parts.append(stats)
+        db.add(Sample(style_profile_id=profile.id, content=text, source_type="paste", stats=stats.to_dict()))
+    merged = merge_stats(parts)
+    profile.profile_stats = merged.to_dict()
+    profile.profile_data = analyzer.build_profile(merged)
+    db.commit()
+    return profile, parts
+
+
+def delete(db, sample_id: int):
+    response = asyncio.run(samples_api.delete_sample_api(None, str(sample_id), db=db, token=None))
+    return response.status_code, json.loads(response.body)
+
+
+def test_deleting_a_sample_matches_a_retrain_of_the_rest(db, corpus):
+    profile, parts = add_profile(db, corpus, 3)
+    middle = db.query(Sample).order_by(Sample.id).all()[1]
+
+    assert delete(db, middle.id) == (200, {"success": True})
+
+    db.refresh(profile)
+    retrained = merge_stats([parts[0], parts[2]])
+    assert profile.profile_stats["excerpts"] == retrained.excerpts
+    assert profile.profile_data == json.loads(json.dumps(StyleAnalyzer().build_profile(retrained)))
+    assert db.query(Sample).count() == 2
+
+
+def test_failed_profile_update_keeps_the_sample(db, corpus, monkeypatch):
+    profile, _ = add_profile(db, corpus, 2)
+    before = profile.profile_data
+    sample = db.query(Sample).first()
+
+    async def timed_out(func, *args):
+        raise AnalysisTimeout("Style analysis did not finish within 120 seconds")
+
+    monkeypatch.setattr(samples_api.analysis_executor, "run", timed_out)
+    status, body = delete(db, sample.id)
+
+    db.refresh(profile)
+    assert status == 504 and "error" in body
+    assert db.query(Sample).count() == 2
+    assert profile.profile_data == before
+
+
+def test_failed_job_commit_removes_the_spooled_files(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(analysis_jobs, "JOB_SPOOL_DIR", str(tmp_path))
+    db.add(StyleProfile(name="profile", user_id=OWNER.id))
+    db.commit()
+
+    def failing_commit():
+        raise OperationalError("INSERT INTO analysis_jobs", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(db, "commit", failing_commit)
+    upload = UploadFile(io.BytesIO(b"Some words to analyze."), filename="notes.txt", size=22)
+    response = asyncio.run(samples_api.upload_samples_api(None, name="profile", files=[upload], db=db, token=None))
+
+    assert response.status_code == 500
+    assert "database is locked" in json.loads(response.body)["error"]
+    assert list(tmp_path.iterdir()) == []
+    assert db.query(AnalysisJob).count() == 0
@@ -0,0 +1,53 @@
+import random
+from collections import Counter
+
+from utils.sketches import DistinctCounter, LongWordTracker, SpaceSavingCounter
+
+
+def zipf_words(count: int, vocabulary: int, seed: int = 0):
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, vocabulary + 1)]
+    return rng.choices([f"word{rank}" for rank in range(vocabulary)], weights, k=count)
+
+
+def test_space_saving_is_exact_within_capacity():
+    counts = Counter(zipf_words(5000, 50))
+    summary = SpaceSavingCounter(capacity=100)
+    for batch in range(0, 50, 10):
+        summary.update(dict(list(counts.items())[batch:batch + 10]))
+
+    assert summary.to_counter() == counts
+
+
+def test_space_saving_keeps_heavy_hitters_with_lower_bounds():
+    words = zipf_words(50000, 5000)
+    exact = Counter(words)
+    summary = SpaceSavingCounter(capacity=200)
+    for start in range(0, len(words), 1000):
+        summary.update(Counter(words[start:start + 1000]))
+
+    bounds = summary.to_counter()
+    assert len(bounds) <= 200
+    assert all(count <= exact[word] for word, count in bounds.items())
+    assert [word for word, _ in summary.most_common(10)] == [word for word, _ in exact.most_common(10)]
+
+
+def test_distinct_counter_is_exact_below_k_and_close_above():
+    small = DistinctCounter(k=256)
+    small.update(f"w{i % 200}" for i in range(1000))
+    assert small.estimate() == 200
+
+    large = DistinctCounter(k=1024)
+    large.update(f"w{i}" for i in range(50000))
+    large.update(f"w{i}" for i in range(25000))
+    # About 1 / sqrt(k) relative error; three standard errors leave room for the hash
+    assert abs(large.estimate() - 50000) < 3 * 50000 / 1024 ** 0.5
+
+
+def test_long_word_tracker_counts_the_longest_words_exactly():
+    tracker = LongWordTracker(capacity=2, min_length=6)
+    tracker.update({"short": 5, "lengthy": 1, "elaborate": 2})
+    tracker.update({"lengthy": 3, "extraordinarily": 1})
+    tracker.update({"elaborate": 4, "longish": 7})
+
+    assert tracker.to_counter() == Counter({"extraordinarily": 1, "elaborate": 6})
@@ -0,0 +1,57 @@
+import re
+
+from utils.style_analyzer import StyleAnalyzer
+from utils.streaming_analyzer import StreamingStyleAnalyzer, block_cut
+
+
+def feed_blocks(text: str, chunks, block_chars: int):
+    streaming = StreamingStyleAnalyzer(block_chars=block_chars)
+    blocks = []
+    streaming._process_block = blocks.append
+    for chunk in chunks:
+        streaming.feed(chunk)
+    return blocks, "".join(streaming._buffer)
+
+
+def test_block_cut_prefers_paragraphs_then_sentences_then_whitespace():
+    assert block_cut("aaaa bbbb\n\ncccc dddd", 16) == (9, 11)
+    assert block_cut("aaaa bbbb. cccc dddd", 16) == (11, 11)
+    assert block_cut("aaaa bbbb cccc dddd", 16) == (15, 15)
+    assert block_cut("a" * 20, 16) == (16, 16)
+
+
+def test_one_large_chunk_without_blank_lines_is_cut_into_bounded_blocks(corpus):
+    text = corpus(200_000).replace("\n\n", " ")
+    blocks, rest = feed_blocks(text, [text], 16_384)
+
+    assert len(blocks) > 10
+    assert max(len(block) for block in blocks) <= 16_384
+    assert "".join(blocks) + rest == text
+    # Cuts fall after a sentence end, never inside a word
+    assert all(block.rstrip()[-1] in ".!?\"')" for block in blocks)
+
+
+def test_small_chunks_are_cut_at_paragraph_breaks(corpus):
+    text = corpus(100_000)
+    chunks = [text[i:i + 1000] for i in range(0, len(text), 1000)]
+    blocks, rest = feed_blocks(text, chunks, 16_384)
+
+    assert max(len(block) for block in blocks) <= 16_384
+    assert "\n\n".join(blocks + [rest]) == text
+
+
+def test_exact_statistics_match_the_whole_text_analysis(corpus):
+    # A one-letter word before a paragraph break reads as an initial, so the
+    # whole-text sentence would run on into the next block
+    text = re.sub(r"\b(\w)\.\n\n", r"\1\1.\n\n", corpus(120_000))
+    analyzer = StyleAnalyzer()
+    exact = analyzer.analyze_sample(text)
+    streaming = StreamingStyleAnalyzer(analyzer, block_chars=16_384)
+    for i in range(0, len(text), 5000):
+        streaming.feed(text[i:i + 5000])
+    stats = streaming.finish()
+
+    for field in ("sentence_lengths", "paragraph_lengths", "punctuation", "sentence_types", "rhythm"):
+        assert getattr(stats, field) == getattr(exact, field), field
+    assert stats.word_total == exact.word_total
+    assert stats.word_counts == exact.word_counts
@@ -0,0 +1,94 @@
+from collections import Counter
+
+from utils.style_analyzer import StyleAnalyzer
+from utils.style_stats import NGRAM_TOP_K, StyleStats, merge_stats, merge_excerpts
+from utils.text_document import TextDocument
+
+
+def stored(stats: StyleStats) -> StyleStats:
+    """The statistics as they come back from a JSON column."""
+    return StyleStats.from_dict(stats.to_dict())
+
+
+def test_merge_matches_pairwise_merge(corpus):
+    analyzer = StyleAnalyzer()
+    parts = [analyzer.analyze_sample(corpus(3000, seed=seed)) for seed in range(4)]
+    pairwise = parts[0]
+    for part in parts[1:]:
+        pairwise = pairwise.merge(part)
+    assert merge_stats(parts).to_dict() == pairwise.to_dict()
+
+
+def test_subtract_then_build_matches_retrain(corpus):
+    analyzer = StyleAnalyzer()
+    small = stored(analyzer.analyze_sample(
+        "The rain fell. It was cold and grey outside, and nobody wanted to leave the house that day. "
+        "We waited. Then we waited some more, counting the minutes until the storm would finally pass. "
+        "Nothing happened for hours. The dog slept by the fire while the kettle hissed. "
+        "Somebody laughed. Finally the sky cleared and the long evening light came through the windows."
+    ))
+    large = stored(analyzer.analyze_sample(corpus(150_000, seed=1)))
+    profile_stats = stored(merge_stats([small, large]))
+
+    stats = profile_stats.subtract(large)
+    stats.excerpts = merge_excerpts([small])
+
+    retrained = merge_stats([small])
+    assert stats.excerpts == retrained.excerpts
+    assert analyzer.build_profile(stats) == analyzer.build_profile(retrained)
+    assert len(analyzer.build_profile(stats)["excerpts"]) == 3
+
+
+def test_merge_excerpts_matches_merge_stats(corpus):
+    analyzer = StyleAnalyzer()
+    parts = [stored(analyzer.analyze_sample(corpus(5000, seed=seed))) for seed in range(3)]
+    profile_stats = merge_stats(parts)
+
+    # Deleting a sample in the middle rebuilds the reservoirs of the others
+    stats = profile_stats.subtract(parts[1])
+    stats.excerpts = merge_excerpts([parts[0], parts[2]])
+    assert stats.excerpts == merge_stats([parts[0], parts[2]]).excerpts
+    assert stats.sentence_count == merge_stats([parts[0], parts[2]]).sentence_count
+
+
+def test_stored_ngrams_are_bounded_and_keep_the_top_ones(corpus):
+    # Each sample has far more distinct n-grams than are stored
+    analyzer = StyleAnalyzer()
+    samples = [corpus(60_000, seed=seed) for seed in range(3)]
+    parts = [stored(analyzer.analyze_sample(text)) for text in samples]
+    merged = stored(merge_stats(parts))
+
+    expected = {2: Counter(), 3: Counter()}
+    for text in samples:
+        tokens = TextDocument(text, tokenizer=analyzer.tokenizer).words_lower
+        for n in expected:
+            expected[n].update(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        assert len(set(zip(tokens, tokens[1:]))) > NGRAM_TOP_K
+    for stats in parts + [merged]:
+        assert len(stats.bigrams) == len(stats.trigrams) == NGRAM_TOP_K
+    # The most frequent n-grams keep their exact counts (ties may come in another order)
+    for counts, exact, top in ((merged.bigrams, expected[2], 20), (merged.trigrams, expected[3], 10)):
+        assert all(exact[phrase] == count for phrase, count in counts.most_common(top))
+        assert [count for _, count in counts.most_common(top)] == [count for _, count in exact.most_common(top)]
+
+
+def test_rhythm_is_classified_per_sample():
+    short, long = "Go home now.", "The quick brown fox jumped over the lazy dog near the river bank today."
+    alternating = " ".join([short, long, short])
+    analyzer = StyleAnalyzer()
+
+    def rhythm(*samples):
+        analyzer.clear_samples()
+        for sample in samples:
+            analyzer.add_sample(sample)
+        profile = analyzer.analyze(approximate=False)
+        merged = merge_stats([stored(analyzer.analyze_sample(sample)) for sample in samples])
+        assert analyzer.build_profile(merged)["distinctive_patterns"] == profile["distinctive_patterns"]
+        return profile["distinctive_patterns"]["rhythm_pattern"]
+
+    # Joined, the step from one sample to the next (short to short) would break the pattern
+    assert rhythm(alternating, alternating) == "alternating"
+    # A sample too short to show a pattern does not count against it
+    assert rhythm(alternating, short + " " + short) == "alternating"
+    # Every sample long enough to show the pattern must follow it
+    assert rhythm(alternating, " ".join([short, long, long])) != "alternating"
@@ -0,0 +1,117 @@
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import utils.text_extraction as text_extraction
+from utils.text_extraction import ExtractionError, IncompleteExtraction, detect_format, extract_text
+
+
+HTML = b"<!DOCTYPE html><html><head><title>Hidden</title></head><body><p>One para <b>bold</b>.</p><p>Two.</p></body></html>"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(text_extraction, "EXTRACTION_WORKERS", 1)
+    yield
+    text_extraction.shutdown_extraction_pool()
+
+
+def test_formats_are_sniffed_before_extensions():
+    assert detect_format(b"%PDF-1.7\n", "scan.txt") == "pdf"
+    assert detect_format(b"  <!doctype html><p>x</p>", "page.txt") == "html"
+    assert detect_format(b"plain words", "notes.md") == "txt"
+    assert detect_format(b"plain words", "notes.xyz") is None
+
+
+def test_unknown_files_are_read_as_text(tmp_path):
+    path = tmp_path / "notes.xyz"
+    path.write_bytes(b"First line\r\nSecond line\xff")
+    assert extract_text(str(path), "notes.xyz") == "First line\nSecond line"
+
+
+def test_docx_is_sniffed_from_the_whole_archive(tmp_path):
+    path = tmp_path / "upload.bin"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("padding.bin", os.urandom(3 * text_extraction.SNIFF_BYTES))
+        archive.writestr("word/document.xml", "<w:document/>")
+    header = path.read_bytes()[:text_extraction.SNIFF_BYTES]
+
+    assert detect_format(header, "upload.bin", str(path)) == "docx"
+    assert detect_format(header, "upload.bin") is None
+
+
+def test_text_is_read_from_the_file_in_blocks(tmp_path, monkeypatch):
+    # Line endings, multibyte and invalid bytes fall across block boundaries
+    data = "Line one\r\ncafé\rline three\n".encode("utf-8") * 5 + b"\xff end"
+    path = tmp_path / "notes.txt"
+    path.write_bytes(data)
+    monkeypatch.setattr(text_extraction, "READ_CHARS", 7)
+
+    assert extract_text(str(path), "notes.txt") == "Line one\ncafé\nline three\n" * 5 + " end"
+
+
+def test_html_keeps_visible_text_by_paragraph(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_bytes(HTML)
+    assert extract_text(str(path), "page.html") == "One para bold.\n\nTwo."
+
+
+def test_extraction_runs_in_the_shared_pool(tmp_path, pool):
+    path = tmp_path / "page.html"
+    path.write_bytes(HTML)
+
+    assert extract_text(str(path), "page.html") == "One para bold.\n\nTwo."
+    first = text_extraction._pool
+    assert extract_text(str(path), "page.html") == "One para bold.\n\nTwo."
+    assert text_extraction._pool is first
+
+
+def test_a_dead_worker_fails_the_file_and_the_pool_is_replaced(tmp_path, pool):
+    path = tmp_path / "page.html"
+    path.write_bytes(HTML)
+    with pytest.raises(ExtractionError):
+        text_extraction._run(os._exit, 1)
+    assert text_extraction._run(text_extraction._html_text, str(path)) == "One para bold.\n\nTwo."
+
+
+def test_page_batches_group_consecutive_pages():
+    assert text_extraction.page_batches([1, 2, 3, 5, 6, 9], 2) == [(1, 2), (3, 3), (5, 6), (9, 9)]
+
+
+def test_ocr_batches_share_the_extraction_pool(monkeypatch):
+    shared = ThreadPoolExecutor(max_workers=2)
+    ranges = []
+
+    def ocr_page_range(path, first, last, dpi):
+        ranges.append((first, last))
+        return [f"page {page}" for page in range(first, last + 1)]
+
+    monkeypatch.setattr(text_extraction, "EXTRACTION_WORKERS", 1)
+    monkeypatch.setattr(text_extraction, "_extraction_pool", lambda: shared)
+    monkeypatch.setattr(text_extraction, "_ocr_page_range", ocr_page_range)
+    try:
+        pages = list(text_extraction.ocr_pdf_pages("scan.pdf", [7, 1, 2, 3, 8], batch_pages=2))
+        assert pages == [(1, "page 1"), (2, "page 2"), (3, "page 3"), (7, "page 7"), (8, "page 8")]
+        assert sorted(ranges) == [(1, 2), (3, 3), (7, 8)]
+        # Still open for the next file
+        assert shared.submit(len, "ok").result() == 2
+    finally:
+        shared.shutdown()
+
+
+def test_pdf_with_failed_ocr_is_reported_incomplete(tmp_path, monkeypatch):
+    def failing_ocr(path, pages):
+        raise RuntimeError("tesseract is not installed")
+        yield
+
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(b"%PDF-1.7\n")
+    monkeypatch.setattr(text_extraction, "_run", lambda func, *args: ["Page one.", "", "Page three."])
+    monkeypatch.setattr(text_extraction, "ocr_pdf_pages", failing_ocr)
+
+    with pytest.raises(IncompleteExtraction) as error:
+        extract_text(str(path), "scan.pdf")
+    assert error.value.text == "Page one.\nPage three."
+    assert "1 of 3 pages" in str(error.value)
@@ -0,0 +1,46 @@
+import utils.tokenizers as tokenizers
+from benchmarks.tokenizer_parity import compare_text
+from conftest import requires_punkt
+from utils.tokenizers import get_tokenizer
+
+
+def test_warmup_skips_a_backend_without_data(monkeypatch, caplog):
+    def missing(language="english"):
+        raise LookupError("Punkt tokenizer data for 'english' not found")
+
+    monkeypatch.setattr(tokenizers, "get_punkt", missing)
+    monkeypatch.setattr(tokenizers, "TOKENIZER_BACKEND", "nltk")
+    monkeypatch.setattr(tokenizers, "ANONYMOUS_TOKENIZER_BACKEND", "fast")
+
+    tokenizers.warmup()
+
+    assert "Tokenizer backend 'nltk' is unavailable" in caplog.text
+    assert caplog.records[-1].levelname == "WARNING"
+
+
+def test_warmup_loads_only_the_configured_backends(monkeypatch):
+    def unexpected(language="english"):
+        raise AssertionError("punkt loaded for an unconfigured backend")
+
+    monkeypatch.setattr(tokenizers, "get_punkt", unexpected)
+    monkeypatch.setattr(tokenizers, "TOKENIZER_BACKEND", "fast")
+    monkeypatch.setattr(tokenizers, "ANONYMOUS_TOKENIZER_BACKEND", "fast")
+
+    tokenizers.warmup()
+
+
+@requires_punkt
+def test_fast_backend_stays_close_to_nltk(corpus):
+    result = compare_text("prose", corpus(50_000, seed=4))
+
+    assert result["sentences"]["boundary_f1"] > 0.95
+    assert result["tokens"]["identical_sentence_tokens"] > 0.95
+    assert result["profile_drift"]["avg_sentence_length"]["relative_difference"] < 0.05
+
+
+def test_fast_backend_spans_cover_every_word(corpus):
+    text = corpus(20_000, seed=5)
+    spans = get_tokenizer("fast").sentence_spans(text)
+
+    assert all(start < end <= next_start for (start, end), (next_start, _) in zip(spans, spans[1:]))
+    assert " ".join(text[start:end] for start, end in spans).split() == text.split()
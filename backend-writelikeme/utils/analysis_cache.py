@@ -0,0 +1,95 @@
+import os
+import hashlib
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database.models import AnalysisCacheEntry
+from utils.style_stats import StyleStats
+from utils.analysis_executor import analysis_executor
+from utils.tokenizers import TOKENIZER_BACKEND
+
+
+load_dotenv()
+
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Least recently used entries beyond this many are evicted
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", 10000))
+# Entries older than this are analyzed again
+ANALYSIS_CACHE_TTL_DAYS = float(os.getenv("ANALYSIS_CACHE_TTL_DAYS", 30))
+
+# Bump whenever the statistics produced for a text change, so old entries stop matching
+ANALYSIS_VERSION = 5
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a sample: NFC, Unix line endings, no surrounding whitespace."""
+    text = unicodedata.normalize("NFC", text)
+    return text.replace("\r\n", "\n").replace("\r", "\n").strip()
+
+
+def content_hash(normalized_text: str, tokenizer: str = TOKENIZER_BACKEND) -> str:
+    """Cache key of a normalized text for the current analysis version and tokenizer."""
+    digest = hashlib.sha256(f"v{ANALYSIS_VERSION}:{tokenizer}\0".encode("utf-8"))
+    digest.update(normalized_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def evict_cache_entries(db: Session):
+    """Drop expired entries, then the least recently used ones beyond the size limit."""
+    expired_before = datetime.utcnow() - timedelta(days=ANALYSIS_CACHE_TTL_DAYS)
+    db.query(AnalysisCacheEntry).filter(
+        AnalysisCacheEntry.created_at < expired_before
+    ).delete(synchronize_session=False)
+
+    excess = db.query(func.count(AnalysisCacheEntry.content_hash)).scalar() - ANALYSIS_CACHE_MAX_ENTRIES
+    if excess > 0:
+        least_recent = (
+            db.query(AnalysisCacheEntry.content_hash)
+            .order_by(AnalysisCacheEntry.last_used_at)
+            .limit(excess)
+            .scalar_subquery()
+        )
+        db.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.content_hash.in_(least_recent)
+        ).delete(synchronize_session=False)
+
+
+async def analyze_sample_cached(db: Session, text: str, tokenizer: Optional[str] = None) -> StyleStats:
+    """Analyze a sample, reusing the stored statistics of an identical earlier sample.
+
+    The text is normalized before hashing and analysis, so the cached statistics
+    are exactly those the analysis would produce. Changes are left in the session
+    for the caller to commit.
+    """
+    normalized = normalize_text(text)
+    if not ANALYSIS_CACHE_ENABLED:
+        return await analysis_executor.analyze_sample(normalized, tokenizer)
+
+    key = content_hash(normalized, tokenizer or TOKENIZER_BACKEND)
+    now = datetime.utcnow()
+    entry = db.get(AnalysisCacheEntry, key)
+    if entry is not None and entry.created_at >= now - timedelta(days=ANALYSIS_CACHE_TTL_DAYS):
+        entry.hits = (entry.hits or 0) + 1
+        entry.last_used_at = now
+        return StyleStats.from_dict(entry.stats)
+
+    stats = await analysis_executor.analyze_sample(normalized, tokenizer)
+    try:
+        with db.begin_nested():
+            if entry is None:
+                entry = AnalysisCacheEntry(content_hash=key, text_length=len(normalized), hits=0)
+                db.add(entry)
+            entry.stats = stats.to_dict()
+            entry.created_at = now
+            entry.last_used_at = now
+        evict_cache_entries(db)
+    except IntegrityError:
+        # Another worker cached the same text in the meantime
+        pass
+    return stats
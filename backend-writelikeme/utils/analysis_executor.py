@@ -0,0 +1,163 @@
+import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Any
+
+from dotenv import load_dotenv
+
+from utils.approximate import APPROXIMATE_THRESHOLD
+from utils.style_stats import StyleStats
+
+
+load_dotenv()
+
+# Worker processes for style analysis; 0 runs analysis in a thread of the web process
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", os.cpu_count() or 2))
+# Jobs allowed to wait for or run in the pool before new ones are refused
+ANALYSIS_MAX_QUEUE = int(os.getenv("ANALYSIS_MAX_QUEUE", 32))
+# Seconds a request waits for a single analysis job
+ANALYSIS_TIMEOUT = float(os.getenv("ANALYSIS_TIMEOUT_SECONDS", 120))
+ANALYSIS_START_METHOD = os.getenv("ANALYSIS_START_METHOD", "spawn")
+
+
+class AnalysisUnavailable(Exception):
+    """Raised when a style analysis job cannot be completed right now."""
+    status_code = 503
+
+
+class AnalysisQueueFull(AnalysisUnavailable):
+    status_code = 503
+
+
+class AnalysisTimeout(AnalysisUnavailable):
+    status_code = 504
+
+
+def _warm_worker():
+    """Load the analyzer and the tokenizer data once per worker process."""
+    import utils.style_analyzer  # noqa: F401
+    from utils.tokenizers import warmup
+    warmup()
+
+
+def _analyze_sample(text: str, tokenizer: Optional[str] = None) -> Dict[str, Any]:
+    from utils.style_analyzer import StyleAnalyzer
+    return StyleAnalyzer(tokenizer=tokenizer).analyze_sample(text).to_dict()
+
+
+class AnalysisExecutor:
+    """Runs CPU-bound style analysis away from the event loop.
+
+    Jobs go to a pool of warm worker processes. At most ``max_queue`` jobs may be
+    pending at once, and a request waits at most ``timeout`` seconds for its job.
+    A job counts as pending until the worker is done with it, even after its
+    request timed out. A pool broken by a dead worker is replaced.
+    """
+
+    def __init__(self, workers: int = ANALYSIS_WORKERS, max_queue: int = ANALYSIS_MAX_QUEUE,
+                 timeout: float = ANALYSIS_TIMEOUT, start_method: str = ANALYSIS_START_METHOD):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.start_method = start_method
+        self.pending = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Create the worker pool and warm every worker up front."""
+        if self._pool is not None or self.workers <= 0:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_warm_worker,
+        )
+        # Worker processes start lazily; submitting one no-op per worker spawns them all now
+        for _ in range(self.workers):
+            self._pool.submit(int)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _restart(self, broken: Executor):
+        """Replace the pool after a worker died, unless another job already did."""
+        with self._lock:
+            if self._pool is not broken:
+                return
+            print("Style analysis worker died, restarting the worker pool")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self.start()
+
+    def _executor(self) -> Executor:
+        if self._pool is not None:
+            return self._pool
+        # Without a process pool, a thread pool still keeps the loop free
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(thread_name_prefix="analysis")
+            return self._threads
+
+    def _job_done(self, future: Future):
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, func, *args):
+        """Run ``func(*args)`` in the pool, enforcing the queue limit and timeout."""
+        with self._lock:
+            if self.pending >= self.max_queue:
+                raise AnalysisQueueFull("Style analysis is busy, please try again shortly")
+            self.pending += 1
+
+        executor = self._executor()
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._job_done(None)
+            self._restart(executor)
+            raise AnalysisUnavailable("Style analysis workers restarted, please try again")
+        except BaseException:
+            self._job_done(None)
+            raise
+        # Pending drops when the worker finishes the job, not when the request stops waiting
+        future.add_done_callback(self._job_done)
+
+        try:
+            # A job that has not started yet is cancelled on timeout; a running one cannot be
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise AnalysisTimeout(f"Style analysis did not finish within {self.timeout:.0f} seconds")
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise AnalysisUnavailable("Style analysis workers restarted, please try again")
+
+    def pool(self) -> Executor:
+        """The shared pool, started if needed, for callers that wait on its futures themselves.
+
+        Jobs submitted to it directly bypass the queue limit and timeout of ``run``.
+        """
+        self.start()
+        return self._executor()
+
+    async def analyze_sample(self, text: str, tokenizer: Optional[str] = None) -> StyleStats:
+        """Tokenize and analyze one sample in a worker, with the named tokenizer backend.
+
+        With several workers, a long sample below the approximate threshold is cut
+        into chunks analyzed in parallel (see ``utils.parallel_analysis``).
+        """
+        if self._pool is not None and self.workers > 1 and len(text) <= APPROXIMATE_THRESHOLD:
+            from utils.parallel_analysis import analyze_sample_chunked
+            stats = await analyze_sample_chunked(text, tokenizer, self)
+            if stats is not None:
+                return stats
+        return StyleStats.from_dict(await self.run(_analyze_sample, text, tokenizer))
+
+
+analysis_executor = AnalysisExecutor()
@@ -0,0 +1,389 @@
+import os
+import shutil
+import hashlib
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal
+from database.models import AnalysisJob, Sample, StyleProfile
+from utils.analysis_executor import AnalysisQueueFull
+from utils.analysis_cache import analyze_sample_cached
+from utils.profile_updates import get_profile_stats, update_profile
+from utils.text_extraction import extract_text, ExtractionError, IncompleteExtraction
+from utils.extraction_cache import get_cached_text, store_cached_text
+
+
+load_dotenv()
+
+# Directory where uploads wait for their job to pick them up
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "writelikeme-jobs"))
+# Jobs processed concurrently by each web process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 1))
+# A running job without progress for this long is assumed lost and picked up again
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 600))
+# Seconds between updated_at bumps of a running job; must stay well below JOB_STALE_SECONDS
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 60))
+# Files extracted at once, shared by all jobs of the process; these threads only wait on the
+# extraction processes (see utils.text_extraction)
+EXTRACTION_THREADS = int(os.getenv("EXTRACTION_THREADS", 8))
+
+# Uploads are copied to the spool in pieces of this many bytes, bounding the memory per upload
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", 1024 * 1024))
+# Largest uploaded file, and largest total of the files of one upload request, in bytes
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", 50 * 1024 * 1024))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", 200 * 1024 * 1024))
+# Largest upload request body: the files plus room for the form fields and multipart framing
+UPLOAD_MAX_BODY_BYTES = UPLOAD_MAX_REQUEST_BYTES + 1024 * 1024
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+_extraction_threads = ThreadPoolExecutor(max_workers=EXTRACTION_THREADS, thread_name_prefix="extraction")
+
+
+class UploadTooLarge(Exception):
+    """Raised when an uploaded file, or all files of an upload together, exceed the size limits."""
+
+
+async def spool_upload_files(job_id: str, files: List[UploadFile]) -> List[dict]:
+    """Save uploaded files to the spool directory of a job.
+
+    Files are copied in chunks of UPLOAD_CHUNK_BYTES while their SHA-256 is
+    computed, and the copy stops as soon as a file or the whole upload goes over
+    its size limit. On any error the job's spool directory is removed.
+    """
+    job_dir = os.path.join(JOB_SPOOL_DIR, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+
+    spooled = []
+    request_bytes = 0
+    try:
+        # The size is known up front when the upload was parsed by Starlette
+        declared = sum(file.size or 0 for file in files)
+        if declared > UPLOAD_MAX_REQUEST_BYTES:
+            raise UploadTooLarge(f"Upload is larger than {UPLOAD_MAX_REQUEST_BYTES // (1024 * 1024)} MB")
+
+        for index, file in enumerate(files):
+            if (file.size or 0) > UPLOAD_MAX_FILE_BYTES:
+                raise UploadTooLarge(f"{file.filename} is larger than {UPLOAD_MAX_FILE_BYTES // (1024 * 1024)} MB")
+
+            path = os.path.join(job_dir, f"{index}{os.path.splitext(file.filename)[1]}")
+            digest = hashlib.sha256()
+            size = 0
+            with open(path, "wb") as out:
+                while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                    size += len(chunk)
+                    request_bytes += len(chunk)
+                    if size > UPLOAD_MAX_FILE_BYTES:
+                        raise UploadTooLarge(f"{file.filename} is larger than {UPLOAD_MAX_FILE_BYTES // (1024 * 1024)} MB")
+                    if request_bytes > UPLOAD_MAX_REQUEST_BYTES:
+                        raise UploadTooLarge(f"Upload is larger than {UPLOAD_MAX_REQUEST_BYTES // (1024 * 1024)} MB")
+                    digest.update(chunk)
+                    out.write(chunk)
+            spooled.append({"filename": file.filename, "path": path, "size": size, "sha256": digest.hexdigest()})
+    except BaseException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+    return spooled
+
+
+def remove_job_spool(job_id: str):
+    """Delete the spooled files of a job."""
+    shutil.rmtree(os.path.join(JOB_SPOOL_DIR, job_id), ignore_errors=True)
+
+
+def record_progress(db: Session, job: AnalysisJob, stage: str, progress: int, message: str):
+    """Move a job to a new stage and append a progress event."""
+    job.stage = stage
+    job.progress = progress
+    job.events = (job.events or []) + [{
+        "stage": stage,
+        "progress": progress,
+        "message": message,
+        "at": datetime.utcnow().isoformat()
+    }]
+    db.commit()
+
+
+def claim_next_job(db: Session) -> Optional[AnalysisJob]:
+    """Take the oldest queued (or stale running) job, skipping jobs locked by other workers."""
+    stale_before = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    job = (
+        db.query(AnalysisJob)
+        .filter(or_(
+            AnalysisJob.status == "queued",
+            and_(AnalysisJob.status == "running", AnalysisJob.updated_at < stale_before)
+        ))
+        .order_by(AnalysisJob.created_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not job:
+        return None
+
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    job.attempts = (job.attempts or 0) + 1
+    db.commit()
+    return job
+
+
+def touch_job(job_id: str, attempt: int) -> bool:
+    """Mark a running job as alive, in a session of its own.
+
+    False once the job has finished or another worker has claimed it again.
+    """
+    db = SessionLocal()
+    try:
+        touched = db.query(AnalysisJob).filter(
+            AnalysisJob.id == job_id,
+            AnalysisJob.status == "running",
+            AnalysisJob.attempts == attempt
+        ).update({AnalysisJob.updated_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return touched > 0
+    finally:
+        db.close()
+
+
+async def _heartbeat(job_id: str, attempt: int, interval: float = JOB_HEARTBEAT_SECONDS):
+    """Keep a job from looking stale while long extractions or analyses run."""
+    while await asyncio.to_thread(touch_job, job_id, attempt):
+        await asyncio.sleep(interval)
+
+
+def lock_owned_job(db: Session, job: AnalysisJob, attempt: int) -> bool:
+    """Lock the job row and check that this run still owns the job.
+
+    A job that looked stale may have been claimed again by another worker; only
+    the run holding the latest attempt may write its results.
+    """
+    db.refresh(job, with_for_update=True)
+    return job.status == "running" and job.attempts == attempt
+
+
+async def _analyze(db: Session, text: str):
+    """Analyze a sample, waiting for room in the analysis queue instead of failing."""
+    while True:
+        try:
+            return await analyze_sample_cached(db, text)
+        except AnalysisQueueFull:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+async def _update_profile(style_profile: StyleProfile, parts: List[dict]):
+    """Merge statistics into a profile in an analysis worker, waiting for room in the queue."""
+    while True:
+        try:
+            return await update_profile(style_profile, parts)
+        except AnalysisQueueFull:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+async def _extract(db: Session, spooled: dict) -> Tuple[Optional[str], Optional[str]]:
+    """Extract the text of one spooled file; returns ``(text, None)`` or ``(None, error)``.
+
+    Files uploaded before are not parsed again: their text comes from the extraction cache.
+    A file extracted only in part returns ``(text, warning)`` and is not cached, so a
+    passing failure does not stick to the file.
+    """
+    filename = spooled["filename"]
+    text = get_cached_text(db, spooled)
+    if text is not None:
+        print(f"Extracted text of {filename} found in cache")
+        return text, None
+
+    loop = asyncio.get_running_loop()
+    try:
+        text = await loop.run_in_executor(_extraction_threads, extract_text, spooled["path"], filename)
+    except IncompleteExtraction as e:
+        print(f"Text of {filename} extracted in part: {str(e)}")
+        return e.text, f"{filename} (Extracted in part: {str(e)})"
+    except ExtractionError as e:
+        return None, f"{filename} ({str(e)})"
+    except Exception as e:
+        print(f"General error processing {filename}: {str(e)}")
+        return None, f"{filename} (Error: {str(e)})"
+
+    if not text or not text.strip():
+        print(f"No valid text extracted from {filename}")
+        return None, f"{filename} (No text extracted)"
+    store_cached_text(db, spooled, text)
+    return text, None
+
+
+async def extract_files(db: Session, job: AnalysisJob, files: List[dict]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Extract the text of all files of a job concurrently, in the shared extraction pool.
+
+    A progress event is recorded as each file finishes, in whatever order they
+    finish. Returns ``(text, error)`` for every file, in upload order.
+    """
+    total = max(len(files), 1)
+    results = [None] * len(files)
+
+    async def extract(index: int):
+        return index, await _extract(db, files[index])
+
+    tasks = [asyncio.create_task(extract(index)) for index in range(len(files))]
+    try:
+        for done, next_result in enumerate(asyncio.as_completed(tasks), 1):
+            index, result = await next_result
+            results[index] = result
+            status = "Extracted text from" if result[0] is not None else "Could not extract text from"
+            record_progress(db, job, "extracting", int(45 * done / total), f"{status} {files[index]['filename']}")
+    finally:
+        for task in tasks:
+            task.cancel()
+    return results
+
+
+async def process_upload_job(db: Session, job: AnalysisJob):
+    """Extract, analyze and merge the uploaded files of a job into its style profile."""
+    style_profile = db.query(StyleProfile).filter(StyleProfile.id == job.style_profile_id).first()
+    attempt = job.attempts
+    files = job.files or []
+    total = max(len(files), 1)
+    error_files = []
+    new_stats = []
+    # Samples are added only once the profile is updated, since progress events commit
+    new_samples = []
+
+    record_progress(db, job, "extracting", 0, f"Extracting text from {len(files)} files")
+    extracted = await extract_files(db, job, files)
+
+    for index, (spooled, (text, error)) in enumerate(zip(files, extracted)):
+        filename = spooled["filename"]
+        if error:
+            # Files extracted in part are still analyzed, with a warning
+            error_files.append(error)
+        if text is None:
+            continue
+
+        record_progress(db, job, "analyzing", 45 + int(45 * index / total), f"Analyzing {filename}")
+        try:
+            stats = await _analyze(db, text)
+        except Exception as e:
+            print(f"Error analyzing {filename}: {str(e)}")
+            error_files.append(f"{filename} (Analysis error: {str(e)})")
+            continue
+
+        new_stats.append(stats)
+        new_samples.append(Sample(
+            style_profile_id=style_profile.id,
+            content=text,
+            source_type="upload",
+            filename=filename,
+            stats=stats.to_dict()
+        ))
+        print(f"Sample added for {filename}")
+
+    if new_stats:
+        record_progress(db, job, "merging", 95, f"Updating style profile with {len(new_stats)} samples")
+    if not lock_owned_job(db, job, attempt):
+        print(f"Analysis job {job.id} was claimed by another worker, dropping this run")
+        db.rollback()
+        return
+
+    if not new_stats:
+        message = "No valid text could be extracted from the uploaded files"
+        job.status = "failed"
+        job.error = message
+        job.result = {"failed_files": error_files}
+        job.finished_at = datetime.utcnow()
+        record_progress(db, job, "failed", 100, message)
+        return
+
+    # The profile may have changed while the files were processed: merge into its
+    # current statistics, locked until the job commits
+    style_profile = (
+        db.query(StyleProfile)
+        .filter(StyleProfile.id == job.style_profile_id)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+    profile_stats = await get_profile_stats(db, style_profile)
+    db.add_all(new_samples)
+    await _update_profile(style_profile, profile_stats + [sample.stats for sample in new_samples])
+
+    job.status = "completed"
+    job.finished_at = datetime.utcnow()
+    job.result = {
+        "profile_id": style_profile.id,
+        "samples_processed": len(new_stats),
+        "warnings": error_files if error_files else None
+    }
+    record_progress(db, job, "completed", 100, f"Files uploaded and analyzed successfully ({len(new_stats)} samples processed)")
+
+
+class AnalysisJobWorker:
+    """Background tasks that pick analysis jobs from the database and run them."""
+
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self):
+        while True:
+            db = SessionLocal()
+            try:
+                job = claim_next_job(db)
+                if job is None:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                await self._process(db, job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in analysis job worker: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+            finally:
+                db.close()
+
+    async def _process(self, db: Session, job: AnalysisJob):
+        attempt = job.attempts
+        heartbeat = asyncio.create_task(_heartbeat(job.id, attempt))
+        try:
+            await process_upload_job(db, job)
+        except asyncio.CancelledError:
+            # Leave the job running; it is picked up again once it goes stale
+            db.rollback()
+            raise
+        except Exception as e:
+            print(f"Analysis job {job.id} failed: {str(e)}")
+            db.rollback()
+            if lock_owned_job(db, job, attempt):
+                job.status = "failed"
+                job.error = str(e)
+                job.finished_at = datetime.utcnow()
+                record_progress(db, job, "failed", job.progress or 0, str(e))
+            else:
+                db.rollback()
+        finally:
+            heartbeat.cancel()
+        if job.status in FINISHED_STATUSES:
+            remove_job_spool(job.id)
+
+
+job_worker = AnalysisJobWorker()
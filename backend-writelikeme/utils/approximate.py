@@ -0,0 +1,161 @@
+import os
+import re
+import math
+import random
+from typing import List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from utils.sketches import DistinctCounter
+
+
+load_dotenv()
+
+# analyze() and analyze_sample() switch to approximate mode above this many characters of samples
+APPROXIMATE_THRESHOLD = int(os.getenv("ANALYSIS_APPROXIMATE_THRESHOLD", 2_000_000))
+# Characters of text actually analyzed in approximate mode
+APPROXIMATE_SAMPLE_BUDGET = int(os.getenv("ANALYSIS_SAMPLE_BUDGET", 250_000))
+# Contiguous position strata the text is divided into, each sampled in proportion to its size
+APPROXIMATE_STRATA = int(os.getenv("ANALYSIS_SAMPLE_STRATA", 20))
+
+# Confidence level of the reported intervals and the matching normal quantile
+APPROXIMATE_CONFIDENCE = 0.95
+_Z = 1.959964
+
+# Paragraphs longer than this are cut into runs of sentences before sampling
+UNIT_MAX_CHARS = 2000
+
+# Cheap sentence-end guess used to cut long paragraphs; the sampled pieces are tokenized properly
+_SENTENCE_BREAK = re.compile(r"""[.!?]+["'’”)\]]*\s+""")
+
+# Cheap word match for the vocabulary estimate, which has to read the full text
+_WORD = re.compile(r"[^\W\d_]+")
+_SCAN_CHARS = 1_000_000
+
+
+def split_units(text: str) -> List[Tuple[str, Optional[int]]]:
+    """Cut a sample into sampling units: its paragraphs, with long ones cut at sentence ends.
+
+    Each unit is ``(text, paragraph_sentences)``. ``paragraph_sentences`` is None
+    for a whole paragraph, whose paragraph statistics come from the analysis as
+    usual. The first piece of a cut paragraph carries the estimated sentence count
+    of the whole paragraph and the other pieces carry 0, so every paragraph is
+    counted exactly once, through the unit that holds its start.
+    """
+    units = []
+    for paragraph in text.split("\n\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= UNIT_MAX_CHARS:
+            units.append((paragraph, None))
+            continue
+
+        breaks = [match.end() for match in _SENTENCE_BREAK.finditer(paragraph)]
+        pieces = []
+        start = 0
+        for end in breaks:
+            if end - start >= UNIT_MAX_CHARS // 2:
+                pieces.append(paragraph[start:end].strip())
+                start = end
+        if start < len(paragraph):
+            pieces.append(paragraph[start:].strip())
+        sentences = len(breaks) + (not breaks or breaks[-1] < len(paragraph))
+        units.append((pieces[0], sentences))
+        units.extend((piece, 0) for piece in pieces[1:])
+    return units
+
+
+def stratified_sample(samples: List[str], budget: int = APPROXIMATE_SAMPLE_BUDGET,
+                      strata: int = APPROXIMATE_STRATA,
+                      rng: Optional[random.Random] = None) -> Tuple[List[List[Tuple[str, Optional[int]]]], int, int]:
+    """Pick about ``budget`` characters of units, spread over the whole text.
+
+    The units of all samples, in order, are divided into ``strata`` contiguous
+    blocks of roughly equal size. Each block gets a share of the budget in
+    proportion to its characters and is filled with randomly chosen units (at
+    least one), so the beginning, middle and end of every long text are all
+    represented. The picks of each block are dealt alternately into two groups,
+    giving independent random subsamples to estimate the sampling error from.
+
+    Returns the non-empty groups, each a list of units in text order, and the
+    number of units and of characters in the population.
+    """
+    rng = rng or random
+    units = [unit for sample in samples for unit in split_units(sample)]
+    total = sum(len(text) for text, _ in units)
+    if not units or total <= budget:
+        return [units[i::2] for i in range(2) if units[i::2]], len(units), total
+
+    # Stratum of each unit by the position of its first character
+    blocks = [[] for _ in range(strata)]
+    position = 0
+    for index, (text, _) in enumerate(units):
+        blocks[min(position * strata // total, strata - 1)].append(index)
+        position += len(text)
+
+    groups = []
+    for block in blocks:
+        if not block:
+            continue
+        share = budget * sum(len(units[i][0]) for i in block) / total
+        picked = []
+        used = 0
+        for index in rng.sample(block, len(block)):
+            if used >= share:
+                break
+            picked.append(index)
+            used += len(units[index][0])
+        groups.extend([units[i] for i in sorted(picked[half::2])] for half in range(2) if picked[half::2])
+    return groups, len(units), total
+
+
+def ratio_interval(numerators: np.ndarray, denominators: np.ndarray, fraction: float,
+                   scale: float = 1.0) -> Optional[List[float]]:
+    """Confidence interval of ``scale * sum(numerators) / sum(denominators)`` over sample groups.
+
+    Uses the linearized variance of a ratio estimator, treating the groups as a
+    simple random sample with a finite population correction for the sampled
+    ``fraction``. Ignoring the stratification overstates the variance, so the
+    interval is on the conservative side. None when fewer than two groups carry
+    the denominator of a partial sample.
+    """
+    used = denominators > 0
+    n = int(used.sum())
+    total = denominators.sum()
+    if not total:
+        return None
+    ratio = numerators.sum() / total
+    if fraction >= 1:
+        return [float(ratio * scale), float(ratio * scale)]
+    if n < 2:
+        return None
+    residuals = numerators[used] - ratio * denominators[used]
+    variance = max(1.0 - fraction, 0.0) * n * residuals.var(ddof=1) / total ** 2
+    margin = _Z * math.sqrt(variance)
+    return [float((ratio - margin) * scale), float((ratio + margin) * scale)]
+
+
+def estimate_vocabulary(samples: List[str]) -> int:
+    """Estimated number of distinct lowercased words over all ``samples``.
+
+    A sample's vocabulary does not scale with its size, so it cannot be
+    extrapolated from the sampled text. Instead one regex pass over the full
+    text feeds the distinct words of each sample into a k-minimum-values sketch.
+    Words are matched by a regular expression rather than the tokenizer, so the
+    estimate can differ slightly from an exact analysis.
+    """
+    counter = DistinctCounter()
+    for sample in samples:
+        # findall over windows cut at spaces bounds the word lists held at once
+        words = set()
+        start = 0
+        while start < len(sample):
+            end = sample.find(" ", start + _SCAN_CHARS)
+            if end < 0:
+                end = len(sample)
+            words.update(_WORD.findall(sample, start, end))
+            start = end
+        counter.update({word.lower() for word in words})
+    return counter.estimate()
@@ -0,0 +1,72 @@
+from typing import Dict
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestTooLarge(Exception):
+    """Raised to the app from ``receive`` when the request body goes over its limit."""
+
+
+class BodySizeLimitMiddleware:
+    """Refuses request bodies over a size limit with 413 before the app has read them.
+
+    ``limits`` maps request paths to their largest body in bytes. A declared
+    Content-Length over the limit is refused without reading any of the body.
+    Otherwise the body is counted as the app receives it, and receiving past the
+    limit raises RequestTooLarge, so a multipart upload is never parsed or spooled
+    beyond it. Whatever response the app makes of the cut-off body is replaced by
+    the 413.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > limit:
+            await self._reject(scope, receive, send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise RequestTooLarge(f"Request body is larger than {limit} bytes")
+            return message
+
+        async def guarded_send(message: Message):
+            nonlocal started
+            if exceeded and not started:
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded or started:
+                raise
+        if exceeded and not started:
+            await self._reject(scope, receive, send, limit)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, limit: int):
+        response = JSONResponse(
+            status_code=413,
+            content={"error": f"Request body is larger than {limit // (1024 * 1024)} MB"}
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,112 @@
+import re
+import codecs
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+# Characters outside Latin-1 are encoded as this control byte, one per character,
+# so byte offsets stay equal to character offsets
+_OTHER = "\x1a"
+_ALL_CAPS = re.compile(r"\b[A-Z]{2,}\b")
+_CONJUNCTIONS = [np.frombuffer(word.encode("ascii"), dtype=np.uint8) for word in ("and", "but")]
+
+
+def _replace_with_other(error: UnicodeEncodeError) -> Tuple[str, int]:
+    return _OTHER * (error.end - error.start), error.end
+
+
+codecs.register_error("writelikeme_other", _replace_with_other)
+
+
+def _word_byte_mask() -> np.ndarray:
+    """Bytes that Python's ``\\w`` treats as word characters within Latin-1."""
+    return np.array([bool(re.match(r"\w", chr(byte))) for byte in range(256)])
+
+
+_WORD_BYTES = _word_byte_mask()
+
+
+class CharacterStats:
+    """Character-level counts of a text, computed from one encoded pass.
+
+    The text is encoded once to one byte per character and counted with
+    ``np.bincount``. Single-character counts, runs like ``--`` and ``...``,
+    per-sentence character presence and ALL-CAPS words are all derived from that
+    array instead of rescanning the text.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.codes = np.frombuffer(text.encode("latin-1", errors="writelikeme_other"), dtype=np.uint8)
+        self.histogram = np.bincount(self.codes, minlength=256)
+        self.em_dashes = text.count("—")
+        self._positions: Dict[str, np.ndarray] = {}
+        self._conjunctions = None
+
+    def count(self, char: str) -> int:
+        return int(self.histogram[ord(char)])
+
+    def positions(self, char: str) -> np.ndarray:
+        """Sorted offsets of every occurrence of a single character."""
+        if char not in self._positions:
+            if self.count(char):
+                self._positions[char] = np.flatnonzero(self.codes == ord(char))
+            else:
+                self._positions[char] = np.empty(0, dtype=np.int64)
+        return self._positions[char]
+
+    def run_count(self, char: str, length: int) -> int:
+        """Non-overlapping occurrences of ``char * length``, as ``str.count`` would find."""
+        positions = self.positions(char)
+        if len(positions) < length:
+            return 0
+        # Split the occurrences into runs of consecutive offsets
+        breaks = np.flatnonzero(np.diff(positions) != 1)
+        run_lengths = np.diff(np.concatenate(([0], breaks + 1, [len(positions)])))
+        return int((run_lengths // length).sum())
+
+    def all_caps_words(self) -> int:
+        """Words of two or more capital letters A-Z standing on their own, like ``\\b[A-Z]{2,}\\b``."""
+        if not self.histogram[65:91].any():
+            return 0
+        if self.histogram[ord(_OTHER)]:
+            # Every character outside Latin-1 reads as a non-word byte, so a letter
+            # like 'Ā' would wrongly end a word; such text is matched as a string
+            return len(_ALL_CAPS.findall(self.text))
+        upper = (self.codes >= 65) & (self.codes <= 90)
+        edges = np.diff(np.concatenate(([False], upper, [False])).astype(np.int8))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        long_runs = ends - starts >= 2
+        starts, ends = starts[long_runs], ends[long_runs]
+
+        word = _WORD_BYTES[self.codes]
+        before_ok = (starts == 0) | ~word[np.maximum(starts - 1, 0)]
+        after_ok = (ends == len(self.codes)) | ~word[np.minimum(ends, len(self.codes) - 1)]
+        return int((before_ok & after_ok).sum())
+
+    def sentences_containing(self, char: str, spans: np.ndarray) -> np.ndarray:
+        """Boolean per sentence span: does the sentence contain ``char``?"""
+        positions = self.positions(char)
+        return np.searchsorted(positions, spans[:, 1]) > np.searchsorted(positions, spans[:, 0])
+
+    def sentences_with_conjunction(self, spans: np.ndarray) -> np.ndarray:
+        """Boolean per sentence span: does it contain ``, and`` or ``, but`` (any case)?"""
+        if self._conjunctions is None:
+            self._conjunctions = self._conjunction_positions()
+        last_start = spans[:, 1] - 5  # both phrases are five characters long
+        return np.searchsorted(self._conjunctions, last_start, side="right") > \
+            np.searchsorted(self._conjunctions, spans[:, 0])
+
+    def _conjunction_positions(self) -> np.ndarray:
+        """Offsets of ``, and`` and ``, but``, found from the comma positions."""
+        commas = self.positions(",")
+        commas = commas[commas + 5 <= len(self.codes)]
+        commas = commas[self.codes[commas + 1] == ord(" ")]
+        # ASCII letters lowercased by setting the 0x20 bit
+        following = self.codes[commas[:, None] + np.arange(2, 5)] | 0x20
+        found = np.zeros(len(commas), dtype=bool)
+        for word in _CONJUNCTIONS:
+            found |= (following == word).all(axis=1)
+        return commas[found]
@@ -0,0 +1,87 @@
+import os
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database.models import ExtractionCacheEntry
+from utils.text_extraction import EXTRACTION_VERSION, OCR_DPI
+
+
+load_dotenv()
+
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Least recently used entries are evicted once the cached texts take more than this many bytes
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+
+
+def extraction_key(spooled: dict) -> Optional[str]:
+    """Cache key of a spooled upload, or None when its hash was not recorded.
+
+    The extension is part of the key because it decides the extractor when the
+    content is not recognized, and the OCR resolution because it changes the text.
+    """
+    if not spooled.get("sha256"):
+        return None
+    extension = os.path.splitext(spooled["filename"])[1].lower()
+    digest = hashlib.sha256(f"v{EXTRACTION_VERSION}:{extension}:{OCR_DPI}\0".encode("utf-8"))
+    digest.update(spooled["sha256"].encode("ascii"))
+    return digest.hexdigest()
+
+
+def get_cached_text(db: Session, spooled: dict) -> Optional[str]:
+    """Text extracted earlier from an identical file, or None."""
+    key = extraction_key(spooled)
+    if not EXTRACTION_CACHE_ENABLED or key is None:
+        return None
+    entry = db.get(ExtractionCacheEntry, key)
+    if entry is None:
+        return None
+    entry.hits = (entry.hits or 0) + 1
+    entry.last_used_at = datetime.utcnow()
+    return entry.text
+
+
+def evict_extraction_entries(db: Session):
+    """Drop the least recently used entries until the cached texts fit in EXTRACTION_CACHE_MAX_BYTES."""
+    excess = (db.query(func.sum(ExtractionCacheEntry.text_bytes)).scalar() or 0) - EXTRACTION_CACHE_MAX_BYTES
+    if excess <= 0:
+        return
+    evicted = []
+    least_recent = (
+        db.query(ExtractionCacheEntry.cache_key, ExtractionCacheEntry.text_bytes)
+        .order_by(ExtractionCacheEntry.last_used_at)
+        .yield_per(500)
+    )
+    for key, text_bytes in least_recent:
+        evicted.append(key)
+        excess -= text_bytes or 0
+        if excess <= 0:
+            break
+    db.query(ExtractionCacheEntry).filter(
+        ExtractionCacheEntry.cache_key.in_(evicted)
+    ).delete(synchronize_session=False)
+
+
+def store_cached_text(db: Session, spooled: dict, text: str):
+    """Remember the text extracted from a spooled upload. Changes are left for the caller to commit."""
+    key = extraction_key(spooled)
+    if not EXTRACTION_CACHE_ENABLED or key is None:
+        return
+    text_bytes = len(text.encode("utf-8", "surrogatepass"))
+    if text_bytes > EXTRACTION_CACHE_MAX_BYTES:
+        return
+    now = datetime.utcnow()
+    try:
+        with db.begin_nested():
+            db.add(ExtractionCacheEntry(
+                cache_key=key, text=text, text_bytes=text_bytes, hits=0, created_at=now, last_used_at=now
+            ))
+        evict_extraction_entries(db)
+    except IntegrityError:
+        # Another worker cached the same file in the meantime
+        pass
@@ -0,0 +1,58 @@
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class NGramIndex:
+    """Counts n-grams of a word sequence over integer word IDs.
+
+    Words are mapped once to IDs in order of first occurrence, and every n-gram is
+    encoded as one integer key (``id_1 * V^(n-1) + ... + id_n`` for a vocabulary of
+    size ``V``), so counting is a single ``np.unique`` over an integer array. Strings
+    are built only for the distinct n-grams that are returned.
+    """
+
+    def __init__(self, words: List[str]):
+        vocabulary: Dict[str, int] = {}
+        self.ids = np.fromiter(
+            (vocabulary.setdefault(word, len(vocabulary)) for word in words),
+            dtype=np.int64,
+            count=len(words)
+        )
+        self.words = list(vocabulary)
+
+    def counts(self, n: int, top_k: Optional[int] = None) -> Counter:
+        """Counter of the ``top_k`` most frequent n-grams (all of them if ``top_k`` is None).
+
+        Keys are the n-grams joined by spaces, inserted in order of first occurrence
+        like a Counter built over the text, so ``most_common`` breaks ties the same way.
+        """
+        length = len(self.ids) - n + 1
+        if length <= 0:
+            return Counter()
+
+        vocabulary_size = max(len(self.words), 1)
+        if vocabulary_size ** n < 2 ** 63:
+            keys = self.ids[:length].copy()
+            for offset in range(1, n):
+                keys *= vocabulary_size
+                keys += self.ids[offset:offset + length]
+            _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        else:
+            # Keys would overflow int64; count the ID rows directly instead
+            rows = np.stack([self.ids[offset:offset + length] for offset in range(n)], axis=1)
+            _, first, counts = np.unique(rows, axis=0, return_index=True, return_counts=True)
+
+        selected = np.arange(len(counts))
+        if top_k is not None and len(counts) > top_k:
+            # Most frequent first, earlier first occurrence winning ties
+            selected = np.lexsort((first, -counts))[:top_k]
+        selected = selected[np.argsort(first[selected], kind="stable")]
+
+        ids = self.ids
+        words = self.words
+        return Counter({
+            " ".join(words[i] for i in ids[start:start + n]): int(count)
+            for start, count in zip(first[selected].tolist(), counts[selected].tolist())
+        })
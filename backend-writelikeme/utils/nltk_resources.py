@@ -0,0 +1,38 @@
+import os
+import threading
+
+import nltk
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+# Tokenizer data shipped with the app; searched before NLTK's default locations.
+# Fill it with: python -m nltk.downloader -d nltk_data punkt (the Docker image does this at build time)
+NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nltk_data"
+)
+
+_lock = threading.Lock()
+_punkt = {}
+
+
+def get_punkt(language: str = "english"):
+    """The punkt sentence tokenizer for ``language``, loaded from local data on first use."""
+    tokenizer = _punkt.get(language)
+    if tokenizer is not None:
+        return tokenizer
+
+    with _lock:
+        if language not in _punkt:
+            if NLTK_DATA_DIR not in nltk.data.path:
+                nltk.data.path.insert(0, NLTK_DATA_DIR)
+            try:
+                _punkt[language] = nltk.data.load(f"tokenizers/punkt/{language}.pickle")
+            except LookupError:
+                raise LookupError(
+                    f"Punkt tokenizer data for '{language}' not found in {NLTK_DATA_DIR} or the NLTK data path. "
+                    f"Install it with: python -m nltk.downloader -d {NLTK_DATA_DIR} punkt"
+                )
+        return _punkt[language]
+
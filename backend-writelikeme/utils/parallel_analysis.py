@@ -0,0 +1,228 @@
+import asyncio
+from collections import Counter
+from concurrent.futures import Executor, Future
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from utils.analysis_executor import ANALYSIS_WORKERS, AnalysisExecutor, analysis_executor
+from utils.style_analyzer import StyleAnalyzer, TRANSITION_PHRASES
+from utils.style_stats import NGRAM_TOP_K, StyleStats, merge_stats, top_counts
+from utils.text_document import TextDocument
+from utils.tokenizers import TokenizerBackend
+
+
+# Samples longer than this may be cut into chunks that are analyzed in parallel
+MIN_CHUNK_CHARS = 64 * 1024
+# Chunks per worker, so that uneven chunks still keep every worker busy
+CHUNKS_PER_WORKER = 4
+# Characters on each side of a paragraph break tokenized to check it as a cut
+CUT_CONTEXT_CHARS = 2000
+# Paragraph breaks tried for each cut before the rest of the sample is left whole
+CUT_ATTEMPTS = 8
+
+
+class ChunkStats(NamedTuple):
+    """Statistics of one chunk of a sample, with what the reduce step needs to join chunks."""
+    stats: StyleStats
+    sentence_spans: np.ndarray      # (sentences, 2) character spans within the chunk
+    sentence_lengths: np.ndarray    # tokens per sentence
+    head_words: List[str]           # first and last two lowercased words, for n-grams across cuts
+    tail_words: List[str]
+    ends_with_word: bool            # last token is a word, so quirk windows would run on
+    transition_starts: List[str]    # transitions opening a sentence, in order of first use
+
+
+def _analyze_sample(text: str, tokenizer: Optional[str], seed: Optional[int]) -> StyleStats:
+    return StyleAnalyzer(tokenizer=tokenizer, seed=seed).analyze_sample(text, approximate=False)
+
+
+def _analyze_chunk(text: str, tokenizer: Optional[str], seed: Optional[int]) -> ChunkStats:
+    analyzer = StyleAnalyzer(tokenizer=tokenizer, seed=seed)
+    doc = TextDocument(text, tokenizer=analyzer.tokenizer)
+    # All n-grams, so the counts of the whole sample can be cut to its top ones after merging
+    stats = analyzer._document_stats(doc, ngram_top_k=None)
+    words = doc.words_lower
+    starts = (doc.tokens[doc.token_offsets[i]].lower() for i in range(len(doc.sentence_spans))
+              if doc.token_offsets[i] < doc.token_offsets[i + 1])
+    return ChunkStats(
+        stats=stats,
+        sentence_spans=np.asarray(doc.sentence_spans, dtype=np.int64).reshape(-1, 2),
+        sentence_lengths=np.diff(np.asarray(doc.token_offsets, dtype=np.int64)),
+        head_words=words[:2],
+        tail_words=words[-2:],
+        ends_with_word=bool(doc.tokens) and doc.tokens[-1].isalnum(),
+        transition_starts=list(dict.fromkeys(start for start in starts if start in TRANSITION_PHRASES)),
+    )
+
+
+def clean_cut(text: str, cut: int, tokenizer: TokenizerBackend) -> bool:
+    """Whether ``cut`` falls between two sentences with no quirk window running across it.
+
+    Only the text around the cut is tokenized, so cuts can be checked before any
+    chunk is analyzed. ``merge_chunks`` still checks the joined chunks exactly.
+    """
+    start = max(0, cut - CUT_CONTEXT_CHARS)
+    window = text[start:cut + CUT_CONTEXT_CHARS]
+    spans = tokenizer.sentence_spans(window)
+    before = [span for span in spans if span[1] <= cut - start]
+    if not before or any(span[0] < cut - start < span[1] for span in spans):
+        return False
+    tokens = tokenizer.tokenize_sentence(window[before[-1][0]:before[-1][1]])
+    return bool(tokens) and not tokens[-1].isalnum()
+
+
+def chunk_bounds(text: str, chunk_chars: int, tokenizer: Optional[TokenizerBackend] = None) -> List[int]:
+    """Offsets cutting ``text`` into chunks of at least ``chunk_chars``, at paragraph breaks only.
+
+    With a ``tokenizer``, a paragraph break is only used if it passes ``clean_cut``,
+    so the chunks can be joined without analyzing the sample again.
+    """
+    cuts = [0]
+    while len(text) - cuts[-1] > 2 * chunk_chars:
+        cut = text.find("\n\n", cuts[-1] + chunk_chars, len(text) - chunk_chars)
+        if tokenizer is not None:
+            for _ in range(CUT_ATTEMPTS):
+                if cut < 0 or clean_cut(text, cut, tokenizer):
+                    break
+                cut = text.find("\n\n", cut + 2, len(text) - chunk_chars)
+            else:
+                cut = -1
+        if cut < 0:
+            break
+        cuts.append(cut)
+    cuts.append(len(text))
+    return cuts
+
+
+def merge_chunks(text: str, cuts: List[int], chunks: List[ChunkStats],
+                 analyzer: StyleAnalyzer) -> Optional[StyleStats]:
+    """Join the statistics of the chunks of ``text`` into those of the whole sample.
+
+    Chunks are cut at paragraph breaks, where sentences, paragraphs and most
+    counters are independent of the text on the other side. The rest is joined
+    here: n-grams across each cut, the rhythm of the whole sentence sequence,
+    the order of first use of transitions, and excerpt candidates drawn with the
+    seed of the whole sample. The result equals ``analyzer.analyze_sample(text)``.
+
+    Returns None if a cut does not fall between two sentences the way a single
+    pass would see it, or the quirk counts could run on across it; the sample
+    must then be analyzed in one piece. Cuts from ``chunk_bounds`` with a
+    tokenizer are checked up front, so this is rare.
+    """
+    for i in range(1, len(chunks)):
+        previous, chunk = chunks[i - 1], chunks[i]
+        if previous.ends_with_word:
+            return None
+        if len(previous.sentence_spans) and len(chunk.sentence_spans):
+            # The last sentence before the cut and the first after it, tokenized together
+            last = tuple(int(position) + cuts[i - 1] for position in previous.sentence_spans[-1])
+            first = tuple(int(position) + cuts[i] for position in chunk.sentence_spans[0])
+            window = analyzer.tokenizer.sentence_spans(text[last[0]:first[1]])
+            if [(start + last[0], end + last[0]) for start, end in window] != [last, first]:
+                return None
+
+    parts = []
+    for i, chunk in enumerate(chunks):
+        if i:
+            # N-grams spanning the cut before this chunk
+            tail, head = chunks[i - 1].tail_words, chunk.head_words
+            boundary = StyleStats()
+            boundary.bigrams = analyzer._extract_ngrams(tail[-1:] + head[:1], 2)
+            boundary.trigrams = analyzer._extract_ngrams(tail[-2:] + head[:2], 3)
+            parts.append(boundary)
+        parts.append(chunk.stats)
+    stats = merge_stats(parts)
+    stats.documents = 1
+    stats.bigrams = top_counts(stats.bigrams, NGRAM_TOP_K)
+    stats.trigrams = top_counts(stats.trigrams, NGRAM_TOP_K)
+
+    # Histograms in value order and transitions in order of first use, as one pass builds them
+    for field in ("sentence_lengths", "paragraph_lengths"):
+        setattr(stats, field, Counter(dict(sorted(getattr(stats, field).items()))))
+    starts = dict.fromkeys(phrase for chunk in chunks for phrase in chunk.transition_starts)
+    order = list(starts) + [phrase for phrase in stats.transitions if phrase not in starts]
+    stats.transitions = Counter({phrase: stats.transitions[phrase] for phrase in order})
+
+    lengths = np.concatenate([chunk.sentence_lengths for chunk in chunks])
+    stats.rhythm = analyzer._classify_rhythm(lengths)
+    sentences = [
+        text[start + offset:end + offset]
+        for offset, chunk in zip(cuts, chunks)
+        for start, end in chunk.sentence_spans.tolist()
+    ]
+    stats.excerpts = analyzer._sample_excerpt_candidates(sentences, lengths.tolist(), analyzer._rng(text))
+    return stats
+
+
+def analyze_parallel(samples: List[str], analyzer: Optional[StyleAnalyzer] = None,
+                     workers: int = ANALYSIS_WORKERS, executor: Optional[Executor] = None) -> Dict[str, Any]:
+    """Build the style profile of ``samples`` with map-reduce over worker processes.
+
+    Map: samples are analyzed in parallel, and samples too long to balance the
+    load are cut into chunks at paragraph breaks, each analyzed on its own.
+    Reduce: the chunk statistics of each sample are joined (see
+    ``merge_chunks``) and the per-sample statistics merged in sample order. The
+    profile is identical to ``analyzer.analyze(approximate=False)`` on the same
+    samples.
+
+    Jobs run in the shared pool of ``analysis_executor`` unless ``executor`` is given.
+    """
+    analyzer = analyzer or StyleAnalyzer()
+    if not samples:
+        raise ValueError("No samples added to analyze")
+    executor = executor or analysis_executor.pool()
+
+    tokenizer, seed = analyzer.tokenizer.name, analyzer.seed
+    chunk_chars = max(MIN_CHUNK_CHARS, sum(len(sample) for sample in samples) // (max(workers, 1) * CHUNKS_PER_WORKER))
+
+    jobs = []
+    for sample in samples:
+        cuts = chunk_bounds(sample, chunk_chars, analyzer.tokenizer)
+        if len(cuts) <= 2:
+            jobs.append(executor.submit(_analyze_sample, sample, tokenizer, seed))
+        else:
+            jobs.append((cuts, [
+                executor.submit(_analyze_chunk, sample[start:end], tokenizer, seed)
+                for start, end in zip(cuts, cuts[1:])
+            ]))
+
+    stats = []
+    for sample, job in zip(samples, jobs):
+        if isinstance(job, Future):
+            stats.append(job.result())
+            continue
+        cuts, futures = job
+        merged = merge_chunks(sample, cuts, [future.result() for future in futures], analyzer)
+        if merged is None:
+            merged = executor.submit(_analyze_sample, sample, tokenizer, seed).result()
+        stats.append(merged)
+    return analyzer.build_profile(merge_stats(stats))
+
+
+async def analyze_sample_chunked(text: str, tokenizer: Optional[str] = None,
+                                 executor: AnalysisExecutor = analysis_executor) -> Optional[StyleStats]:
+    """Analyze one long sample as chunks spread over the executor's workers.
+
+    Each chunk is a separate job under the executor's queue limit and timeout;
+    if one fails, the jobs of the other chunks are cancelled. Returns None if the
+    sample is too short to cut or the chunks cannot be joined exactly; the caller
+    then analyzes it as a single job.
+    """
+    analyzer = StyleAnalyzer(tokenizer=tokenizer)
+    chunk_chars = max(MIN_CHUNK_CHARS, len(text) // max(executor.workers, 1))
+    cuts = await asyncio.to_thread(chunk_bounds, text, chunk_chars, analyzer.tokenizer)
+    if len(cuts) <= 2:
+        return None
+    tasks = [
+        asyncio.ensure_future(executor.run(_analyze_chunk, text[start:end], tokenizer, None))
+        for start, end in zip(cuts, cuts[1:])
+    ]
+    try:
+        chunks = await asyncio.gather(*tasks)
+    except BaseException:
+        # gather leaves the other jobs running; those not started yet are dropped from the pool
+        for task in tasks:
+            task.cancel()
+        raise
+    return await asyncio.to_thread(merge_chunks, text, cuts, list(chunks), analyzer)
@@ -0,0 +1,57 @@
+import re
+import bisect
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+def _trie_pattern(trie: Dict[str, dict]) -> str:
+    """Regular expression matching the phrases stored in ``trie``, longest first.
+
+    Shared prefixes are matched once, so the work per text position is bounded by
+    the phrase length rather than the number of phrases. An empty key marks the
+    end of a phrase; the rest of the branch is optional and greedy, so a longer
+    phrase wins over a phrase that is its prefix.
+    """
+    branches = [re.escape(char) + _trie_pattern(trie[char]) for char in sorted(trie) if char]
+    if not branches:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in trie:
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+class PhraseMatcher:
+    """Finds occurrences of many literal phrases in a single pass over a text.
+
+    The phrases are merged into a trie and compiled to one regular expression,
+    which plays the role of an Aho-Corasick automaton: every position of the text
+    is visited once no matter how many phrases there are. Matches are reported
+    leftmost-longest and do not overlap.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: List[str] = sorted({phrase for phrase in phrases if phrase})
+        trie: Dict[str, dict] = {}
+        for phrase in self.phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        self.pattern = re.compile(_trie_pattern(trie) if self.phrases else r"(?!)")
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """``(start, end, phrase)`` for every match in ``text``."""
+        for match in self.pattern.finditer(text):
+            yield match.start(), match.end(), match.group()
+
+    def finditer_spans(self, text: str, spans: List[Tuple[int, int]]) -> Iterator[Tuple[int, int, int, str]]:
+        """``(span_index, start, end, phrase)`` for the matches lying entirely inside one of ``spans``.
+
+        ``spans`` must be sorted and non-overlapping, like the sentence spans of a
+        ``TextDocument``; matches that cross a span boundary are skipped.
+        """
+        starts = [start for start, _ in spans]
+        for start, end, phrase in self.finditer(text):
+            index = bisect.bisect_right(starts, start) - 1
+            if index >= 0 and end <= spans[index][1]:
+                yield index, start, end, phrase
@@ -0,0 +1,60 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy.orm import Session
+
+from database.models import Sample, StyleProfile
+from utils.style_analyzer import StyleAnalyzer
+from utils.style_stats import StyleStats, merge_stats, merge_excerpt_reservoirs
+from utils.analysis_executor import analysis_executor
+
+
+async def get_sample_stats(sample: Sample) -> Dict[str, Any]:
+    """Return the stored statistics of a sample, analyzing it only if they are missing."""
+    if sample.stats is None:
+        sample.stats = (await analysis_executor.analyze_sample(sample.content)).to_dict()
+    return sample.stats
+
+
+async def get_profile_stats(db: Session, style_profile: StyleProfile) -> List[Dict[str, Any]]:
+    """Return the stored statistics a profile is merged from: its own, or those of its samples if missing."""
+    if style_profile.profile_stats is not None:
+        return [style_profile.profile_stats]
+    samples = db.query(Sample).filter(Sample.style_profile_id == style_profile.id).order_by(Sample.id).all()
+    return [await get_sample_stats(sample) for sample in samples]
+
+
+def merge_profile(parts: List[Union[StyleStats, Dict[str, Any]]]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Profile data and stored statistics of statistics merged in order.
+
+    ``parts`` may be StyleStats or stored statistics. Runs in an analysis worker.
+    Returns ``(None, None)`` when nothing is left to describe.
+    """
+    stats = merge_stats([part if isinstance(part, StyleStats) else StyleStats.from_dict(part) for part in parts])
+    if not stats.sentence_count:
+        return None, None
+    return StyleAnalyzer().build_profile(stats), stats.to_dict()
+
+
+async def update_profile(style_profile: StyleProfile, parts: List[Union[StyleStats, Dict[str, Any]]]):
+    """Store merged statistics on a profile and rebuild its profile data from them.
+
+    Merging, building the profile and serializing it run in an analysis worker,
+    off the event loop.
+    """
+    style_profile.profile_data, style_profile.profile_stats = await analysis_executor.run(merge_profile, parts)
+
+
+def subtract_sample(profile_stats: Dict[str, Any], sample_stats: Dict[str, Any],
+                    remaining: List[Tuple[Dict[str, Any], int]]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Profile data and stored statistics of a profile once one of its samples is deleted.
+
+    Works on stored statistics so it can run in an analysis worker. ``remaining``
+    holds the ``stored_excerpts`` of the other samples in order, from which the
+    excerpt reservoirs are rebuilt as a retrain would. Returns ``(None, None)``
+    when nothing is left to describe.
+    """
+    stats = StyleStats.from_dict(profile_stats).subtract(StyleStats.from_dict(sample_stats))
+    stats.excerpts = merge_excerpt_reservoirs(remaining)
+    if not stats.sentence_count:
+        return None, None
+    return StyleAnalyzer().build_profile(stats), stats.to_dict()
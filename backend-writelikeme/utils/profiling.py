@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+# Log a per-stage timing report for every analysis
+ANALYSIS_PROFILING = os.getenv("ANALYSIS_PROFILING", "").lower() in ("1", "true", "yes")
+# Also trace allocations per stage (slows analysis down noticeably)
+ANALYSIS_PROFILE_MEMORY = os.getenv("ANALYSIS_PROFILE_MEMORY", "").lower() in ("1", "true", "yes")
+
+
+def log_report(report: Dict[str, Any]):
+    """Default sink: print the report as a single JSON line."""
+    print(f"Analysis profile: {json.dumps(report)}")
+
+
+class StageProfiler:
+    """Records wall time, allocations and input size of named analysis stages.
+
+    Repeated stages are aggregated under their name. ``flush`` hands the report
+    to ``sink`` (a callable taking the report dict, e.g. ``log_report`` or a
+    metrics client) and starts over; without a sink, ``report`` can be read at any
+    time. Stages must not be nested when ``trace_memory`` is on, since each one
+    resets the tracemalloc peak.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False, sink: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.trace_memory = trace_memory
+        self.sink = sink
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str, size: int = 0):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            record = self.stages.get(name)
+            if record is None:
+                record = self.stages[name] = {"calls": 0, "seconds": 0.0, "input_size": 0}
+                if self.trace_memory:
+                    record.update(allocated_bytes=0, peak_bytes=0)
+            record["calls"] += 1
+            record["seconds"] += elapsed
+            record["input_size"] += size
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record["allocated_bytes"] += current - memory_before
+                record["peak_bytes"] = max(record["peak_bytes"], peak - memory_before)
+
+    def report(self, label: Optional[str] = None) -> Dict[str, Any]:
+        """Structured report of the stages recorded so far, slowest first."""
+        stages = dict(sorted(self.stages.items(), key=lambda item: item[1]["seconds"], reverse=True))
+        return {
+            "label": label,
+            "total_seconds": sum(record["seconds"] for record in stages.values()),
+            "stages": stages
+        }
+
+    def reset(self):
+        self.stages = {}
+
+    def flush(self, label: Optional[str] = None):
+        """Send the report to the sink, if there is one, and start a new one."""
+        if self.sink is None or not self.stages:
+            return
+        self.sink(self.report(label))
+        self.reset()
+
+
+class NullProfiler:
+    """Profiler used when profiling is off; every stage is a shared no-op context."""
+
+    enabled = False
+    _context = nullcontext()
+
+    def stage(self, name: str, size: int = 0):
+        return self._context
+
+    def report(self, label: Optional[str] = None) -> Dict[str, Any]:
+        return {"label": label, "total_seconds": 0.0, "stages": {}}
+
+    def reset(self):
+        pass
+
+    def flush(self, label: Optional[str] = None):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def default_profiler():
+    """A logging profiler if enabled through the environment, else the no-op profiler."""
+    if not ANALYSIS_PROFILING:
+        return NULL_PROFILER
+    return StageProfiler(trace_memory=ANALYSIS_PROFILE_MEMORY, sink=log_report)
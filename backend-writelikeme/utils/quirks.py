@@ -0,0 +1,61 @@
+from collections import Counter, deque
+
+from utils.phrase_matcher import PhraseMatcher
+from utils.text_document import TextDocument
+
+
+QUIRK_NAMES = ["i_think", "close_repeats", "fragments", "all_caps"]
+# A word repeated after one to four other words counts as a close repeat
+CLOSE_REPEAT_GAP = 4
+# Sentences with fewer tokens than this are fragments
+FRAGMENT_MAX_TOKENS = 4
+# Literal phrases behind quirks, matched case-sensitively anywhere in the text
+QUIRK_PHRASES = {"I think": "i_think"}
+_QUIRK_MATCHER = PhraseMatcher(QUIRK_PHRASES)
+
+
+def count_quirks(doc: TextDocument) -> Counter:
+    """Count the patterns behind the writing quirks in one pass over the tokens.
+
+    Quirk phrases such as "I think" are found by one ``PhraseMatcher`` pass over
+    the text, so adding phrases does not add passes, and are counted as
+    ``str.count`` would.
+
+    Close repeats are found with a sliding window of the previous words; any
+    punctuation token closes the window, and a repeat starts a fresh one so matches
+    never overlap. ``all_caps`` is left at zero here; ALL-CAPS words are counted
+    from the character pass (``CharacterStats.all_caps_words``). Counts are exact,
+    as they are merged across samples and turned into rates.
+    """
+    counts = Counter({name: 0 for name in QUIRK_NAMES})
+    tokens = doc.tokens
+    offsets = doc.token_offsets
+
+    for _, _, phrase in _QUIRK_MATCHER.finditer(doc.text):
+        counts[QUIRK_PHRASES[phrase]] += 1
+
+    window = deque(maxlen=CLOSE_REPEAT_GAP)  # words two to five positions back
+    last_word = None
+
+    for i in range(len(doc.sentence_spans)):
+        start, end = offsets[i], offsets[i + 1]
+        if end - start <= FRAGMENT_MAX_TOKENS:
+            counts["fragments"] += 1
+
+        for token in tokens[start:end]:
+            if not token.isalnum():
+                window.clear()
+                last_word = None
+                continue
+
+            word = token.lower()
+            if word in window:
+                counts["close_repeats"] += 1
+                window.clear()
+                last_word = None
+                continue
+            if last_word is not None:
+                window.append(last_word)
+            last_word = word
+
+    return counts
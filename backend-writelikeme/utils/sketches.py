@@ -0,0 +1,121 @@
+import heapq
+import hashlib
+from collections import Counter
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+
+class SpaceSavingCounter:
+    """Approximate counts of the most frequent keys in bounded memory.
+
+    A batched Space-Saving summary: at most ``2 * capacity`` keys are tracked, and
+    whenever that is exceeded only the ``capacity`` largest survive. A key seen for
+    the first time after a prune may have been evicted before, so it starts from
+    the largest evicted count and remembers that as its possible error.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[Any, int] = {}
+        self.errors: Dict[Any, int] = {}
+        self.floor = 0
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def update(self, counts: Mapping[Any, int]):
+        for key, count in counts.items():
+            if key in self.counts:
+                self.counts[key] += count
+            else:
+                self.counts[key] = self.floor + count
+                self.errors[key] = self.floor
+        if len(self.counts) > 2 * self.capacity:
+            self._prune()
+
+    def _prune(self):
+        ranked = heapq.nlargest(self.capacity + 1, self.counts.items(), key=itemgetter(1))
+        if len(ranked) <= self.capacity:
+            return
+        self.floor = max(self.floor, ranked[-1][1])
+        self.counts = dict(ranked[:-1])
+        self.errors = {key: self.errors[key] for key in self.counts}
+
+    def most_common(self, n: int) -> List[Tuple[Any, int]]:
+        """The ``n`` keys with the largest guaranteed counts."""
+        return self.to_counter().most_common(n)
+
+    def to_counter(self) -> Counter:
+        """Guaranteed lower bounds of the tracked counts, at most ``capacity`` keys."""
+        self._prune()
+        return Counter({key: count - self.errors[key] for key, count in self.counts.items()})
+
+
+class DistinctCounter:
+    """Estimate of the number of distinct keys (k-minimum-values sketch).
+
+    Exact while fewer than ``k`` distinct keys were seen; beyond that the relative
+    error is about ``1 / sqrt(k)``.
+    """
+
+    def __init__(self, k: int = 4096):
+        self.k = k
+        self._heap: List[int] = []  # negated hashes, so the largest kept hash is on top
+        self._members = set()
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def update(self, keys: Iterable[str]):
+        for key in keys:
+            value = self._hash(key)
+            if value in self._members:
+                continue
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, -value)
+                self._members.add(value)
+            elif value < -self._heap[0]:
+                evicted = -heapq.heapreplace(self._heap, -value)
+                self._members.discard(evicted)
+                self._members.add(value)
+
+    def estimate(self) -> int:
+        if len(self._heap) < self.k:
+            return len(self._heap)
+        return int((self.k - 1) * 2 ** 64 / -self._heap[0])
+
+
+class LongWordTracker:
+    """Exact counts of the longest words seen, in bounded memory.
+
+    Only the ``capacity`` words with the largest ``(length, word)`` are kept. That
+    threshold only grows, so an evicted word can never come back and every tracked
+    word has been counted since its first occurrence.
+    """
+
+    def __init__(self, capacity: int = 1000, min_length: int = 6):
+        self.capacity = capacity
+        self.min_length = min_length
+        self.counts: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def update(self, counts: Mapping[str, int]):
+        for word, count in counts.items():
+            if len(word) < self.min_length:
+                continue
+            if word in self.counts:
+                self.counts[word] += count
+                continue
+            key = (len(word), word)
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, key)
+            elif key > self._heap[0]:
+                _, evicted = heapq.heapreplace(self._heap, key)
+                del self.counts[evicted]
+            else:
+                continue
+            self.counts[word] = count
+
+    def to_counter(self) -> Counter:
+        return Counter(self.counts)
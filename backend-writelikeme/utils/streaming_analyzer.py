@@ -0,0 +1,182 @@
+import re
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.style_analyzer import StyleAnalyzer
+from utils.style_stats import StyleStats
+from utils.sketches import SpaceSavingCounter, DistinctCounter, LongWordTracker
+from utils.text_document import TextDocument
+
+
+# Text is analyzed in blocks of at most this many characters, cut at paragraph breaks
+DEFAULT_BLOCK_CHARS = 256 * 1024
+DEFAULT_TOP_K = 20000
+
+# Likely sentence ends, to cut a block where no paragraph break is close enough
+_SENTENCE_END = re.compile(r"""[.!?]+["'’”)\]]*\s+""")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def block_cut(text: str, limit: int) -> Tuple[int, int]:
+    """Where to end a block of at most ``limit`` characters at the start of ``text``.
+
+    Returns the end of the block and the start of the rest. The block ends at the
+    last paragraph break in the second half of the limit, else at the last
+    sentence end there, else at whitespace, else right at the limit.
+    """
+    cut = text.rfind("\n\n", limit // 2, limit)
+    if cut >= 0:
+        return cut, cut + 2
+    for boundary in (_SENTENCE_END, _WHITESPACE):
+        ends = [match.end() for match in boundary.finditer(text, limit // 2, limit)]
+        if ends:
+            return ends[-1], ends[-1]
+    return limit, limit
+
+
+class _RhythmTracker:
+    """Follows the rhythm patterns of a sentence-length sequence one length at a time."""
+
+    def __init__(self):
+        self.sentences = 0
+        self.previous_length = None
+        self.previous_diff = None
+        self.alternating = True
+        self.ascending = True
+        self.descending = True
+
+    def update(self, lengths: List[int]):
+        if not lengths:
+            return
+        lengths = np.asarray(lengths, dtype=np.int64)
+        self.sentences += len(lengths)
+        if self.previous_length is not None:
+            lengths = np.concatenate(([self.previous_length], lengths))
+        diffs = np.diff(lengths)
+        self.previous_length = int(lengths[-1])
+        if not len(diffs):
+            return
+
+        signs = np.sign(diffs)
+        if self.previous_diff is not None:
+            signs = np.concatenate(([np.sign(self.previous_diff)], signs))
+        self.alternating = self.alternating and bool((signs[:-1] * signs[1:] == -1).all())
+        self.ascending = self.ascending and bool((diffs > 0).all())
+        self.descending = self.descending and bool((diffs < 0).all())
+        self.previous_diff = int(diffs[-1])
+
+    def to_counter(self) -> Counter:
+        if self.sentences < 3:
+            return Counter()
+        return Counter({
+            "documents": 1,
+            "alternating": int(self.alternating),
+            "ascending": int(self.ascending),
+            "descending": int(self.descending)
+        })
+
+
+class StreamingStyleAnalyzer:
+    """Analyzes one long text fed as chunks while keeping memory bounded.
+
+    Chunks are buffered and cut into blocks of at most ``block_chars`` characters,
+    at paragraph breaks where possible (see ``block_cut``); each block is tokenized
+    on its own and folded into bounded state. A paragraph cut at a sentence end
+    counts as two paragraphs. Histograms and small counters stay exact, while words, n-grams and
+    sentence starters go through top-k summaries, vocabulary size through a
+    distinct-count sketch, and excerpts through the usual bounded reservoirs.
+    N-grams and rhythm are carried across block boundaries.
+    """
+
+    def __init__(self, analyzer: Optional[StyleAnalyzer] = None, top_k: int = DEFAULT_TOP_K,
+                 block_chars: int = DEFAULT_BLOCK_CHARS):
+        self.analyzer = analyzer or StyleAnalyzer()
+        self.block_chars = block_chars
+        self._buffer: List[str] = []
+        self._buffered = 0
+
+        self._stats = StyleStats()
+        self._word_counts = SpaceSavingCounter(top_k)
+        self._bigrams = SpaceSavingCounter(top_k)
+        self._trigrams = SpaceSavingCounter(top_k)
+        self._starters = SpaceSavingCounter(top_k)
+        self._vocabulary = DistinctCounter()
+        self._long_words = LongWordTracker()
+        self._rhythm = _RhythmTracker()
+        self._tail_words: List[str] = []
+
+    def feed(self, chunk: str):
+        """Add the next chunk of text, analyzing any complete blocks."""
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered < self.block_chars:
+            return
+
+        text = "".join(self._buffer)
+        start = 0
+        while len(text) - start >= self.block_chars:
+            end, rest = block_cut(text[start:start + self.block_chars], self.block_chars)
+            block = text[start:start + end]
+            if block.strip():
+                self._process_block(block)
+            start += rest
+        text = text[start:]
+        self._buffer = [text] if text else []
+        self._buffered = len(text)
+
+    def finish(self) -> StyleStats:
+        """Analyze what is left in the buffer and return the collected statistics."""
+        text = "".join(self._buffer)
+        self._buffer, self._buffered = [], 0
+        if text.strip():
+            self._process_block(text)
+
+        stats = self._stats
+        stats.documents = 1
+        stats.word_counts = self._word_counts.to_counter()
+        stats.bigrams = self._bigrams.to_counter()
+        stats.trigrams = self._trigrams.to_counter()
+        stats.starters = self._starters.to_counter()
+        stats.vocabulary_estimate = self._vocabulary.estimate()
+        stats.rare_words = self._long_words.to_counter()
+        stats.rhythm = self._rhythm.to_counter()
+        self.analyzer.profiler.flush("analyze_stream")
+        return stats
+
+    def analyze(self, chunks: Iterable[str]) -> Dict[str, Any]:
+        """Analyze a whole stream of chunks and build the style profile."""
+        for chunk in chunks:
+            self.feed(chunk)
+        return self.analyzer.build_profile(self.finish())
+
+    def _process_block(self, text: str):
+        with self.analyzer.profiler.stage("tokenization", len(text)):
+            doc = TextDocument(text, tokenizer=self.analyzer.tokenizer)
+        block = self.analyzer._document_stats(doc, ngram_top_k=None)
+        words = doc.words_lower
+
+        self._word_counts.update(block.word_counts)
+        self._vocabulary.update(block.word_counts.keys())
+        self._long_words.update(block.word_counts)
+        self._starters.update(block.starters)
+        self._bigrams.update(block.bigrams)
+        self._trigrams.update(block.trigrams)
+
+        # N-grams spanning the boundary with the previous block
+        for n, summary in ((2, self._bigrams), (3, self._trigrams)):
+            boundary = self._tail_words[-(n - 1):] + words[:n - 1]
+            summary.update(self.analyzer._extract_ngrams(boundary, n))
+        self._tail_words = (self._tail_words + words[-2:])[-2:]
+        self._rhythm.update(doc.sentence_lengths)
+
+        # The unbounded counters are summarized above; merge only the bounded rest
+        for field in ("word_counts", "bigrams", "trigrams", "starters", "rhythm"):
+            setattr(block, field, Counter())
+        self._stats = self._stats.merge(block)
+
+
+def analyze_stream(chunks: Iterable[str], **options) -> Dict[str, Any]:
+    """Build a style profile from an iterator of text chunks in bounded memory."""
+    return StreamingStyleAnalyzer(**options).analyze(chunks)
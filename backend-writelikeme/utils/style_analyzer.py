@@ -1,18 +1,41 @@
-import re
-import nltk
 import numpy as np
 import random
-from nltk.tokenize import sent_tokenize, word_tokenize
 from collections import Counter, defaultdict
-from typing import List, Dict, Any, Tuple, Set
+from typing import List, Dict, Any, Optional, Tuple, Set
+from utils.text_document import TextDocument
+from utils.char_stats import CharacterStats
+from utils.tokenizers import get_tokenizer
+from utils.ngrams import NGramIndex
+from utils.phrase_matcher import PhraseMatcher
+from utils.quirks import count_quirks, QUIRK_NAMES
+from utils.profiling import default_profiler
+from utils.approximate import (
+    APPROXIMATE_CONFIDENCE, APPROXIMATE_SAMPLE_BUDGET, APPROXIMATE_THRESHOLD, estimate_vocabulary, ratio_interval,
+    stratified_sample
+)
+from utils.style_stats import StyleStats, merge_stats, content_seed, EXCERPT_CANDIDATES, EXCERPT_CATEGORIES, NGRAM_TOP_K
 
-# Download NLTK resources
-nltk.download('punkt', quiet=True)
+
+# Words and phrases used to connect sentences, found at sentence starts or after a comma
+TRANSITION_PHRASES = {
+    "however", "therefore", "moreover", "furthermore", "nevertheless",
+    "consequently", "alternatively", "meanwhile", "subsequently", "conversely",
+    "indeed", "similarly", "likewise", "in contrast", "for instance",
+    "specifically", "notably", "primarily", "certainly", "undoubtedly"
+}
+_TRANSITION_MATCHER = PhraseMatcher(f", {phrase}" for phrase in TRANSITION_PHRASES)
 
 
 class StyleAnalyzer:
-    def __init__(self):
+    def __init__(self, profiler=None, tokenizer: str = None, seed: Optional[int] = None):
         self.samples = []
+        # Per-stage timing; a no-op unless enabled or a StageProfiler is passed in
+        self.profiler = profiler if profiler is not None else default_profiler()
+        # Tokenizer backend by name ("nltk" or "fast"); defaults to TOKENIZER_BACKEND
+        self.tokenizer = get_tokenizer(tokenizer)
+        # Random choices are seeded from the content they pick from (mixed with this
+        # seed if given), so the same samples always give the same profile
+        self.seed = seed
         
     
     def add_sample(self, text: str):
@@ -25,172 +48,461 @@ class StyleAnalyzer:
         self.samples = []
         
     
-    def analyze(self) -> Dict[str, Any]:
-        """Analyze the style of all added samples in detail."""
+    def analyze(self, approximate: Optional[bool] = None, workers: int = 1) -> Dict[str, Any]:
+        """Analyze the style of all added samples in detail.
+        
+        With ``approximate`` only a stratified sample of the text is analyzed (see
+        ``analyze_approximate``). By default that happens when the samples add up
+        to more than APPROXIMATE_THRESHOLD characters. With ``workers`` above one,
+        an exact analysis is split into jobs for that many workers of the shared
+        analysis pool (see ``utils.parallel_analysis``) with the same result.
+        """
+        if not self.samples:
+            raise ValueError("No samples added to analyze")
+        if approximate is None:
+            approximate = sum(len(sample) for sample in self.samples) > APPROXIMATE_THRESHOLD
+        if approximate:
+            return self.analyze_approximate()
+        if workers > 1:
+            from utils.parallel_analysis import analyze_parallel
+            return analyze_parallel(self.samples, self, workers)
+        
+        stats = merge_stats([self.analyze_sample(sample, approximate=False) for sample in self.samples])
+        return self.build_profile(stats)
+    
+    
+    def analyze_approximate(self, budget: int = APPROXIMATE_SAMPLE_BUDGET) -> Dict[str, Any]:
+        """Profile the samples from about ``budget`` characters of stratified sampled text.
+        
+        Paragraphs (long ones cut into runs of sentences) are sampled from every
+        part of the text and analyzed in a few groups, so latency depends on the
+        budget rather than on the input size. Counts are extrapolated to the
+        full text, and the profile gains an "approximation" entry with the sample
+        size and confidence intervals of the averages, distributions and rates.
+        The vocabulary size is estimated over the full text with a distinct-count
+        sketch; rare words are picked from the sampled text.
+        """
         if not self.samples:
             raise ValueError("No samples added to analyze")
-            
-        combined_text = "\n\n".join(self.samples)
-        
-        # Basic tokenization
-        sentences = sent_tokenize(combined_text)
-        words = word_tokenize(combined_text)
-        paragraphs = [p.strip() for p in combined_text.split('\n\n') if p.strip()]
-        
-        # Advanced style features
-        sentence_lengths = [len(word_tokenize(s)) for s in sentences]
-        word_lengths = [len(w) for w in words if w.isalpha()]
-        
-        # Sentence structure analysis
-        sentence_starters = self._analyze_sentence_starters(sentences)
-        sentence_types = self._categorize_sentence_types(sentences)
-        
-        # Vocabulary analysis
-        words_lower = [w.lower() for w in words if w.isalpha()]
-        word_freq = Counter(words_lower)
-        vocab = set(words_lower)
-        
-        # N-gram analysis for distinctive phrase patterns
-        bigrams = self._extract_ngrams(words_lower, 2)
-        trigrams = self._extract_ngrams(words_lower, 3)
-        
-        # Unique phrases and patterns
-        signature_phrases = self._find_signature_phrases(bigrams, trigrams)
-        
-        # Paragraph structure
-        paragraph_lengths = [len(sent_tokenize(p)) for p in paragraphs]
-        paragraph_patterns = self._analyze_paragraph_patterns(paragraphs)
         
-        # Punctuation analysis (detailed)
-        punctuation_patterns = self._analyze_punctuation(combined_text)
+        stats, group_stats, sampling = self._approximate_stats(self.samples, budget)
+        self.profiler.flush("analyze_approximate")
+        total_characters = sampling["total_characters"]
+        fraction = sampling["sampled_characters"] / total_characters if total_characters else 1.0
+        profile = self.build_profile(stats)
+        profile["approximation"] = {
+            **sampling,
+            "confidence": APPROXIMATE_CONFIDENCE,
+            "intervals": self._approximation_intervals(group_stats, fraction),
+            "unavailable": [],
+        }
+        return profile
+    
+    
+    def _approximate_stats(self, samples: List[str],
+                           budget: int = APPROXIMATE_SAMPLE_BUDGET) -> Tuple[StyleStats, List[StyleStats], Dict[str, int]]:
+        """Statistics of ``samples`` extrapolated from a stratified sample of their text.
+        
+        Returns the extrapolated statistics, those of each sampled group (for the
+        confidence intervals) and the sample and population sizes.
+        """
+        groups, total_units, total_characters = stratified_sample(samples, budget, rng=self._rng(*samples))
+        group_stats = []
+        for units in groups:
+            # Each group of sampled paragraphs is analyzed as one document
+            text = "\n\n".join(unit for unit, _ in units)
+            with self.profiler.stage("tokenization", len(text)):
+                doc = TextDocument(text, tokenizer=self.tokenizer)
+            stats = self._document_stats(doc)
+            stats.paragraph_lengths = self._sampled_paragraph_lengths(doc, units)
+            group_stats.append(stats)
+        
+        sampling = {
+            "sampled_characters": sum(len(unit) for units in groups for unit, _ in units),
+            "total_characters": total_characters,
+            "sampled_units": sum(len(units) for units in groups),
+            "total_units": total_units,
+        }
+        stats = merge_stats(group_stats)
+        if sampling["sampled_characters"] < total_characters:
+            stats = stats.scale(total_characters / sampling["sampled_characters"])
+            with self.profiler.stage("vocabulary", total_characters):
+                stats.vocabulary_estimate = estimate_vocabulary(samples)
+            stats.approximation = Counter({
+                "documents": len(samples),
+                "sampled_characters": sampling["sampled_characters"],
+                "total_characters": total_characters,
+            })
+        stats.documents = len(samples)
+        return stats, group_stats, sampling
+    
+    
+    def _rng(self, *content: Any) -> random.Random:
+        """A random generator seeded from ``content`` and the analyzer's seed."""
+        return random.Random(content_seed(self.seed, *content))
+    
+    
+    def _sampled_paragraph_lengths(self, doc: TextDocument, units: List[Tuple[str, Optional[int]]]) -> Counter:
+        """Sentences-per-paragraph histogram of a document of sampled units.
+        
+        Every unit is one paragraph of the document. Pieces of a cut paragraph
+        are replaced by the paragraph they came from, counted once.
+        """
+        lengths = Counter()
+        for count, (_, paragraph_sentences) in zip(doc.paragraph_sentence_counts, units):
+            if paragraph_sentences is None:
+                lengths[count] += 1
+            elif paragraph_sentences:
+                lengths[paragraph_sentences] += 1
+        return lengths
+    
+    
+    def analyze_sample(self, text: str, approximate: Optional[bool] = None) -> StyleStats:
+        """Tokenize a single sample and collect its mergeable statistics.
+        
+        Like ``analyze``, a sample longer than APPROXIMATE_THRESHOLD characters is
+        only analyzed from a stratified sample of its text unless ``approximate``
+        is False. Its statistics are then extrapolated and record the sampling
+        in ``approximation``.
+        """
+        if approximate is None:
+            approximate = len(text) > APPROXIMATE_THRESHOLD
+        if approximate:
+            stats, _, _ = self._approximate_stats([text])
+            self.profiler.flush("analyze_sample")
+            return stats
+        
+        # Tokenize once; every extractor below reads from this document
+        with self.profiler.stage("tokenization", len(text)):
+            doc = TextDocument(text, tokenizer=self.tokenizer)
+        stats = self._document_stats(doc)
+        self.profiler.flush("analyze_sample")
+        return stats
+    
+    
+    def _document_stats(self, doc: TextDocument, ngram_top_k: Optional[int] = NGRAM_TOP_K) -> StyleStats:
+        """Collect the mergeable statistics of a tokenized document.
+
+        Only the ``ngram_top_k`` most frequent bigrams and trigrams are kept, or
+        all of them if it is None (for parts of a document that are joined later).
+        """
+        stage = self.profiler.stage
+        text = doc.text
+        
+        with stage("tokenization", len(doc.tokens)):
+            sentences = doc.sentences
+            sentence_lengths = np.diff(np.asarray(doc.token_offsets, dtype=np.int64))
+            words_lower = doc.words_lower
+        sentence_count = len(sentences)
+        
+        stats = StyleStats()
+        stats.documents = 1
+        with stage("sentence_lengths", sentence_count):
+            stats.sentence_lengths = self._length_histogram(sentence_lengths)
+            stats.rhythm = self._classify_rhythm(sentence_lengths)
+        with stage("paragraphs", len(doc.paragraph_spans)):
+            stats.paragraph_lengths = self._length_histogram(doc.paragraph_sentence_counts)
+        
+        # Vocabulary and n-grams for distinctive phrase patterns
+        with stage("ngrams", len(words_lower)):
+            stats.word_counts = Counter(words_lower)
+            stats.word_total = len(words_lower)
+            stats.word_length_total = sum(len(w) for w in words_lower)
+            ngrams = NGramIndex(words_lower)
+            stats.bigrams = ngrams.counts(2, ngram_top_k)
+            stats.trigrams = ngrams.counts(3, ngram_top_k)
+        
+        # Sentence structure, punctuation and personal patterns
+        with stage("starters", sentence_count):
+            stats.starters = self._count_sentence_starters(doc)
+        with stage("characters", len(text)):
+            chars = doc.characters
+        with stage("sentence_types", sentence_count):
+            stats.sentence_types = self._count_sentence_types(doc)
+        with stage("punctuation", len(text)):
+            stats.punctuation = self._count_punctuation(chars)
+        with stage("transitions", sentence_count):
+            stats.transitions = self._count_transition_phrases(doc)
+        with stage("quirks", len(doc.tokens)):
+            stats.quirks = self._count_quirks(doc)
+            stats.quirks["all_caps"] = chars.all_caps_words()
+        
+        # Candidate excerpts with different characteristics
+        with stage("excerpts", sentence_count):
+            stats.excerpts = self._sample_excerpt_candidates(sentences, sentence_lengths.tolist(), self._rng(text))
+        
+        return stats
+    
+    
+    def build_profile(self, stats: StyleStats) -> Dict[str, Any]:
+        """Build the detailed style profile from (merged) sample statistics."""
+        if not stats.sentence_count:
+            raise ValueError("No sentences found in the samples to analyze")
+        
+        stage = self.profiler.stage
+        word_count = stats.word_count
+        sentence_count = stats.sentence_count
+        
+        with stage("sentence_lengths", sentence_count):
+            sentence_lengths, _ = self._histogram_arrays(stats.sentence_lengths)
+            avg_length, std_dev = self._histogram_moments(stats.sentence_lengths)
+            length_distribution = self._get_length_distribution(stats.sentence_lengths)
+            rhythm_pattern = self._analyze_rhythm(stats)
+        with stage("starters", len(stats.starters)):
+            sentence_starters = self._analyze_sentence_starters(stats.starters, sentence_count)
+        with stage("sentence_types", sentence_count):
+            sentence_types = self._categorize_sentence_types(stats.sentence_types, sentence_count)
+        with stage("signature_phrases", len(stats.bigrams) + len(stats.trigrams)):
+            signature_phrases = self._find_signature_phrases(stats.bigrams, stats.trigrams)
+        with stage("punctuation", word_count):
+            punctuation_patterns = self._analyze_punctuation(stats.punctuation, word_count)
+        with stage("paragraphs", len(stats.paragraph_lengths)):
+            paragraph_patterns = self._analyze_paragraph_patterns(stats.paragraph_lengths)
+        with stage("ngrams", len(stats.word_counts)):
+            distinctive_words = self._find_distinctive_words(stats.word_counts)
+            rare_words = self._find_rare_words(stats.rare_word_counts)
+        with stage("transitions", len(stats.transitions)):
+            transition_phrases = self._find_transition_phrases(stats.transitions)
         
         # Calculate overall metrics
-        lexical_diversity = len(vocab) / len(words_lower) if words_lower else 0
-        
-        # Extract representative excerpts with different characteristics
-        diverse_excerpts = self._extract_diverse_excerpts(sentences, sentence_lengths, 3)
+        lexical_diversity = stats.vocabulary_size / word_count if word_count else 0
         
         # Personal quirks and patterns
-        quirks = self._identify_writing_quirks(
-            combined_text, 
-            sentence_starters, 
-            punctuation_patterns, 
-            signature_phrases
-        )
+        with stage("quirks", len(stats.quirks)):
+            quirks = self._identify_writing_quirks(
+                stats, 
+                sentence_starters, 
+                punctuation_patterns, 
+                signature_phrases
+            )
+            quirk_stats = self._quirk_rates(stats)
+        
+        # Sample excerpts for the prompt
+        with stage("excerpts", sentence_count):
+            excerpts = self._extract_diverse_excerpts(stats, 3)
         
         # Compile detailed style profile
         style_profile = {
             "sentence_stats": {
-                "avg_length": np.mean(sentence_lengths),
-                "std_dev": np.std(sentence_lengths),
-                "min_length": min(sentence_lengths) if sentence_lengths else 0,
-                "max_length": max(sentence_lengths) if sentence_lengths else 0,
-                "length_distribution": self._get_length_distribution(sentence_lengths),
+                "avg_length": avg_length,
+                "std_dev": std_dev,
+                "min_length": int(sentence_lengths.min()),
+                "max_length": int(sentence_lengths.max()),
+                "length_distribution": length_distribution,
                 "common_starters": sentence_starters[:5],
                 "sentence_types": sentence_types
             },
             "word_stats": {
-                "avg_length": np.mean(word_lengths) if word_lengths else 0,
-                "vocabulary_size": len(vocab),
+                "avg_length": stats.word_length_total / word_count if word_count else 0,
+                "vocabulary_size": stats.vocabulary_size,
                 "lexical_diversity": lexical_diversity,
-                "distinctive_words": self._find_distinctive_words(word_freq),
-                "rare_words": self._find_rare_words(word_freq)
+                "distinctive_words": distinctive_words,
+                "rare_words": rare_words
             },
             "structure_stats": {
-                "avg_paragraph_sentences": np.mean(paragraph_lengths) if paragraph_lengths else 0,
+                "avg_paragraph_sentences": paragraph_patterns["avg_sentences"],
                 "paragraph_patterns": paragraph_patterns,
                 "punctuation_patterns": punctuation_patterns,
-                "transition_phrases": self._find_transition_phrases(sentences),
+                "transition_phrases": transition_phrases,
             },
             "distinctive_patterns": {
                 "signature_phrases": signature_phrases,
                 "quirks": quirks,
-                "rhythm_pattern": self._analyze_rhythm(sentence_lengths),
+                "quirk_stats": quirk_stats,
+                "rhythm_pattern": rhythm_pattern,
             },
-            # Sample excerpts for the prompt
-            "excerpts": diverse_excerpts
+            "excerpts": excerpts
         }
+        if stats.approximation["documents"]:
+            style_profile["approximation"] = self._approximation_summary(stats)
         
-        # Generate human-readable style description
-        style_profile["description"] = self._generate_style_description(style_profile)
-        
-        # Generate specific instructions for mimicking this style
-        style_profile["mimicry_instructions"] = self._generate_mimicry_instructions(style_profile)
+        with stage("description", len(quirks) + len(signature_phrases)):
+            # Generate human-readable style description
+            style_profile["description"] = self._generate_style_description(style_profile)
+            
+            # Generate specific instructions for mimicking this style
+            style_profile["mimicry_instructions"] = self._generate_mimicry_instructions(style_profile)
         
+        self.profiler.flush("build_profile")
         return style_profile
     
     
+    def _length_histogram(self, lengths) -> Counter:
+        """Histogram of a sequence of lengths, counted in one vectorized pass."""
+        values, counts = np.unique(np.asarray(lengths, dtype=np.int64), return_counts=True)
+        return Counter(dict(zip(values.tolist(), counts.tolist())))
+    
+    
+    def _approximation_summary(self, stats: StyleStats) -> Dict[str, Any]:
+        """Sampling totals of merged statistics that include approximate samples.
+        
+        The vocabulary estimate and rare words of an approximate sample do not
+        survive merging with other samples; the profile fields built from them are
+        listed as unavailable and only reflect the sampled text.
+        """
+        unavailable = []
+        if stats.vocabulary_estimate is None:
+            unavailable += ["word_stats.vocabulary_size", "word_stats.lexical_diversity"]
+        if stats.rare_words is None:
+            unavailable.append("word_stats.rare_words")
+        return {
+            "documents": stats.approximation["documents"],
+            "sampled_characters": stats.approximation["sampled_characters"],
+            "total_characters": stats.approximation["total_characters"],
+            "unavailable": unavailable,
+        }
+    
+    
+    def _approximation_intervals(self, group_stats: List[StyleStats], fraction: float) -> Dict[str, Any]:
+        """Confidence intervals of the profile's averages, distributions and rates.
+        
+        Every metric is a ratio of two per-group totals (e.g. tokens over
+        sentences), keyed by its path in the profile.
+        """
+        columns = defaultdict(list)
+        for stats in group_stats:
+            sentences = stats.sentence_count
+            words = stats.word_count
+            values, counts = self._histogram_arrays(stats.sentence_lengths)
+            paragraph_values, paragraph_counts = self._histogram_arrays(stats.paragraph_lengths)
+            distribution = self._get_length_distribution(stats.sentence_lengths)
+            punctuation = self._analyze_punctuation(stats.punctuation, words)["counts"]
+            
+            columns["sentences"].append(sentences)
+            columns["words"].append(words)
+            columns["paragraphs"].append(int(paragraph_counts.sum()))
+            columns["tokens"].append(int((values * counts).sum()))
+            columns["word_length_total"].append(stats.word_length_total)
+            columns["paragraph_sentences"].append(int((paragraph_values * paragraph_counts).sum()))
+            columns["punctuation"].append(sum(punctuation.values()))
+            for bucket, percent in distribution.items():
+                columns[f"length_{bucket}"].append(percent / 100 * sentences)
+            for name in ["question", "exclamation", "complex", "simple", "quote_containing"]:
+                columns[f"type_{name}"].append(stats.sentence_types[name])
+            for mark in [';', '!']:
+                columns[mark].append(stats.punctuation[mark])
+            for name in QUIRK_NAMES:
+                columns[f"quirk_{name}"].append(stats.quirks[name])
+        columns = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+        
+        def interval(numerator: str, denominator: str, scale: float = 1.0):
+            return ratio_interval(columns[numerator], columns[denominator], fraction, scale)
+        
+        intervals = {
+            "sentence_stats.avg_length": interval("tokens", "sentences"),
+            "word_stats.avg_length": interval("word_length_total", "words"),
+            "structure_stats.avg_paragraph_sentences": interval("paragraph_sentences", "paragraphs"),
+            "structure_stats.punctuation_patterns.density": interval("punctuation", "words", 100),
+            "structure_stats.punctuation_patterns.patterns.semicolon_frequency": interval(";", "words", 1000),
+            "structure_stats.punctuation_patterns.patterns.exclamation_frequency": interval("!", "words", 1000),
+        }
+        for bucket in ["short", "medium", "long"]:
+            intervals[f"sentence_stats.length_distribution.{bucket}"] = interval(f"length_{bucket}", "sentences", 100)
+        for name in ["question", "exclamation", "complex", "simple", "quote_containing"]:
+            intervals[f"sentence_stats.sentence_types.{name}"] = interval(f"type_{name}", "sentences", 100)
+        for name in QUIRK_NAMES:
+            if name == "fragments":
+                intervals[f"distinctive_patterns.quirk_stats.{name}.rate"] = interval(f"quirk_{name}", "sentences", 100)
+            else:
+                intervals[f"distinctive_patterns.quirk_stats.{name}.rate"] = interval(f"quirk_{name}", "words", 1000)
+        return intervals
+    
+    
+    def _histogram_arrays(self, histogram: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        """The values and counts of a histogram as two aligned integer arrays."""
+        values = np.fromiter(histogram.keys(), dtype=np.int64, count=len(histogram))
+        counts = np.fromiter(histogram.values(), dtype=np.int64, count=len(histogram))
+        return values, counts
+    
+    
+    def _histogram_moments(self, histogram: Counter) -> Tuple[float, float]:
+        """Mean and standard deviation of the values counted in a histogram."""
+        if not histogram:
+            return 0, 0
+        values, counts = self._histogram_arrays(histogram)
+        values = values.astype(np.float64)
+        counts = counts.astype(np.float64)
+        total = counts.sum()
+        mean = (values * counts).sum() / total
+        std = np.sqrt((counts * (values - mean) ** 2).sum() / total)
+        return mean, std
+    
+    
     def _extract_ngrams(self, tokens: List[str], n: int) -> Counter:
-        """Extract n-grams from a list of tokens."""
-        ngrams = []
-        for i in range(len(tokens) - n + 1):
-            ngram = ' '.join(tokens[i:i+n])
-            ngrams.append(ngram)
-        return Counter(ngrams)
+        """Count all n-grams in a list of tokens."""
+        return NGramIndex(tokens).counts(n)
     
     
-    def _analyze_sentence_starters(self, sentences: List[str]) -> List[Tuple[str, float]]:
-        """Analyze how sentences typically begin."""
-        starters = []
-        for sentence in sentences:
-            words = word_tokenize(sentence)
+    def _count_sentence_starters(self, doc: TextDocument) -> Counter:
+        """Count how sentences begin (their first one or two words)."""
+        starters = Counter()
+        for i in range(len(doc.sentence_spans)):
+            words = doc.sentence_tokens(i)
             if words:
                 # Get the first 1-2 words as potential starters
                 if len(words) >= 2:
                     starter = ' '.join(words[:2]).lower()
                 else:
                     starter = words[0].lower()
-                starters.append(starter)
-        
-        # Count frequency and calculate percentage
-        counter = Counter(starters)
-        total = len(starters)
-        return [(phrase, count/total*100) for phrase, count in counter.most_common(10)]
-    
-    
-    def _categorize_sentence_types(self, sentences: List[str]) -> Dict[str, float]:
-        """Categorize sentences by type (question, statement, exclamation, etc.)."""
-        types = {
-            "question": 0,
-            "exclamation": 0,
-            "complex": 0,  # Contains semicolons or multiple clauses
-            "simple": 0,
-            "quote_containing": 0
-        }
-        
-        for sentence in sentences:
-            if '?' in sentence:
-                types["question"] += 1
-            elif '!' in sentence:
-                types["exclamation"] += 1
-            elif ';' in sentence or ', and' in sentence.lower() or ', but' in sentence.lower():
-                types["complex"] += 1
-            else:
-                types["simple"] += 1
-            
-            if '"' in sentence or "'" in sentence:
-                types["quote_containing"] += 1
+                starters[starter] += 1
+        return starters
+    
+    
+    def _analyze_sentence_starters(self, starters: Counter, total: int) -> List[Tuple[str, float]]:
+        """Analyze how sentences typically begin."""
+        # Count frequency and calculate percentage (every sentence has a starter)
+        return [(phrase, count/total*100) for phrase, count in starters.most_common(10)]
+    
+    
+    def _count_sentence_types(self, doc: TextDocument) -> Counter:
+        """Count sentences by type (question, statement, exclamation, etc.)."""
+        chars = doc.characters
+        spans = np.asarray(doc.sentence_spans, dtype=np.int64).reshape(-1, 2)
+        question = chars.sentences_containing('?', spans)
+        exclamation = ~question & chars.sentences_containing('!', spans)
+        # Contains semicolons or multiple clauses
+        complex_ = ~question & ~exclamation & (
+            chars.sentences_containing(';', spans) | chars.sentences_with_conjunction(spans)
+        )
+        quotes = chars.sentences_containing('"', spans) | chars.sentences_containing("'", spans)
         
-        # Convert to percentages
-        total = len(sentences)
-        return {k: (v/total*100) for k, v in types.items()}
+        return Counter({
+            "question": int(question.sum()),
+            "exclamation": int(exclamation.sum()),
+            "complex": int(complex_.sum()),
+            "simple": int(len(spans) - question.sum() - exclamation.sum() - complex_.sum()),
+            "quote_containing": int(quotes.sum())
+        })
+    
+    
+    def _categorize_sentence_types(self, types: Counter, total: int) -> Dict[str, float]:
+        """Convert sentence type counts to percentages."""
+        keys = ["question", "exclamation", "complex", "simple", "quote_containing"]
+        return {k: (types[k]/total*100) for k in keys}
+    
+    
+    def _count_punctuation(self, chars: CharacterStats) -> Counter:
+        """Count punctuation marks and multi-character punctuation patterns."""
+        punctuation_marks = ['.', ',', ';', ':', '!', '?', '-', '(', ')', '"', "'"]
+        counts = Counter({p: chars.count(p) for p in punctuation_marks})
+        counts["em_dash"] = chars.em_dashes + chars.run_count('-', 2)
+        counts["ellipsis"] = chars.run_count('.', 3)
+        return counts
     
     
-    def _analyze_punctuation(self, text: str) -> Dict[str, Any]:
+    def _analyze_punctuation(self, counts: Counter, word_count: int) -> Dict[str, Any]:
         """Analyze punctuation patterns in detail."""
         # Count basic punctuation
         punctuation_marks = ['.', ',', ';', ':', '!', '?', '-', '(', ')', '"', "'"]
-        punct_counts = {p: text.count(p) for p in punctuation_marks}
+        punct_counts = {p: counts[p] for p in punctuation_marks}
         
-        # Calculate punctuation density (per 100 words)
-        words = word_tokenize(text)
-        word_count = len([w for w in words if w.isalpha()])
+        # Calculate punctuation density (per 100 alphabetic words)
         density = sum(punct_counts.values()) / (word_count / 100) if word_count else 0
         
         # Look for specific patterns
         patterns = {
-            "em_dash_usage": text.count('—') + text.count('--'),
-            "ellipsis_usage": text.count('...'),
+            "em_dash_usage": counts["em_dash"],
+            "ellipsis_usage": counts["ellipsis"],
             "semicolon_frequency": punct_counts.get(';', 0) / (word_count / 1000) if word_count else 0,
             "exclamation_frequency": punct_counts.get('!', 0) / (word_count / 1000) if word_count else 0,
             "parenthetical_usage": min(punct_counts.get('(', 0), punct_counts.get(')', 0)),
@@ -204,21 +516,19 @@ class StyleAnalyzer:
         }
     
     
-    def _analyze_paragraph_patterns(self, paragraphs: List[str]) -> Dict[str, Any]:
-        """Analyze paragraph structure patterns."""
-        # Length distribution
-        lengths = [len(sent_tokenize(p)) for p in paragraphs]
-        
+    def _analyze_paragraph_patterns(self, lengths: Counter) -> Dict[str, Any]:
+        """Analyze paragraph structure patterns from a histogram of sentences per paragraph."""
         # Check for specific patterns
-        has_one_sentence_paragraphs = any(l == 1 for l in lengths)
-        has_very_long_paragraphs = any(l > 5 for l in lengths)
+        values, _ = self._histogram_arrays(lengths)
+        has_one_sentence_paragraphs = lengths[1] > 0
+        has_very_long_paragraphs = bool((values > 5).any())
         
         # Are paragraphs consistent in length or varied?
-        length_variation = np.std(lengths) if lengths else 0
+        avg_sentences, length_variation = self._histogram_moments(lengths)
         length_consistency = "consistent" if length_variation < 1.5 else "varied"
         
         return {
-            "avg_sentences": np.mean(lengths) if lengths else 0,
+            "avg_sentences": avg_sentences,
             "length_variation": length_variation,
             "length_consistency": length_consistency,
             "uses_one_sentence_paragraphs": has_one_sentence_paragraphs,
@@ -226,49 +536,73 @@ class StyleAnalyzer:
         }
     
     
-    def _analyze_rhythm(self, sentence_lengths: List[int]) -> str:
-        """Analyze the rhythm pattern of sentence lengths."""
-        if not sentence_lengths or len(sentence_lengths) < 3:
-            return "insufficient data"
+    def _classify_rhythm(self, sentence_lengths: np.ndarray) -> Counter:
+        """Record which rhythm patterns a single document's sentence lengths follow.
+
+        Each sample is classified on its own and the counts are summed, so rhythm
+        merges and subtracts with the other statistics. Documents of fewer than
+        three sentences show no pattern and are not counted.
+        """
+        if len(sentence_lengths) < 3:
+            return Counter()
             
         # Is there a pattern of variation? e.g., short-long-short
-        diffs = [sentence_lengths[i+1] - sentence_lengths[i] for i in range(len(sentence_lengths)-1)]
+        signs = np.sign(np.diff(sentence_lengths))
         
-        # Check for alternating pattern
-        alternating = all((diffs[i] > 0 and diffs[i+1] < 0) or (diffs[i] < 0 and diffs[i+1] > 0) 
-                         for i in range(len(diffs)-1))
+        # Alternating means every pair of consecutive diffs has opposite signs
+        alternating = bool((signs[:-1] * signs[1:] == -1).all())
         
         # Check for ascending or descending pattern
-        ascending = all(d > 0 for d in diffs)
-        descending = all(d < 0 for d in diffs)
+        ascending = bool((signs > 0).all())
+        descending = bool((signs < 0).all())
+        
+        return Counter({
+            "documents": 1,
+            "alternating": int(alternating),
+            "ascending": int(ascending),
+            "descending": int(descending)
+        })
+    
+    
+    def _analyze_rhythm(self, stats: StyleStats) -> str:
+        """Analyze the rhythm pattern of sentence lengths.
+
+        With several samples, a pattern is reported when every sample long enough
+        to show one follows it. Unlike classifying all samples as one joined
+        sequence, the step from one sample to the next and samples of one or two
+        sentences do not break the pattern.
+        """
+        if stats.sentence_count < 3:
+            return "insufficient data"
         
-        # Calculate proportion of short, medium, long sentences
-        short = sum(1 for l in sentence_lengths if l < 10) / len(sentence_lengths)
-        medium = sum(1 for l in sentence_lengths if 10 <= l <= 20) / len(sentence_lengths)
-        long = sum(1 for l in sentence_lengths if l > 20) / len(sentence_lengths)
+        # A pattern holds only if every document long enough to show one follows it
+        documents = stats.rhythm["documents"]
+        distribution = self._get_length_distribution(stats.sentence_lengths)
         
-        if alternating:
+        if documents and stats.rhythm["alternating"] == documents:
             return "alternating"
-        elif ascending:
+        elif documents and stats.rhythm["ascending"] == documents:
             return "ascending"
-        elif descending:
+        elif documents and stats.rhythm["descending"] == documents:
             return "descending"
-        elif short > 0.6:
+        elif distribution["short"] > 60:
             return "predominantly short"
-        elif long > 0.6:
+        elif distribution["long"] > 60:
             return "predominantly long"
         else:
             return "mixed"
     
     
-    def _get_length_distribution(self, lengths: List[int]) -> Dict[str, float]:
-        """Get distribution of sentence lengths by category."""
-        if not lengths:
+    def _get_length_distribution(self, lengths: Counter) -> Dict[str, float]:
+        """Get distribution of sentence lengths by category from a length histogram."""
+        values, counts = self._histogram_arrays(lengths)
+        total = int(counts.sum())
+        if not total:
             return {"short": 0, "medium": 0, "long": 0}
-            
-        short = sum(1 for l in lengths if l < 10) / len(lengths)
-        medium = sum(1 for l in lengths if 10 <= l <= 20) / len(lengths)
-        long = sum(1 for l in lengths if l > 20) / len(lengths)
+        
+        # Bucket every length at once: 0 short (< 10), 1 medium (10-20), 2 long (> 20)
+        buckets = np.bincount(np.digitize(values, [10, 21]), weights=counts, minlength=3)
+        short, medium, long = (buckets / total).tolist()
         
         return {
             "short": short * 100,  # as percentage
@@ -323,36 +657,64 @@ class StyleAnalyzer:
         return signature_phrases[:10]
     
     
-    def _find_transition_phrases(self, sentences: List[str]) -> List[str]:
+    def _count_transition_phrases(self, doc: TextDocument) -> Counter:
+        """Count sentences using each transition phrase to connect ideas."""
+        found = {}
+        # Check if sentence starts with a transition
+        offsets = doc.token_offsets
+        for i in range(len(doc.sentence_spans)):
+            if offsets[i] < offsets[i + 1]:
+                first = doc.tokens[offsets[i]].lower()
+                if first in TRANSITION_PHRASES:
+                    found[(i, first)] = None
+        
+        # Check if transitions appear after commas, in one pass over the text
+        text_lower = doc.text.lower()
+        if len(text_lower) == len(doc.text):
+            matches = _TRANSITION_MATCHER.finditer_spans(text_lower, doc.sentence_spans)
+        else:
+            # Lowercasing changed the length (e.g. 'İ'), so offsets no longer line up
+            matches = (
+                (i, start, end, phrase)
+                for i, sentence in enumerate(doc.sentences)
+                for start, end, phrase in _TRANSITION_MATCHER.finditer(sentence.lower())
+            )
+        for i, _, _, phrase in matches:
+            found[(i, phrase[2:])] = None
+        
+        return Counter(trans for _, trans in found)
+    
+    
+    def _find_transition_phrases(self, transitions: Counter) -> List[str]:
         """Identify transition phrases or words used to connect sentences."""
-        transition_words = [
-            "however", "therefore", "moreover", "furthermore", "nevertheless",
-            "consequently", "alternatively", "meanwhile", "subsequently", "conversely",
-            "indeed", "similarly", "likewise", "in contrast", "for instance",
-            "specifically", "notably", "primarily", "certainly", "undoubtedly"
-        ]
-        
-        found_transitions = set()
-        for sentence in sentences:
-            words = word_tokenize(sentence.lower())
-            # Check if sentence starts with a transition
-            if words and words[0] in transition_words:
-                found_transitions.add(words[0])
-            # Check if transitions appear after commas
-            sentence_lower = sentence.lower()
-            for trans in transition_words:
-                if f", {trans}" in sentence_lower:
-                    found_transitions.add(trans)
-        
-        return list(found_transitions)
-    
-    
-    def _identify_writing_quirks(self, text: str, starters: List, punct: Dict, phrases: List) -> List[str]:
+        return [trans for trans, count in transitions.items() if count > 0]
+    
+    
+    def _count_quirks(self, doc: TextDocument) -> Counter:
+        """Count occurrences of the patterns behind the writing quirks."""
+        return count_quirks(doc)
+    
+    
+    def _quirk_rates(self, stats: StyleStats) -> Dict[str, Dict[str, float]]:
+        """Quirk counts with their rates (fragments per 100 sentences, the rest per 1000 words)."""
+        rates = {}
+        for name in QUIRK_NAMES:
+            count = stats.quirks[name]
+            if name == "fragments":
+                rate = count / stats.sentence_count * 100 if stats.sentence_count else 0
+            else:
+                rate = count / (stats.word_count / 1000) if stats.word_count else 0
+            rates[name] = {"count": count, "rate": rate}
+        return rates
+    
+    
+    def _identify_writing_quirks(self, stats: StyleStats, starters: List, punct: Dict, phrases: List) -> List[str]:
         """Identify unique quirks or patterns in the writing."""
         quirks = []
+        counts = stats.quirks
         
         # Check for specific patterns
-        if text.count("I think") > 2:
+        if counts["i_think"] > 2:
             quirks.append("frequently uses 'I think' to qualify statements")
             
         if sum(1 for s in starters if s[0].startswith(("and", "but"))) >= 2:
@@ -364,44 +726,58 @@ class StyleAnalyzer:
         if punct["patterns"]["parenthetical_usage"] > 3:
             quirks.append("frequently uses parentheticals")
             
-        # Pattern of repeated words
-        repeat_pattern = re.findall(r'(\b\w+\b)(?:\s+\w+){1,4}\s+\1\b', text.lower())
-        if repeat_pattern:
+        if counts["close_repeats"]:
             quirks.append("tends to repeat key words within close proximity")
             
-        # Sentence fragments
-        fragments = sum(1 for s in sent_tokenize(text) if len(word_tokenize(s)) < 5)
-        if fragments > 2:
+        if counts["fragments"] > 2:
             quirks.append("uses sentence fragments for emphasis")
             
-        # Check capitalization patterns (ALL CAPS for emphasis)
-        if re.search(r'\b[A-Z]{2,}\b', text):
+        if counts["all_caps"]:
             quirks.append("uses ALL CAPS for emphasis")
             
         # Add any other identified patterns
         return quirks
     
     
-    def _extract_diverse_excerpts(self, sentences: List[str], lengths: List[int], num_excerpts: int = 3) -> List[str]:
+    def _sample_excerpt_candidates(self, sentences: List[str], lengths: List[int],
+                                   rng: random.Random) -> Dict[str, Dict[str, Any]]:
+        """Keep a uniform sample of short, medium and long sentences as excerpt candidates."""
+        categories = {category: [] for category in EXCERPT_CATEGORIES}
+        for position, (sentence, length) in enumerate(zip(sentences, lengths)):
+            if length < 20:
+                categories["short"].append([position, sentence])
+            elif length <= 40:
+                categories["medium"].append([position, sentence])
+            else:
+                categories["long"].append([position, sentence])
+        
+        excerpts = {}
+        for category, items in categories.items():
+            if len(items) > EXCERPT_CANDIDATES:
+                items = [items[i] for i in sorted(rng.sample(range(len(items)), EXCERPT_CANDIDATES))]
+            excerpts[category] = {"seen": len(categories[category]), "candidates": items}
+        return excerpts
+    
+    
+    def _extract_diverse_excerpts(self, stats: StyleStats, num_excerpts: int = 3) -> List[str]:
         """Extract diverse representative excerpts that showcase different writing characteristics."""
-        if len(sentences) <= num_excerpts:
-            return sentences
+        pool = sorted(
+            candidate for category in EXCERPT_CATEGORIES
+            for candidate in stats.excerpts[category]["candidates"]
+        )
+        if stats.sentence_count <= num_excerpts:
+            return [sentence for _, sentence in pool]
         
         # Aim for diversity in excerpts
+        rng = self._rng(stats.excerpts)
         excerpts = []
         
-        # Get a short, medium, and long sentence if possible
-        sentence_categories = {
-            "short": [s for s, l in zip(sentences, lengths) if l < 20],
-            "medium": [s for s, l in zip(sentences, lengths) if 20 <= l <= 40],
-            "long": [s for s, l in zip(sentences, lengths) if l > 40]
-        }
-        
-        # Try to get one from each category
-        for category in ["short", "medium", "long"]:
-            if sentence_categories[category]:
+        # Try to get one from each category (short, medium, long)
+        for category in EXCERPT_CATEGORIES:
+            candidates = stats.excerpts[category]["candidates"]
+            if candidates:
                 # Get a random sentence from this category
-                excerpt = random.choice(sentence_categories[category])
+                excerpt = candidates[rng.randrange(len(candidates))][1]
                 if excerpt not in excerpts:
                     excerpts.append(excerpt)
                 
@@ -409,11 +785,11 @@ class StyleAnalyzer:
                 if len(excerpts) >= num_excerpts:
                     break
         
-        # If we still need more excerpts, get them from random positions
-        while len(excerpts) < num_excerpts and len(excerpts) < len(sentences):
-            position = random.randint(0, len(sentences) - 1)
-            if sentences[position] not in excerpts:
-                excerpts.append(sentences[position])
+        # If we still need more excerpts, pick them by index from the unused candidates
+        unused = list(dict.fromkeys(sentence for _, sentence in pool if sentence not in excerpts))
+        needed = min(num_excerpts - len(excerpts), len(unused))
+        if needed > 0:
+            excerpts.extend(unused[i] for i in rng.sample(range(len(unused)), needed))
         
         return excerpts
     
@@ -0,0 +1,316 @@
+import json
+import random
+import hashlib
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Tuple
+
+
+# Number of candidate sentences kept per excerpt category
+EXCERPT_CANDIDATES = 5
+
+EXCERPT_CATEGORIES = ["short", "medium", "long"]
+
+# Most frequent bigrams and trigrams kept per stored document and per stored profile;
+# signature phrases only look at the first few dozen
+NGRAM_TOP_K = 2000
+_NGRAM_FIELDS = ["bigrams", "trigrams"]
+
+# Counters whose keys are integers (histograms); JSON stores them as strings
+_HISTOGRAM_FIELDS = ["sentence_lengths", "paragraph_lengths"]
+
+_COUNTER_FIELDS = [
+    "sentence_lengths",
+    "paragraph_lengths",
+    "word_counts",
+    "bigrams",
+    "trigrams",
+    "starters",
+    "sentence_types",
+    "punctuation",
+    "transitions",
+    "quirks",
+    "rhythm",
+]
+
+
+class StyleStats:
+    """Mergeable sufficient statistics for one or more writing samples.
+
+    Everything a style profile needs is kept as counters and histograms, so the
+    statistics of several samples can be combined with ``merge`` without looking
+    at their text again. Samples are treated as independent documents: n-grams
+    and rhythm never span two samples.
+
+    Bigrams and trigrams are a bounded heavy-hitter summary rather than exact
+    counts: each document keeps its NGRAM_TOP_K most frequent ones, and so does
+    the serialized form of merged statistics.
+    """
+
+    def __init__(self):
+        self.documents = 0
+        self.word_total = 0                  # alphabetic words
+        self.word_length_total = 0
+        self.sentence_lengths = Counter()    # tokens per sentence -> sentences
+        self.paragraph_lengths = Counter()   # sentences per paragraph -> paragraphs
+        self.word_counts = Counter()         # lowercased alphabetic words
+        self.bigrams = Counter()
+        self.trigrams = Counter()
+        self.starters = Counter()            # first one or two words of each sentence
+        self.sentence_types = Counter()
+        self.punctuation = Counter()
+        self.transitions = Counter()
+        self.quirks = Counter()
+        self.rhythm = Counter()              # documents following each rhythm pattern
+        # category -> {"seen": sentences in category, "candidates": [[position, sentence], ...]}
+        self.excerpts = {category: {"seen": 0, "candidates": []} for category in EXCERPT_CATEGORIES}
+        # Set only when word_counts is a bounded top-k summary instead of an exact counter
+        self.vocabulary_estimate = None
+        self.rare_words = None
+        # Samples analyzed approximately: "documents", "sampled_characters", "total_characters"
+        self.approximation = Counter()
+
+    @property
+    def sentence_count(self) -> int:
+        return sum(self.sentence_lengths.values())
+
+    @property
+    def word_count(self) -> int:
+        """Number of alphabetic words."""
+        return self.word_total
+
+    @property
+    def vocabulary_size(self) -> int:
+        if self.vocabulary_estimate is not None:
+            return self.vocabulary_estimate
+        return len(self.word_counts)
+
+    @property
+    def rare_word_counts(self) -> Counter:
+        """Counts to pick rare words from: the exact word counts, or the tracked long words."""
+        if self.rare_words is not None:
+            return self.rare_words
+        return self.word_counts
+
+    def merge(self, other: "StyleStats") -> "StyleStats":
+        """Return the statistics of both sets of samples combined."""
+        merged = StyleStats()
+        merged.update(self)
+        merged.update(other)
+        return merged
+
+    def update(self, other: "StyleStats"):
+        """Add the samples of ``other`` to these statistics in place."""
+        offset = self.sentence_count
+        self.documents += other.documents
+        self.word_total += other.word_total
+        self.word_length_total += other.word_length_total
+        for field in _COUNTER_FIELDS:
+            getattr(self, field).update(getattr(other, field))
+        self.approximation.update(other.approximation)
+
+        self.excerpts = _merge_excerpts(self.excerpts, other.excerpts, offset)
+
+    def subtract(self, other: "StyleStats") -> "StyleStats":
+        """Return these statistics with the samples of ``other`` taken out.
+
+        ``other`` must have been merged into these statistics before. Counters and
+        histograms are subtracted exactly, the n-gram summaries up to the n-grams
+        they no longer hold; excerpt candidates that came from
+        ``other`` are dropped, and the remaining ones stay a sample of what is left.
+        Nothing takes their place, so the reservoirs can run empty: replace
+        ``excerpts`` with ``merge_excerpts`` of the remaining samples to get those
+        of a full merge.
+        """
+        remaining = StyleStats()
+        remaining.documents = max(self.documents - other.documents, 0)
+        remaining.word_total = max(self.word_total - other.word_total, 0)
+        remaining.word_length_total = max(self.word_length_total - other.word_length_total, 0)
+        for field in _COUNTER_FIELDS:
+            counter = Counter(getattr(self, field))
+            counter.subtract(getattr(other, field))
+            # Unary plus drops the entries that reached zero
+            setattr(remaining, field, +counter)
+        remaining.approximation = self.approximation - other.approximation
+
+        for category in EXCERPT_CATEGORIES:
+            mine, theirs = self.excerpts[category], other.excerpts[category]
+            removed = {sentence for _, sentence in theirs["candidates"]}
+            remaining.excerpts[category] = {
+                "seen": max(mine["seen"] - theirs["seen"], 0),
+                "candidates": [c for c in mine["candidates"] if c[1] not in removed],
+            }
+        return remaining
+
+    def scale(self, factor: float) -> "StyleStats":
+        """Return these statistics with every count multiplied by ``factor`` and rounded.
+
+        Used to extrapolate the statistics of a sample of a text to the whole text:
+        ratios between counts are kept (up to rounding), while absolute counts such
+        as punctuation marks and quirks become estimates for the full text. The
+        excerpt candidates are those of the sample, and so are the rare words:
+        they are picked from the unscaled counts, where a word seen once in the
+        sample still counts once.
+        """
+        scaled = StyleStats()
+        scaled.documents = self.documents
+        scaled.word_total = round(self.word_total * factor)
+        scaled.word_length_total = round(self.word_length_total * factor)
+        for field in _COUNTER_FIELDS:
+            counter = Counter({key: round(count * factor) for key, count in getattr(self, field).items()})
+            setattr(scaled, field, counter)
+        scaled.excerpts = dict(self.excerpts)
+        scaled.vocabulary_estimate = self.vocabulary_estimate
+        scaled.rare_words = Counter(self.rare_word_counts)
+        scaled.approximation = Counter(self.approximation)
+        return scaled
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable representation, suitable for a JSON column.
+
+        The n-gram summaries are cut to their NGRAM_TOP_K most frequent entries, so
+        the stored statistics stay bounded however many samples were merged.
+        """
+        data = {
+            "documents": self.documents,
+            "word_total": self.word_total,
+            "word_length_total": self.word_length_total,
+            "excerpts": self.excerpts,
+        }
+        for field in _COUNTER_FIELDS:
+            counter = getattr(self, field)
+            if field in _HISTOGRAM_FIELDS:
+                data[field] = {str(k): v for k, v in counter.items()}
+            elif field in _NGRAM_FIELDS:
+                data[field] = dict(top_counts(counter, NGRAM_TOP_K))
+            else:
+                data[field] = dict(counter)
+        if self.vocabulary_estimate is not None:
+            data["vocabulary_estimate"] = self.vocabulary_estimate
+        if self.rare_words is not None:
+            data["rare_words"] = dict(self.rare_words)
+        if self.approximation:
+            data["approximation"] = dict(self.approximation)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StyleStats":
+        stats = cls()
+        stats.documents = data.get("documents", 0)
+        stats.word_length_total = data.get("word_length_total", 0)
+        for field in _COUNTER_FIELDS:
+            values = data.get(field, {})
+            if field in _HISTOGRAM_FIELDS:
+                setattr(stats, field, Counter({int(k): v for k, v in values.items()}))
+            else:
+                setattr(stats, field, Counter(values))
+        for category in EXCERPT_CATEGORIES:
+            if category in data.get("excerpts", {}):
+                stats.excerpts[category] = data["excerpts"][category]
+        stats.word_total = data.get("word_total", sum(stats.word_counts.values()))
+        stats.vocabulary_estimate = data.get("vocabulary_estimate")
+        if data.get("rare_words") is not None:
+            stats.rare_words = Counter(data["rare_words"])
+        stats.approximation = Counter(data.get("approximation", {}))
+        return stats
+
+
+def merge_stats(stats_list: List[StyleStats]) -> StyleStats:
+    """Merge any number of statistics objects in order.
+
+    Gives the same result as merging them pairwise from the left, but the
+    counters are accumulated in place instead of being copied at every step.
+    """
+    merged = StyleStats()
+    for stats in stats_list:
+        merged.update(stats)
+    return merged
+
+
+def top_counts(counter: Counter, k: int) -> Counter:
+    """The ``k`` most frequent entries of ``counter``, in its original order.
+
+    Ties are broken like ``most_common``, by insertion order, so cutting a
+    counter built over a text keeps what ``most_common`` would return.
+    """
+    if len(counter) <= k:
+        return counter
+    kept = {key for key, _ in counter.most_common(k)}
+    return Counter({key: count for key, count in counter.items() if key in kept})
+
+
+def merge_excerpts(stats_list: Iterable[StyleStats]) -> Dict[str, Dict[str, Any]]:
+    """The excerpt reservoirs ``merge_stats(stats_list)`` would produce, without merging the counters."""
+    return merge_excerpt_reservoirs((stats.excerpts, stats.sentence_count) for stats in stats_list)
+
+
+def merge_excerpt_reservoirs(reservoirs: Iterable[Tuple[Dict[str, Dict[str, Any]], int]]) -> Dict[str, Dict[str, Any]]:
+    """Merge the excerpt reservoirs of samples given as ``(excerpts, sentence count)``, in order."""
+    excerpts = StyleStats().excerpts
+    offset = 0
+    for sample_excerpts, sentence_count in reservoirs:
+        excerpts = _merge_excerpts(excerpts, sample_excerpts, offset)
+        offset += sentence_count
+    return excerpts
+
+
+def stored_excerpts(data: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """The excerpt reservoirs and sentence count of stored statistics, read without deserializing the counters."""
+    excerpts = StyleStats().excerpts
+    for category in EXCERPT_CATEGORIES:
+        if category in data.get("excerpts", {}):
+            excerpts[category] = data["excerpts"][category]
+    return excerpts, sum(data.get("sentence_lengths", {}).values())
+
+
+def content_seed(*parts: Any) -> int:
+    """A random seed derived from a hash of ``parts`` (strings or JSON-serializable values).
+
+    Seeding every random choice of the analysis this way makes it deterministic:
+    the same input always gives the same statistics and profile.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, str):
+            part = json.dumps(part, sort_keys=True, ensure_ascii=False)
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return int.from_bytes(digest.digest()[:8], "big")
+
+
+def _merge_excerpts(mine: Dict[str, Dict[str, Any]], theirs: Dict[str, Dict[str, Any]],
+                    offset: int) -> Dict[str, Dict[str, Any]]:
+    """Excerpt reservoirs of two sets of samples combined; ``offset`` is the sentence count of the first."""
+    merged = {}
+    for category in EXCERPT_CATEGORIES:
+        first, second = mine[category], theirs[category]
+        shifted = [[position + offset, sentence] for position, sentence in second["candidates"]]
+        merged[category] = {
+            "seen": first["seen"] + second["seen"],
+            "candidates": _merge_reservoirs(
+                random.Random(content_seed(first, second)),
+                (first["seen"], first["candidates"]),
+                (second["seen"], shifted),
+            ),
+        }
+    return merged
+
+
+def _merge_reservoirs(rng: random.Random, *reservoirs: Tuple[int, List]) -> List:
+    """Combine uniform samples of disjoint populations into one uniform sample.
+
+    Each reservoir is ``(population size, candidates)``. Every candidate stands for
+    ``population / len(candidates)`` sentences, and a weighted sample without
+    replacement keeps the result close to a uniform pick over the union.
+    """
+    keyed = []
+    for seen, candidates in reservoirs:
+        if not candidates:
+            continue
+        weight = seen / len(candidates)
+        for candidate in candidates:
+            keyed.append((rng.random() ** (1.0 / weight), candidate))
+
+    if len(keyed) > EXCERPT_CANDIDATES:
+        keyed.sort(key=lambda item: item[0], reverse=True)
+        keyed = keyed[:EXCERPT_CANDIDATES]
+    return sorted((candidate for _, candidate in keyed), key=lambda candidate: candidate[0])
@@ -0,0 +1,89 @@
+import bisect
+from functools import cached_property
+from typing import List, Optional, Tuple
+
+from utils.char_stats import CharacterStats
+from utils.tokenizers import TokenizerBackend, NltkTokenizer, get_tokenizer
+
+
+class TextDocument:
+    """Tokenized view of a text, built once and shared by every feature extractor.
+
+    Sentences are stored as character spans into ``text`` and tokens as one flat
+    list; ``token_offsets[i]:token_offsets[i + 1]`` are the tokens of sentence ``i``.
+    Concatenating the per-sentence tokens gives exactly what ``word_tokenize(text)``
+    returns, since NLTK word tokenization runs per sentence internally.
+    """
+
+    def __init__(self, text: str, language: str = "english", tokenizer: Optional[TokenizerBackend] = None):
+        self.text = text
+        self.language = language
+        if tokenizer is None:
+            tokenizer = get_tokenizer() if language == "english" else NltkTokenizer(language)
+        self.tokenizer = tokenizer
+
+        self.sentence_spans: List[Tuple[int, int]] = tokenizer.sentence_spans(text)
+
+        self.tokens: List[str] = []
+        self.token_offsets: List[int] = [0]
+        for start, end in self.sentence_spans:
+            self.tokens.extend(tokenizer.tokenize_sentence(text[start:end]))
+            self.token_offsets.append(len(self.tokens))
+
+        self.paragraph_spans: List[Tuple[int, int]] = self._find_paragraph_spans(text)
+
+    @staticmethod
+    def _find_paragraph_spans(text: str) -> List[Tuple[int, int]]:
+        """Character spans of the stripped, non-empty ``\\n\\n``-separated paragraphs."""
+        spans = []
+        position = 0
+        for part in text.split('\n\n'):
+            stripped = part.strip()
+            if stripped:
+                start = position + len(part) - len(part.lstrip())
+                spans.append((start, start + len(stripped)))
+            position += len(part) + 2
+        return spans
+
+    @cached_property
+    def characters(self) -> CharacterStats:
+        """Character counts of the whole text, computed once on first use."""
+        return CharacterStats(self.text)
+
+    @property
+    def sentences(self) -> List[str]:
+        return [self.text[start:end] for start, end in self.sentence_spans]
+
+    @property
+    def paragraphs(self) -> List[str]:
+        return [self.text[start:end] for start, end in self.paragraph_spans]
+
+    def sentence_tokens(self, index: int) -> List[str]:
+        """Tokens of the sentence at ``index``."""
+        return self.tokens[self.token_offsets[index]:self.token_offsets[index + 1]]
+
+    @property
+    def sentence_lengths(self) -> List[int]:
+        offsets = self.token_offsets
+        return [offsets[i + 1] - offsets[i] for i in range(len(self.sentence_spans))]
+
+    @property
+    def words_lower(self) -> List[str]:
+        """Lowercased alphabetic tokens."""
+        return [w.lower() for w in self.tokens if w.isalpha()]
+
+    @property
+    def paragraph_sentence_counts(self) -> List[int]:
+        """Number of sentences in each paragraph.
+
+        Sentence breaks inside a paragraph do not depend on text outside it, so a
+        paragraph holds one sentence plus one for every sentence that starts
+        strictly inside it. This matches running ``sent_tokenize`` per paragraph
+        without tokenizing the text a second time.
+        """
+        starts = [start for start, _ in self.sentence_spans]
+        counts = []
+        for start, end in self.paragraph_spans:
+            inner = bisect.bisect_left(starts, end) - bisect.bisect_right(starts, start)
+            counts.append(inner + 1)
+        return counts
@@ -0,0 +1,345 @@
+import os
+import zipfile
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+# Resolution that scanned PDF pages are rasterized at for OCR
+OCR_DPI = int(os.getenv("OCR_DPI", 200))
+# Consecutive pages rasterized and OCRed together; bounds the page images held in memory
+OCR_BATCH_PAGES = int(os.getenv("OCR_BATCH_PAGES", 4))
+# Worker processes parsing and OCRing uploaded files, shared by all files and jobs of the
+# process; 0 parses in the calling thread
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", 4))
+
+# Bytes read from the start of a file to recognize its format
+SNIFF_BYTES = 8192
+# Characters of a text file handed to a parser at a time
+READ_CHARS = 1024 * 1024
+
+# Bump whenever an extractor starts producing different text, so cached extractions stop matching
+EXTRACTION_VERSION = 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class ExtractionError(Exception):
+    """Raised when text cannot be extracted from an uploaded file."""
+
+
+class IncompleteExtraction(ExtractionError):
+    """Raised when only part of the text of a file could be extracted; ``text`` holds that part."""
+
+    def __init__(self, message: str, text: str):
+        super().__init__(message)
+        self.text = text
+
+
+def _extraction_pool() -> ProcessPoolExecutor:
+    """The shared extraction pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(broken: ProcessPoolExecutor):
+    """Drop a pool broken by a dead worker, so the next job starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            print("Extraction worker died, restarting the extraction pool")
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def shutdown_extraction_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _run(func, *args):
+    """Run ``func(*args)`` in the extraction pool and wait for the result.
+
+    Parsing is CPU-bound pure Python for the most part, so it runs in worker
+    processes; the calling thread only waits.
+    """
+    if EXTRACTION_WORKERS <= 0:
+        return func(*args)
+    pool = _extraction_pool()
+    try:
+        return pool.submit(func, *args).result()
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise ExtractionError("The extraction worker stopped unexpectedly")
+
+
+def _ocr_page_range(path: str, first_page: int, last_page: int, dpi: int) -> List[str]:
+    """Rasterize and OCR the pages ``first_page`` to ``last_page`` (1-based, inclusive) of a PDF."""
+    import pytesseract
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(path, dpi=dpi, first_page=first_page, last_page=last_page)
+    try:
+        return [pytesseract.image_to_string(image) for image in images]
+    finally:
+        for image in images:
+            image.close()
+
+
+def page_batches(pages: List[int], batch_pages: int = OCR_BATCH_PAGES) -> List[Tuple[int, int]]:
+    """Group sorted 1-based page numbers into ranges of at most ``batch_pages`` consecutive pages."""
+    batches = []
+    for page in pages:
+        if batches and page == batches[-1][1] + 1 and page - batches[-1][0] < batch_pages:
+            batches[-1] = (batches[-1][0], page)
+        else:
+            batches.append((page, page))
+    return batches
+
+
+def ocr_pdf_pages(path: str, pages: List[int], dpi: int = OCR_DPI,
+                  batch_pages: int = OCR_BATCH_PAGES) -> Iterator[Tuple[int, str]]:
+    """OCR the given 1-based pages of a PDF, yielding ``(page, text)`` in page order.
+
+    Pages are rasterized with pdf2image's first_page/last_page in batches of
+    ``batch_pages`` and OCRed in the shared extraction pool. At most two batches
+    per pool worker are in flight for each PDF, so memory does not grow with the
+    length of the document and the first pages come out before the last ones
+    are rasterized.
+    """
+    batches = page_batches(sorted(pages), batch_pages)
+    if EXTRACTION_WORKERS <= 0 or len(batches) <= 1:
+        for first, last in batches:
+            yield from zip(range(first, last + 1), _run(_ocr_page_range, path, first, last, dpi))
+        return
+
+    pool = _extraction_pool()
+    remaining = iter(batches)
+    pending = deque(
+        (first, last, pool.submit(_ocr_page_range, path, first, last, dpi))
+        for first, last in itertools.islice(remaining, 2 * EXTRACTION_WORKERS)
+    )
+    try:
+        while pending:
+            first, last, future = pending.popleft()
+            texts = future.result()
+            for next_first, next_last in itertools.islice(remaining, 1):
+                pending.append((next_first, next_last, pool.submit(_ocr_page_range, path, next_first, next_last, dpi)))
+            yield from zip(range(first, last + 1), texts)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise ExtractionError("The extraction worker stopped unexpectedly")
+    finally:
+        # Stopped early: drop the batches nobody will read
+        for _, _, future in pending:
+            future.cancel()
+
+
+# An extractor turns the uploaded file at a path into text
+Extractor = Callable[[str], str]
+# A sniffer recognizes a format from the first SNIFF_BYTES of a file, and may open the file at
+# the path itself (None when only the header is known)
+Sniffer = Callable[[bytes, Optional[str]], bool]
+
+_EXTRACTORS: Dict[str, Extractor] = {}
+_EXTENSIONS: Dict[str, str] = {}
+_SNIFFERS: List[Tuple[str, Sniffer]] = []
+
+
+def register_extractor(name: str, extensions: List[str], sniff: Optional[Sniffer] = None):
+    """Register the decorated function as the extractor of format ``name``.
+
+    Files are matched to a format by ``sniff``, which looks at their content,
+    and otherwise by their extension. Extractors import their parsing libraries
+    themselves, so a format costs nothing until a file of that format arrives.
+    """
+    def register(extractor: Extractor) -> Extractor:
+        _EXTRACTORS[name] = extractor
+        for extension in extensions:
+            _EXTENSIONS[extension] = name
+        if sniff:
+            _SNIFFERS.append((name, sniff))
+        return extractor
+    return register
+
+
+def detect_format(header: bytes, filename: str, path: Optional[str] = None) -> Optional[str]:
+    """Format of an upload from its magic bytes, or from its extension when they say nothing.
+
+    ``header`` is the start of the file; formats that cannot be told from it
+    (DOCX) are recognized only when the ``path`` of the whole file is given.
+    """
+    for name, sniff in _SNIFFERS:
+        if sniff(header, path):
+            return name
+    return _EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+
+
+def extract_text(path: str, filename: str) -> str:
+    """Extract the text of an uploaded file.
+
+    Only the first SNIFF_BYTES of the file are read here, to detect its format.
+    Extractors get the path and read the file themselves, in the shared
+    extraction pool, so it is never held in memory as a whole. Files of no
+    known format are read as plain text.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(SNIFF_BYTES)
+    name = detect_format(header, filename, path)
+    if name is None:
+        print(f"Unknown file type: {os.path.splitext(filename)[1].lower()}")
+        text = _read_text(path)
+        print(f"Attempted to read as text, extracted {len(text)} characters")
+        return text
+    return _EXTRACTORS[name](path)
+
+
+def _text_blocks(path: str) -> Iterator[str]:
+    """The text of a file in blocks of READ_CHARS: invalid bytes dropped, newlines normalized."""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for block in iter(lambda: f.read(READ_CHARS), ''):
+            yield block
+
+
+def _read_text(path: str) -> str:
+    return "".join(_text_blocks(path))
+
+
+def _zip_members(header: bytes, path: Optional[str]) -> List[str]:
+    if not header.startswith(b'PK\x03\x04') or path is None:
+        return []
+    try:
+        # The member list is at the end of the archive, so it is read from the file
+        with zipfile.ZipFile(path) as archive:
+            return archive.namelist()
+    except zipfile.BadZipFile:
+        return []
+
+
+@register_extractor('txt', ['.txt', '.md', '.markdown'])
+def _extract_plain_text(path: str) -> str:
+    text = _read_text(path)
+    print(f"TXT file processed, extracted {len(text)} characters")
+    return text
+
+
+def _docx_paragraphs(path: str) -> List[str]:
+    import docx
+    return [para.text for para in docx.Document(path).paragraphs]
+
+
+@register_extractor('docx', ['.docx'], sniff=lambda header, path: 'word/document.xml' in _zip_members(header, path))
+def _extract_docx(path: str) -> str:
+    try:
+        paragraphs = _run(_docx_paragraphs, path)
+        text = "\n".join(paragraphs)
+        print(f"DOCX file processed, extracted {len(text)} characters from {len(paragraphs)} paragraphs")
+    except Exception as doc_err:
+        print(f"Error processing DOCX: {str(doc_err)}")
+        raise ExtractionError(f"DOCX error: {str(doc_err)}")
+    return text
+
+
+def _pdf_page_texts(path: str) -> List[str]:
+    import PyPDF2
+    return [page.extract_text() or "" for page in PyPDF2.PdfReader(path).pages]
+
+
+@register_extractor('pdf', ['.pdf'], sniff=lambda header, path: header.startswith(b'%PDF-'))
+def _extract_pdf(path: str) -> str:
+    try:
+        page_texts = _run(_pdf_page_texts, path)
+        text = "\n".join(page_text for page_text in page_texts if page_text)
+        print(f"PDF text extraction attempt 1: extracted {len(text)} characters from {len(page_texts)} pages")
+    except Exception as pdf_err:
+        print(f"Error processing PDF: {str(pdf_err)}")
+        raise ExtractionError(f"PDF error: {str(pdf_err)}")
+
+    # OCR only the pages without a text layer
+    missing = [number for number, page_text in enumerate(page_texts, 1) if not page_text.strip()]
+    if missing:
+        print(f"No text layer on {len(missing)} of {len(page_texts)} PDF pages, trying OCR...")
+        try:
+            for number, page_text in ocr_pdf_pages(path, missing):
+                page_texts[number - 1] = page_text
+        except Exception as ocr_err:
+            print(f"Error in OCR process: {str(ocr_err)}")
+            if not text.strip():
+                raise ExtractionError(f"OCR error: {str(ocr_err)}")
+            # The text layer of the other pages is still worth keeping, but not as the text of the file
+            raise IncompleteExtraction(
+                f"OCR error, {len(missing)} of {len(page_texts)} pages without text: {str(ocr_err)}", text
+            )
+        else:
+            text = "\n".join(page_text for page_text in page_texts if page_text)
+            print(f"PDF OCR successful: extracted {len(text)} characters from {len(page_texts)} pages")
+    return text
+
+
+class _HTMLText(HTMLParser):
+    """Collects the visible text of an HTML document, with a blank line after each block."""
+
+    BLOCKS = {'p', 'div', 'br', 'li', 'blockquote', 'pre', 'section', 'article',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr'}
+    HIDDEN = {'script', 'style', 'head', 'template'}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.hidden = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.HIDDEN:
+            self.hidden += 1
+        elif tag in self.BLOCKS:
+            self.parts.append("\n\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.HIDDEN:
+            self.hidden = max(self.hidden - 1, 0)
+        elif tag in self.BLOCKS:
+            self.parts.append("\n\n")
+
+    def handle_data(self, data):
+        if not self.hidden:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        paragraphs = (" ".join(block.split()) for block in "".join(self.parts).split("\n\n"))
+        return "\n\n".join(paragraph for paragraph in paragraphs if paragraph)
+
+
+def _sniff_html(header: bytes, path: Optional[str]) -> bool:
+    start = header[:512].lstrip().lower()
+    return start.startswith(b'<!doctype html') or start.startswith(b'<html')
+
+
+def _html_text(path: str) -> str:
+    parser = _HTMLText()
+    for block in _text_blocks(path):
+        parser.feed(block)
+    parser.close()
+    return parser.text()
+
+
+@register_extractor('html', ['.html', '.htm'], sniff=_sniff_html)
+def _extract_html(path: str) -> str:
+    text = _run(_html_text, path)
+    print(f"HTML file processed, extracted {len(text)} characters")
+    return text
@@ -0,0 +1,175 @@
+import os
+import re
+import logging
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+from nltk.tokenize import word_tokenize
+
+from utils.nltk_resources import get_punkt
+
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Backend used unless a caller asks for a specific one
+TOKENIZER_BACKEND = os.getenv("TOKENIZER_BACKEND", "nltk")
+# Backend for anonymous /analyze-text requests, which are high volume
+ANONYMOUS_TOKENIZER_BACKEND = os.getenv("ANONYMOUS_TOKENIZER_BACKEND", "fast")
+
+
+class TokenizerBackend:
+    """Splits text into sentences (as character spans) and sentences into word tokens."""
+
+    name = ""
+
+    def sentence_spans(self, text: str) -> List[Tuple[int, int]]:
+        raise NotImplementedError
+
+    def tokenize_sentence(self, sentence: str) -> List[str]:
+        raise NotImplementedError
+
+
+class NltkTokenizer(TokenizerBackend):
+    """Punkt sentence splitting and Treebank word tokenization, as ``word_tokenize`` does."""
+
+    name = "nltk"
+
+    def __init__(self, language: str = "english"):
+        self.language = language
+
+    def sentence_spans(self, text: str) -> List[Tuple[int, int]]:
+        return list(get_punkt(self.language).span_tokenize(text))
+
+    def tokenize_sentence(self, sentence: str) -> List[str]:
+        return word_tokenize(sentence, self.language, preserve_line=True)
+
+
+# Words whose trailing period does not end a sentence
+_ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "e.g", "i.e",
+    "no", "vol", "fig", "inc", "ltd", "co", "corp", "jan", "feb", "mar", "apr", "jun",
+    "jul", "aug", "sep", "sept", "oct", "nov", "dec", "approx", "dept", "est", "gen",
+    "gov", "rev", "sgt", "capt", "col", "lt", "cf", "al"
+}
+
+# Sentence-final punctuation, any closing quotes or brackets, then whitespace or the end
+_SENTENCE_END = re.compile(r"""[.!?]+["'’”)\]]*(?=\s|$)""")
+
+_TOKEN = re.compile(r"""
+    (?P<ellipsis>\.\.\.+)
+  | (?P<dash>--+)
+  | (?P<negation>(?i:n't)(?![^\W_]))
+  | (?<=[^\W_])(?P<clitic>'(?i:s|m|d|ll|re|ve)(?![^\W_]))
+  | (?P<initials>[^\W\d_](?:\.[^\W\d_])+(?:\.(?!["'’”)\]}]*\s*$))?)
+  | (?P<number>\d+(?:[.,:]\d+)*)
+  | (?P<word>[^\W_]+?(?=(?i:n't)(?![^\W_]))
+        | [^\W_]+(?:-[^\W_]+)*(?:\.(?![.\w])(?!["'’”)\]}]*\s*$))?)
+  | (?P<quote>")
+  | (?P<other>\S)
+""", re.VERBOSE)
+
+
+class RegexTokenizer(TokenizerBackend):
+    """Fast tokenizer built from precompiled regular expressions.
+
+    Approximates the NLTK backend: sentences end at ``.``, ``!`` or ``?`` (plus
+    closing quotes) followed by whitespace, except after common abbreviations,
+    initials and ellipses followed by lowercase text; words are split like the
+    Treebank tokenizer, including contractions (``do n't``, ``it 's``),
+    directional double quotes and a detached final period.
+    Measure the difference with ``benchmarks/tokenizer_parity.py``.
+    """
+
+    name = "fast"
+
+    def sentence_spans(self, text: str) -> List[Tuple[int, int]]:
+        spans = []
+        start = None
+        position = 0
+        length = len(text)
+        for match in _SENTENCE_END.finditer(text):
+            if start is None:
+                start = _skip_whitespace(text, position)
+            punctuation = match.group()
+            if punctuation.startswith("..."):
+                # An ellipsis ends a sentence only when a capitalized word (or quote) follows
+                following = _skip_whitespace(text, match.end())
+                if following < length and text[following] in "\"'“‘([":
+                    following += 1
+                if following < length and not text[following].isupper():
+                    continue
+            elif punctuation.startswith("."):
+                word = _word_before(text, match.start())
+                if word in _ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+                    continue
+            end = match.end()
+            if end > start:
+                spans.append((start, end))
+            start = None
+            position = end
+        if start is None:
+            start = _skip_whitespace(text, position)
+        tail = text[start:].rstrip()
+        if start < length and tail:
+            spans.append((start, start + len(tail)))
+        return spans
+
+    def tokenize_sentence(self, sentence: str) -> List[str]:
+        tokens = []
+        for match in _TOKEN.finditer(sentence):
+            if match.lastgroup == "quote":
+                start = match.start()
+                opening = start == 0 or sentence[start - 1].isspace() or sentence[start - 1] in "([{<"
+                tokens.append("``" if opening else "''")
+            else:
+                tokens.append(match.group())
+        return tokens
+
+
+def _word_before(text: str, index: int) -> str:
+    """The lowercased word (dots and apostrophes included) ending at ``index``."""
+    start = index
+    while start > 0 and (text[start - 1].isalnum() or text[start - 1] in ".'’"):
+        start -= 1
+    return text[start:index].lower()
+
+
+def _skip_whitespace(text: str, position: int) -> int:
+    while position < len(text) and text[position].isspace():
+        position += 1
+    return position
+
+
+_BACKENDS = {
+    NltkTokenizer.name: NltkTokenizer,
+    RegexTokenizer.name: RegexTokenizer,
+}
+_instances: Dict[str, TokenizerBackend] = {}
+
+
+def get_tokenizer(name: str = None) -> TokenizerBackend:
+    """The shared tokenizer backend registered under ``name`` (default: TOKENIZER_BACKEND)."""
+    name = name or TOKENIZER_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown tokenizer backend '{name}', expected one of {sorted(_BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = _BACKENDS[name]()
+    return _instances[name]
+
+
+def warmup():
+    """Load the configured backends and run each once, ahead of the first analysis.
+
+    A backend whose data is missing is skipped with a warning so the app still
+    starts; analyses that use it raise the LookupError explaining the install.
+    """
+    text = "Warming up the tokenizer. It runs once per process."
+    for name in dict.fromkeys((TOKENIZER_BACKEND, ANONYMOUS_TOKENIZER_BACKEND)):
+        backend = get_tokenizer(name)
+        try:
+            for start, end in backend.sentence_spans(text):
+                backend.tokenize_sentence(text[start:end])
+        except LookupError as e:
+            logger.warning("Tokenizer backend '%s' is unavailable: %s", name, e)
@@ -18,6 +18,7 @@ import {
 } from "@/components/ui/card";
 import { Label } from "@/components/ui/label";
 import Link from "next/link";
+import { waitForAnalysisJob } from "@/lib/analysis-jobs";
 
 interface Sample {
   id: string;
@@ -162,6 +163,10 @@ export default function ProfileDetailPage() {
         throw new Error(`Upload failed: ${errorText}`);
       }
 
+      // Wait for the background analysis of the uploaded files
+      const { job_id } = await response.json();
+      await waitForAnalysisJob(apiUrl, job_id);
+
       // Refresh the profile data
       const refreshResponse = await fetch(`${apiUrl}/profiles/${profileId}`, {
         credentials: "include",
@@ -17,6 +17,7 @@ import {
 } from "@/components/ui/card";
 import { Label } from "@/components/ui/label";
 import ProtectedRoute from "@/components/ProtectedRoute";
+import { waitForAnalysisJob } from "@/lib/analysis-jobs";
 
 export default function UploadPage() {
   const [files, setFiles] = useState<File[]>([]);
@@ -82,6 +83,11 @@ export default function UploadPage() {
         }
 
         const data = await response.json();
+        setAlert({
+          message: "Files uploaded, analyzing your writing...",
+          variant: "default"
+        });
+        await waitForAnalysisJob(apiUrl, data.job_id);
         setAlert({
           message: "Files uploaded successfully!",
           variant: "success"
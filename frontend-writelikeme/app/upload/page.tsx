@@ -5,6 +5,7 @@ import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Upload, File, X } from "lucide-react";
 import { Alert } from "@/components/ui/alert";
+import { waitForAnalysisJob } from "@/lib/analysis-jobs";
 
 export default function UploadPage() {
   const [files, setFiles] = useState<File[]>([]);
@@ -50,6 +51,11 @@ export default function UploadPage() {
       }
 
       const data = await response.json();
+      setAlert({
+        message: "Files uploaded, analyzing your writing...",
+        variant: "default"
+      });
+      await waitForAnalysisJob(apiUrl, data.job_id);
       setAlert({
         message: "Files uploaded successfully.",
         variant: "success"
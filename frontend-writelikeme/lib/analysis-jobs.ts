@@ -0,0 +1,41 @@
+export interface AnalysisJob {
+  id: string;
+  profile_id: number;
+  status: "queued" | "running" | "completed" | "failed";
+  stage: string;
+  progress: number;
+  error: string | null;
+  result: Record<string, any> | null;
+  created_at: string;
+  finished_at: string | null;
+}
+
+// Poll an upload's analysis job until it completes or fails
+export async function waitForAnalysisJob(
+  apiUrl: string | undefined,
+  jobId: string,
+  onProgress?: (job: AnalysisJob) => void,
+  intervalMs: number = 1500
+): Promise<AnalysisJob> {
+  while (true) {
+    const response = await fetch(`${apiUrl}/samples/jobs/${jobId}`, {
+      credentials: "include",
+    });
+
+    if (!response.ok) {
+      throw new Error(`Could not check analysis status: ${await response.text()}`);
+    }
+
+    const { job } = await response.json();
+    onProgress?.(job);
+
+    if (job.status === "completed") {
+      return job;
+    }
+    if (job.status === "failed") {
+      throw new Error(job.error || "Analysis failed");
+    }
+
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+}